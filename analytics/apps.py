@@ -3,10 +3,19 @@ Analytics app configuration.
 """
 
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class AnalyticsConfig(AppConfig):
     """Analytics app configuration."""
     
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'analytics' 
\ No newline at end of file
+    name = 'analytics'
+    
+    def ready(self):
+        """Build the balance histogram on deploy and keep it in step with token balances."""
+        from governance.signals import balances_changed
+        from .concentration import apply_balance_changes, seed_buckets
+        
+        post_migrate.connect(seed_buckets, sender=self)
+        balances_changed.connect(apply_balance_changes, dispatch_uid='analytics.balance_buckets')
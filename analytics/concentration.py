@@ -0,0 +1,193 @@
+"""
+Governance token concentration metrics.
+
+Balances are summarised in a logarithmic histogram (``BalanceBucket``) kept
+up to date by the ``balances_changed`` signal, so the Gini coefficient, the
+Herfindahl-Hirschman index and the Nakamoto coefficient are computed from a
+few hundred bucket rows instead of a scan over every holder. The histogram
+is built from a full scan after migrations, and again before use if it is
+empty or was driven negative by deltas that arrived before it existed.
+
+Each bucket stores its holder count, balance sum and sum of squared
+balances. The HHI only needs the sums of squares and is exact. The Gini
+and Nakamoto coefficients treat the holders of a bucket as spread evenly
+across it, which bounds their error by the bucket width (about 9%).
+"""
+
+import math
+from collections import defaultdict, namedtuple
+
+from django.db import connection, transaction
+
+from governance.models import GovernanceToken, TokenSupply
+
+from .models import BalanceBucket, TokenConcentrationSnapshot
+
+# Buckets per doubling of the balance; changing it requires rebuild_buckets()
+BUCKETS_PER_DOUBLING = 8
+
+ConcentrationMetrics = namedtuple(
+    'ConcentrationMetrics',
+    ['holder_count', 'total_supply', 'gini_coefficient', 'herfindahl_index', 'nakamoto_coefficient']
+)
+
+
+def bucket_for(balance):
+    """Return the histogram bucket of a positive balance."""
+    return math.floor(math.log2(balance) * BUCKETS_PER_DOUBLING)
+
+
+def bucket_bounds(bucket):
+    """Return the ``(low, high)`` balances of a bucket; it holds ``low <= balance < high``."""
+    def first_balance(index):
+        balance = max(math.ceil(2 ** (index / BUCKETS_PER_DOUBLING)), 1)
+        # Step past any rounding in the power so bucket_for agrees at the edges
+        while balance > 1 and bucket_for(balance - 1) >= index:
+            balance -= 1
+        while bucket_for(balance) < index:
+            balance += 1
+        return balance
+    
+    return first_balance(bucket), first_balance(bucket + 1)
+
+
+def _add(totals, balance, sign):
+    """Add (sign=1) or remove (sign=-1) a balance from per-bucket totals."""
+    entry = totals[bucket_for(balance)]
+    entry[0] += sign
+    entry[1] += sign * balance
+    entry[2] += sign * float(balance) ** 2
+
+
+def apply_balance_changes(sender, changes, **kwargs):
+    """Move changed balances between buckets; connected to ``balances_changed``.
+    
+    The deltas of every touched bucket are applied with a single upsert,
+    in bucket order so concurrent writers lock rows consistently.
+    """
+    deltas = defaultdict(lambda: [0, 0, 0.0])
+    for change in changes:
+        if change.old_balance > 0:
+            _add(deltas, change.old_balance, -1)
+        if change.new_balance > 0:
+            _add(deltas, change.new_balance, 1)
+    
+    rows = [(bucket, *delta) for bucket, delta in sorted(deltas.items()) if any(delta)]
+    if not rows:
+        return
+    
+    table = connection.ops.quote_name(BalanceBucket._meta.db_table)
+    values = ', '.join(['(%s, %s, %s, %s)'] * len(rows))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} (bucket, holder_count, balance_sum, balance_square_sum) "
+            f"VALUES {values} ON CONFLICT (bucket) DO UPDATE SET "
+            f"holder_count = {table}.holder_count + EXCLUDED.holder_count, "
+            f"balance_sum = {table}.balance_sum + EXCLUDED.balance_sum, "
+            f"balance_square_sum = {table}.balance_square_sum + EXCLUDED.balance_square_sum",
+            [value for row in rows for value in row]
+        )
+
+
+def compute_metrics(buckets):
+    """Return ConcentrationMetrics for (holder_count, balance_sum, balance_square_sum) rows.
+    
+    Rows must be in ascending bucket order. The Gini coefficient is the
+    between-bucket Gini of the Lorenz curve plus each bucket's own Gini,
+    estimated from its variance as for evenly spread balances (CV / sqrt 3).
+    The HHI is on the conventional 0-10,000 scale.
+    """
+    buckets = [row for row in buckets if row[0] > 0]
+    holder_count = sum(row[0] for row in buckets)
+    total_supply = sum(row[1] for row in buckets)
+    if not holder_count or not total_supply:
+        return ConcentrationMetrics(holder_count, total_supply, 0.0, 0.0, 0)
+    
+    herfindahl = sum(row[2] for row in buckets) / float(total_supply) ** 2 * 10000
+    
+    gini = 1.0
+    cumulative_share = 0.0
+    for count, balance_sum, square_sum in buckets:
+        population_share = count / holder_count
+        supply_share = balance_sum / total_supply
+        gini -= population_share * (2 * cumulative_share + supply_share)
+        cumulative_share += supply_share
+        
+        mean = balance_sum / count
+        variance = max(square_sum / count - mean ** 2, 0.0)
+        gini += population_share * supply_share * math.sqrt(variance) / mean / math.sqrt(3)
+    
+    # Fewest holders that together hold more than half of the supply
+    nakamoto = 0
+    remaining = total_supply / 2
+    for count, balance_sum, square_sum in reversed(buckets):
+        if balance_sum <= remaining:
+            nakamoto += count
+            remaining -= balance_sum
+            continue
+        nakamoto += min(count, math.floor(remaining / (balance_sum / count)) + 1)
+        break
+    
+    return ConcentrationMetrics(
+        holder_count, total_supply, min(max(gini, 0.0), 1.0), herfindahl, nakamoto
+    )
+
+
+def _bucket_rows():
+    """Return the (bucket, holder_count, balance_sum, balance_square_sum) rows in bucket order."""
+    return list(BalanceBucket.objects.order_by('bucket').values_list(
+        'bucket', 'holder_count', 'balance_sum', 'balance_square_sum'
+    ))
+
+
+def histogram():
+    """Return the live histogram rows as (bucket, holder_count, balance_sum, balance_square_sum).
+    
+    A histogram that was never built, or that went negative because deltas
+    were applied before it was, is rebuilt from a full scan first.
+    """
+    rows = _bucket_rows()
+    if not rows or any(row[1] < 0 for row in rows):
+        rebuild_buckets()
+        rows = _bucket_rows()
+    return rows
+
+
+def current_metrics():
+    """Return ConcentrationMetrics for the live histogram."""
+    return compute_metrics([row[1:] for row in histogram()])
+
+
+def take_snapshot():
+    """Record the current metrics as a TokenConcentrationSnapshot."""
+    return TokenConcentrationSnapshot.objects.create(**current_metrics()._asdict())
+
+
+def rebuild_buckets():
+    """Rebuild the histogram from a full scan and return the number of holders.
+    
+    The supply row is locked first, as balance writers do, so no balance
+    change can land between the scan and the swap.
+    """
+    with transaction.atomic():
+        supply = TokenSupply.current()
+        TokenSupply.objects.select_for_update().get(pk=supply.pk)
+        
+        totals = defaultdict(lambda: [0, 0, 0.0])
+        balances = GovernanceToken.objects.filter(balance__gt=0).values_list('balance', flat=True)
+        for balance in balances.iterator(chunk_size=10000):
+            _add(totals, balance, 1)
+        
+        BalanceBucket.objects.all().delete()
+        BalanceBucket.objects.bulk_create([
+            BalanceBucket(bucket=bucket, holder_count=count, balance_sum=balance_sum,
+                          balance_square_sum=square_sum)
+            for bucket, (count, balance_sum, square_sum) in sorted(totals.items())
+        ])
+    return sum(count for count, _, _ in totals.values())
+
+
+def seed_buckets(**kwargs):
+    """Build the histogram for existing holders if it is empty; connected to ``post_migrate``."""
+    if not BalanceBucket.objects.exists() and GovernanceToken.objects.filter(balance__gt=0).exists():
+        rebuild_buckets()
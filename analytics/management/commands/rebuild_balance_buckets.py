@@ -0,0 +1,18 @@
+"""
+Management command to rebuild the governance token balance histogram.
+"""
+
+from django.core.management.base import BaseCommand
+
+from analytics.concentration import rebuild_buckets
+
+
+class Command(BaseCommand):
+    """Rebuild the balance histogram behind the token concentration metrics."""
+    
+    help = 'Rebuild the balance histogram from a full scan of governance token balances'
+    
+    def handle(self, *args, **options):
+        """Run the rebuild."""
+        holders = rebuild_buckets()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt the balance histogram from {holders} holders"))
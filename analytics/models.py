@@ -2,4 +2,48 @@
 Models for the analytics app.
 """
 
-from django.db import models 
\ No newline at end of file
+from django.db import models
+
+
+class BalanceBucket(models.Model):
+    """Model for one bucket of the governance token balance histogram.
+    
+    Buckets are logarithmic, so every holder in a bucket has a balance
+    within a fixed ratio of the others. They are kept up to date with
+    deltas from ``balances_changed``; see ``analytics.concentration``.
+    """
+    
+    bucket = models.IntegerField(unique=True)
+    holder_count = models.BigIntegerField(default=0)
+    balance_sum = models.BigIntegerField(default=0)
+    balance_square_sum = models.FloatField(default=0)
+    
+    class Meta:
+        """Meta options for the BalanceBucket model."""
+        
+        ordering = ['bucket']
+    
+    def __str__(self):
+        """Return a string representation of the balance bucket."""
+        return f"Bucket {self.bucket}: {self.holder_count} holders, {self.balance_sum} tokens"
+
+
+class TokenConcentrationSnapshot(models.Model):
+    """Model for a point-in-time record of governance token concentration."""
+    
+    timestamp = models.DateTimeField(auto_now_add=True, db_index=True)
+    holder_count = models.BigIntegerField()
+    total_supply = models.BigIntegerField()
+    gini_coefficient = models.FloatField()
+    herfindahl_index = models.FloatField()
+    nakamoto_coefficient = models.PositiveIntegerField()
+    
+    class Meta:
+        """Meta options for the TokenConcentrationSnapshot model."""
+        
+        ordering = ['-timestamp']
+        get_latest_by = 'timestamp'
+    
+    def __str__(self):
+        """Return a string representation of the snapshot."""
+        return f"Token concentration at {self.timestamp}: Gini {self.gini_coefficient:.3f}"
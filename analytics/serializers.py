@@ -0,0 +1,55 @@
+"""
+Serializers for the analytics app.
+"""
+
+from django.conf import settings
+from rest_framework import serializers
+
+from .models import TokenConcentrationSnapshot
+from .simulation import current_parameters
+
+
+class TallySimulationSerializer(serializers.Serializer):
+    """Serializer for a what-if tally simulation parameter grid."""
+    
+    quorum_percentages = serializers.ListField(
+        child=serializers.FloatField(min_value=0, max_value=100), required=False, allow_empty=False
+    )
+    approval_thresholds = serializers.ListField(
+        child=serializers.FloatField(min_value=0, max_value=100), required=False, allow_empty=False
+    )
+    max_voting_power_percentages = serializers.ListField(
+        child=serializers.FloatField(min_value=0, max_value=100), required=False, allow_empty=False
+    )
+    
+    def validate(self, data):
+        """Fill omitted axes with the live settings and cap the grid size."""
+        quorum, threshold, max_power = current_parameters()
+        data.setdefault('quorum_percentages', [quorum])
+        data.setdefault('approval_thresholds', [threshold])
+        data.setdefault('max_voting_power_percentages', [max_power])
+        
+        combinations = (
+            len(data['quorum_percentages'])
+            * len(data['approval_thresholds'])
+            * len(data['max_voting_power_percentages'])
+        )
+        if combinations > settings.TALLY_SIMULATION_MAX_COMBINATIONS:
+            raise serializers.ValidationError(
+                f"Grid has {combinations} combinations; the limit is "
+                f"{settings.TALLY_SIMULATION_MAX_COMBINATIONS}."
+            )
+        return data
+
+
+class TokenConcentrationSnapshotSerializer(serializers.ModelSerializer):
+    """Serializer for TokenConcentrationSnapshot model."""
+    
+    class Meta:
+        """Meta options for the TokenConcentrationSnapshotSerializer."""
+        
+        model = TokenConcentrationSnapshot
+        fields = [
+            'id', 'timestamp', 'holder_count', 'total_supply', 'gini_coefficient',
+            'herfindahl_index', 'nakamoto_coefficient'
+        ]
@@ -0,0 +1,170 @@
+"""
+What-if simulation of proposal tallies under alternative governance parameters.
+"""
+
+import itertools
+import time
+
+import numpy as np
+from django.conf import settings
+
+from governance.models import Proposal, Vote
+
+# Proposals whose voting has concluded, and the statuses that mean they passed
+FINISHED_STATUSES = [
+    Proposal.Status.APPROVED, Proposal.Status.QUEUED,
+    Proposal.Status.EXECUTED, Proposal.Status.REJECTED
+]
+PASSED_STATUSES = [Proposal.Status.APPROVED, Proposal.Status.QUEUED, Proposal.Status.EXECUTED]
+
+
+def current_parameters():
+    """Return the live (quorum, approval threshold, max voting power) percentages."""
+    return (
+        float(settings.PROPOSAL_QUORUM_PERCENTAGE),
+        float(settings.PROPOSAL_APPROVAL_THRESHOLD),
+        float(settings.MAX_VOTING_POWER_PERCENTAGE) * 100
+    )
+
+
+class TallySimulator:
+    """Replay historical proposals under grids of governance parameters.
+    
+    Votes are loaded into NumPy arrays once. Each maximum voting power value
+    costs one ``bincount`` pass over the votes; the quorum and approval
+    threshold grids are then evaluated for every proposal with broadcast
+    comparisons and a matrix product.
+    
+    All percentages are expressed as 0-100, matching ``Proposal.end_voting``.
+    """
+    
+    def __init__(self, proposal_ids, total_voting_power, passed, vote_proposal, vote_count, vote_is_for):
+        """Build a simulator from per-proposal and per-vote arrays."""
+        self.proposal_ids = np.asarray(proposal_ids, dtype=np.int64)
+        self.total_voting_power = np.asarray(total_voting_power, dtype=np.float64)
+        self.passed = np.asarray(passed, dtype=bool)
+        self.vote_proposal = np.asarray(vote_proposal, dtype=np.int64)
+        self.vote_count = np.asarray(vote_count, dtype=np.float64)
+        self.vote_is_for = np.asarray(vote_is_for, dtype=bool)
+        
+        # Share of the proposal's voting power used by each vote, in percent
+        power = self.total_voting_power[self.vote_proposal]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.vote_share = np.where(power > 0, self.vote_count / power * 100, np.inf)
+    
+    @classmethod
+    def load(cls, proposals=None):
+        """Load finished proposals and their votes from the database."""
+        if proposals is None:
+            proposals = Proposal.objects.filter(status__in=FINISHED_STATUSES)
+        rows = list(proposals.order_by('pk').values_list('pk', 'total_voting_power', 'status'))
+        
+        proposal_ids = np.array([row[0] for row in rows], dtype=np.int64)
+        index = {proposal_id: i for i, proposal_id in enumerate(proposal_ids.tolist())}
+        votes = Vote.objects.filter(
+            proposal_id__in=index.keys()
+        ).order_by().values_list('proposal_id', 'vote_count', 'is_for')
+        
+        vote_rows = np.array(list(votes.iterator(chunk_size=10000)), dtype=np.int64).reshape(-1, 3)
+        return cls(
+            proposal_ids,
+            [row[1] for row in rows],
+            [row[2] in PASSED_STATUSES for row in rows],
+            [index[proposal_id] for proposal_id in vote_rows[:, 0].tolist()],
+            vote_rows[:, 1],
+            vote_rows[:, 2].astype(bool)
+        )
+    
+    @property
+    def proposal_count(self):
+        """Return the number of proposals being replayed."""
+        return len(self.proposal_ids)
+    
+    @property
+    def vote_total(self):
+        """Return the number of votes being replayed."""
+        return len(self.vote_count)
+    
+    def tallies(self, max_voting_power_percentages):
+        """Return (for, against) arrays of shape (max power values, proposals).
+        
+        A vote above the maximum voting power limit would have been refused
+        by ``check_vote_rules``, so it is dropped from that tally.
+        """
+        limits = np.asarray(max_voting_power_percentages, dtype=np.float64)
+        votes_for = np.zeros((len(limits), self.proposal_count))
+        votes_against = np.zeros((len(limits), self.proposal_count))
+        
+        for i, limit in enumerate(limits):
+            accepted = self.vote_share <= limit
+            weights = np.where(accepted, self.vote_count, 0)
+            votes_for[i] = np.bincount(
+                self.vote_proposal, weights=np.where(self.vote_is_for, weights, 0),
+                minlength=self.proposal_count
+            )
+            votes_against[i] = np.bincount(
+                self.vote_proposal, weights=np.where(self.vote_is_for, 0, weights),
+                minlength=self.proposal_count
+            )
+        return votes_for, votes_against
+    
+    def run(self, quorum_percentages, approval_thresholds, max_voting_power_percentages):
+        """Evaluate every parameter combination and return a SimulationResult."""
+        started = time.monotonic()
+        quorums = np.asarray(quorum_percentages, dtype=np.float64)
+        thresholds = np.asarray(approval_thresholds, dtype=np.float64)
+        limits = np.asarray(max_voting_power_percentages, dtype=np.float64)
+        
+        votes_for, votes_against = self.tallies(limits)
+        total_votes = votes_for + votes_against
+        with np.errstate(divide='ignore', invalid='ignore'):
+            approval = np.where(total_votes > 0, votes_for / total_votes * 100, -np.inf)
+        
+        # For each max power value, (quorum x proposal) @ (proposal x threshold)
+        # counts the proposals that pass both rules without a 4-D boolean grid
+        passed = self.passed.astype(np.float64)
+        approved = np.empty((len(limits), len(quorums), len(thresholds)))
+        approved_passed = np.empty_like(approved)
+        for i in range(len(limits)):
+            quorum_met = (total_votes[i] >= self.total_voting_power * quorums[:, None] / 100).astype(np.float64)
+            threshold_met = (approval[i] >= thresholds[:, None]).astype(np.float64)
+            approved[i] = quorum_met @ threshold_met.T
+            approved_passed[i] = (quorum_met * passed) @ threshold_met.T
+        
+        return SimulationResult(
+            quorums, thresholds, limits,
+            approved=approved.astype(np.int64),
+            flipped=(approved - 2 * approved_passed + passed.sum()).astype(np.int64),
+            proposal_count=self.proposal_count,
+            duration=time.monotonic() - started
+        )
+
+
+class SimulationResult:
+    """Outcome counts for each (max power, quorum, threshold) combination."""
+    
+    def __init__(self, quorums, thresholds, limits, approved, flipped, proposal_count, duration):
+        """Store the parameter axes and the per-combination counts."""
+        self.quorums = quorums
+        self.thresholds = thresholds
+        self.limits = limits
+        self.approved = approved
+        self.flipped = flipped
+        self.proposal_count = proposal_count
+        self.duration = duration
+    
+    def rows(self):
+        """Yield one dict per parameter combination."""
+        grid = itertools.product(
+            enumerate(self.limits), enumerate(self.quorums), enumerate(self.thresholds)
+        )
+        for (m, limit), (q, quorum), (t, threshold) in grid:
+            approved = int(self.approved[m, q, t])
+            yield {
+                'quorum_percentage': float(quorum),
+                'approval_threshold': float(threshold),
+                'max_voting_power_percentage': float(limit),
+                'approved': approved,
+                'rejected': self.proposal_count - approved,
+                'changed_outcomes': int(self.flipped[m, q, t]),
+            }
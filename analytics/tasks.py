@@ -0,0 +1,26 @@
+"""
+Celery tasks for the analytics app.
+"""
+
+import logging
+
+from celery import shared_task
+
+from .concentration import rebuild_buckets, take_snapshot
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(ignore_result=True)
+def snapshot_token_concentration():
+    """Record the current token concentration metrics for the history charts."""
+    snapshot = take_snapshot()
+    return snapshot.pk
+
+
+@shared_task(ignore_result=True)
+def rebuild_balance_buckets():
+    """Rebuild the balance histogram to correct any drift from bulk balance writes."""
+    holders = rebuild_buckets()
+    logger.info("Rebuilt the balance histogram from %d holders", holders)
+    return holders
@@ -4,11 +4,12 @@ URL patterns for the analytics app.
 
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
+from . import views
 
 # Create a router and register our viewsets with it.
 router = DefaultRouter()
-# Add viewsets here when they are created
-# router.register(r'metrics', views.MetricsViewSet)
+router.register(r'tally-simulations', views.TallySimulationViewSet, basename='tally-simulation')
+router.register(r'token-concentration', views.TokenConcentrationViewSet, basename='token-concentration')
 
 urlpatterns = [
     path('', include(router.urls)),
@@ -2,4 +2,60 @@
 Views for the analytics app.
 """
 
-from rest_framework import viewsets, permissions 
\ No newline at end of file
+from django.utils import timezone
+from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework import viewsets, permissions, filters
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from dao_governance.pagination import TimestampKeysetPagination
+
+from .concentration import current_metrics
+from .models import TokenConcentrationSnapshot
+from .serializers import TallySimulationSerializer, TokenConcentrationSnapshotSerializer
+from .simulation import TallySimulator
+
+
+class TallySimulationViewSet(viewsets.ViewSet):
+    """API endpoint for replaying past proposals under candidate parameters."""
+    
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = TallySimulationSerializer
+    
+    def create(self, request):
+        """Simulate every combination of the submitted parameter grid."""
+        serializer = TallySimulationSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        simulator = TallySimulator.load()
+        result = simulator.run(
+            serializer.validated_data['quorum_percentages'],
+            serializer.validated_data['approval_thresholds'],
+            serializer.validated_data['max_voting_power_percentages']
+        )
+        return Response({
+            'proposals': simulator.proposal_count,
+            'votes': simulator.vote_total,
+            'duration': result.duration,
+            'results': list(result.rows())
+        })
+
+
+class TokenConcentrationViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    API endpoint for the history of governance token concentration (read-only).
+    """
+    
+    queryset = TokenConcentrationSnapshot.objects.all()
+    serializer_class = TokenConcentrationSnapshotSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = TimestampKeysetPagination
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    filterset_fields = {'timestamp': ['gte', 'lte']}
+    ordering_fields = ['timestamp']
+    ordering = ['-timestamp', '-id']
+    
+    @action(detail=False, methods=['get'])
+    def current(self, request):
+        """Get the live concentration metrics from the balance histogram."""
+        return Response({'timestamp': timezone.now(), **current_metrics()._asdict()})
@@ -0,0 +1,24 @@
+"""
+Filter backends for the DAO governance API.
+"""
+
+from rest_framework import filters
+
+
+class StableOrderingFilter(filters.OrderingFilter):
+    """Ordering filter that breaks ties on the primary key.
+    
+    Sorting by a non-unique field such as a tally would otherwise let rows
+    with equal values swap places between pages.
+    """
+    
+    def get_ordering(self, request, queryset, view):
+        """Return the requested ordering with the primary key appended."""
+        ordering = super().get_ordering(request, queryset, view)
+        if not ordering:
+            return ordering
+        
+        keys = {'pk', queryset.model._meta.pk.name}
+        if any(term.lstrip('-') in keys for term in ordering):
+            return ordering
+        return [*ordering, '-pk' if ordering[-1].startswith('-') else 'pk']
@@ -0,0 +1,101 @@
+"""
+Pagination classes for the DAO governance API.
+"""
+
+import json
+from collections import OrderedDict
+
+from django.db import connections
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+def estimate_count(queryset):
+    """Estimate the number of rows in a queryset without a COUNT(*) scan.
+    
+    PostgreSQL answers from the planner's row estimate; other databases fall
+    back to an exact count.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return queryset.count()
+    
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class KeysetPagination(CursorPagination):
+    """Cursor pagination ordered by creation time and primary key.
+    
+    Each page seeks from the position encoded in the cursor instead of
+    counting and offsetting, so page 10,000 costs the same as page 1.
+    Clients that need a total pass ``?count=estimate``.
+    """
+    
+    ordering = ('-created_at', '-id')
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+    count_query_param = 'count'
+    
+    def paginate_queryset(self, queryset, request, view=None):
+        """Paginate the queryset and estimate its size when asked to."""
+        self.estimated_count = None
+        if request.query_params.get(self.count_query_param) == 'estimate':
+            self.estimated_count = estimate_count(queryset)
+        return super().paginate_queryset(queryset, request, view)
+    
+    def get_paginated_response(self, data):
+        """Return the page, prefixed with the estimated count if requested."""
+        response = super().get_paginated_response(data)
+        if self.estimated_count is not None:
+            response.data = OrderedDict([('count', self.estimated_count), *response.data.items()])
+        return response
+    
+    def get_paginated_response_schema(self, schema):
+        """Document the optional estimated count."""
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema['properties']['count'] = {
+            'type': 'integer',
+            'description': 'Estimated total, only present with ?count=estimate.',
+        }
+        return response_schema
+
+
+class TimestampKeysetPagination(KeysetPagination):
+    """Keyset pagination for models ordered by a ``timestamp`` field."""
+    
+    ordering = ('-timestamp', '-id')
+
+
+class SearchPageNumberPagination(PageNumberPagination):
+    """Page number pagination that reports a capped full-text search.
+    
+    When ``?search=`` was answered from the search index, the response says
+    whether matches beyond ``SEARCH_MAX_RESULTS`` were left out, since
+    ``count`` and the page links only cover the capped results.
+    """
+    
+    def paginate_queryset(self, queryset, request, view=None):
+        """Paginate the queryset and remember whether the search was capped."""
+        self.search_truncated = getattr(request, 'search_truncated', None)
+        return super().paginate_queryset(queryset, request, view)
+    
+    def get_paginated_response(self, data):
+        """Return the page, with the truncation flag after a full-text search."""
+        response = super().get_paginated_response(data)
+        if self.search_truncated is not None:
+            response.data['truncated'] = self.search_truncated
+        return response
+    
+    def get_paginated_response_schema(self, schema):
+        """Document the optional truncation flag."""
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema['properties']['truncated'] = {
+            'type': 'boolean',
+            'description': 'Whether a ?search= matched more than the results it returns.',
+        }
+        return response_schema
@@ -87,6 +87,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'dao_governance.wsgi.application'
+ASGI_APPLICATION = 'dao_governance.asgi.application'
 
 # Database configuration
 # Skip database setup during collectstatic in Docker build
@@ -120,6 +121,13 @@ if 'test' in sys.argv or 'test_coverage' in sys.argv:
 # MongoDB connection
 MONGO_URI = os.environ.get('MONGO_URI', 'mongodb://localhost:27017/dao_governance')
 
+# Proposal text bodies; set to 'governance.content_store.MongoContentStore' to offload them
+PROPOSAL_CONTENT_STORE = os.environ.get('PROPOSAL_CONTENT_STORE', '')
+PROPOSAL_CONTENT_COLLECTION = os.environ.get('PROPOSAL_CONTENT_COLLECTION', 'proposal_contents')
+PROPOSAL_CONTENT_ROOT = os.environ.get(
+    'PROPOSAL_CONTENT_ROOT', os.path.join(BASE_DIR, 'media', 'proposal_content')
+)
+
 # Neo4j connection
 NEO4J_URI = os.environ.get('NEO4J_URI', 'bolt://localhost:7687')
 NEO4J_USER = os.environ.get('NEO4J_USER', 'neo4j')
@@ -167,6 +175,21 @@ if 'test' in sys.argv or 'test_coverage' in sys.argv:
         }
     }
 
+# Full-text search
+SEARCH_MAX_RESULTS = int(os.environ.get('SEARCH_MAX_RESULTS', 1000))
+SEARCH_TEXT_CONFIG = os.environ.get('SEARCH_TEXT_CONFIG', 'english')
+
+# Live vote tally streams
+TALLY_STREAM_BACKEND = os.environ.get('TALLY_STREAM_BACKEND', 'governance.streams.RedisBroadcastBackend')
+TALLY_STREAM_REDIS_URL = os.environ.get('TALLY_STREAM_REDIS_URL', f'redis://{REDIS_HOST}:{REDIS_PORT}/2')
+TALLY_STREAM_SNAPSHOT_SECONDS = float(os.environ.get('TALLY_STREAM_SNAPSHOT_SECONDS', 15))
+TALLY_STREAM_QUEUE_SIZE = int(os.environ.get('TALLY_STREAM_QUEUE_SIZE', 100))
+TALLY_STREAM_PUBLISH_TIMEOUT_SECONDS = float(os.environ.get('TALLY_STREAM_PUBLISH_TIMEOUT_SECONDS', 0.25))
+
+# Use the in-process broadcast backend for tests
+if 'test' in sys.argv or 'test_coverage' in sys.argv:
+    TALLY_STREAM_BACKEND = 'governance.streams.InMemoryBroadcastBackend'
+
 # Celery settings
 CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL', f'redis://{REDIS_HOST}:{REDIS_PORT}/0')
 CELERY_RESULT_BACKEND = os.environ.get('CELERY_RESULT_BACKEND', f'redis://{REDIS_HOST}:{REDIS_PORT}/0')
@@ -174,6 +197,52 @@ CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = 'UTC'
+CELERY_BEAT_SCHEDULE = {
+    'merge-vote-counter-shards': {
+        'task': 'governance.tasks.merge_vote_counter_shards',
+        'schedule': float(os.environ.get('VOTE_COUNTER_MERGE_INTERVAL_SECONDS', 10)),
+    },
+    'sync-vote-merkle-trees': {
+        'task': 'governance.tasks.sync_vote_merkle_trees',
+        'schedule': float(os.environ.get('VOTE_MERKLE_SYNC_INTERVAL_SECONDS', 10)),
+    },
+    'detect-sybil-voting': {
+        'task': 'governance.tasks.detect_sybil_voting',
+        'schedule': float(os.environ.get('SYBIL_DETECTOR_INTERVAL_SECONDS', 10)),
+    },
+    'rebuild-voting-power': {
+        'task': 'governance.tasks.rebuild_voting_power',
+        'schedule': float(os.environ.get('VOTING_POWER_REBUILD_INTERVAL_SECONDS', 900)),
+    },
+    'finalize-expired-proposals': {
+        'task': 'governance.tasks.finalize_expired_proposals',
+        'schedule': float(os.environ.get('PROPOSAL_FINALIZE_INTERVAL_SECONDS', 60)),
+    },
+    'release-expired-token-locks': {
+        'task': 'governance.tasks.release_expired_token_locks',
+        'schedule': float(os.environ.get('TOKEN_LOCK_SWEEP_INTERVAL_SECONDS', 300)),
+    },
+    'execute-approved-treasury-transactions': {
+        'task': 'treasury.tasks.execute_approved_treasury_transactions',
+        'schedule': float(os.environ.get('TREASURY_EXECUTION_INTERVAL_SECONDS', 60)),
+    },
+    'snapshot-treasury-metrics': {
+        'task': 'treasury.tasks.snapshot_treasury_metrics',
+        'schedule': float(os.environ.get('TREASURY_METRIC_SNAPSHOT_INTERVAL_SECONDS', 60)),
+    },
+    'reconcile-token-supply': {
+        'task': 'governance.tasks.reconcile_token_supply',
+        'schedule': float(os.environ.get('TOKEN_SUPPLY_RECONCILE_INTERVAL_SECONDS', 3600)),
+    },
+    'snapshot-token-concentration': {
+        'task': 'analytics.tasks.snapshot_token_concentration',
+        'schedule': float(os.environ.get('TOKEN_CONCENTRATION_SNAPSHOT_INTERVAL_SECONDS', 3600)),
+    },
+    'rebuild-balance-buckets': {
+        'task': 'analytics.tasks.rebuild_balance_buckets',
+        'schedule': float(os.environ.get('BALANCE_BUCKET_REBUILD_INTERVAL_SECONDS', 86400)),
+    },
+}
 
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
@@ -291,6 +360,50 @@ MAX_VOTING_POWER_PERCENTAGE = float(os.environ.get('MAX_VOTING_POWER_PERCENTAGE'
 TREASURY_MULTISIG_THRESHOLD = int(os.environ.get('TREASURY_MULTISIG_THRESHOLD', 5))
 TREASURY_GUARDIANS = int(os.environ.get('TREASURY_GUARDIANS', 9))
 TREASURY_RESERVE_RATIO = float(os.environ.get('TREASURY_RESERVE_RATIO', 0.3))
+TREASURY_METRIC_SNAPSHOT_INTERVAL_SECONDS = int(os.environ.get('TREASURY_METRIC_SNAPSHOT_INTERVAL_SECONDS', 60))
+
+# Lifetime of a cached balance summary (it is replaced on any balance change),
+# and how long concurrent requests wait for the one computing it
+TREASURY_SUMMARY_CACHE_SECONDS = int(os.environ.get('TREASURY_SUMMARY_CACHE_SECONDS', 86400))
+TREASURY_SUMMARY_LOCK_SECONDS = float(os.environ.get('TREASURY_SUMMARY_LOCK_SECONDS', 5))
+
+# Most points returned by the treasury metric history before it switches to
+# hourly, daily or weekly rollups
+TREASURY_HISTORY_MAX_POINTS = int(os.environ.get('TREASURY_HISTORY_MAX_POINTS', 500))
+ARBITRATION_COMMITTEE_SIZE = int(os.environ.get('ARBITRATION_COMMITTEE_SIZE', 31))
+ARBITRATION_COMMITTEE_TOP_PERCENTAGE = int(os.environ.get('ARBITRATION_COMMITTEE_TOP_PERCENTAGE', 10))
+
+# Participation rewards: tokens for voting on every proposal of a quarter, and
+# the multiplier for averaging at least the threshold over two quarters
+PARTICIPATION_REWARD_AMOUNT = int(os.environ.get('PARTICIPATION_REWARD_AMOUNT', 100))
+PARTICIPATION_LOYALTY_THRESHOLD = int(os.environ.get('PARTICIPATION_LOYALTY_THRESHOLD', 90))
+PARTICIPATION_LOYALTY_MULTIPLIER = os.environ.get('PARTICIPATION_LOYALTY_MULTIPLIER', '1.2')
+
+# Maximum number of parameter combinations per tally simulation request
+TALLY_SIMULATION_MAX_COMBINATIONS = int(os.environ.get('TALLY_SIMULATION_MAX_COMBINATIONS', 10000))
+
+# Number of vote counter shards per proposal (0 updates the proposal row directly)
+VOTE_COUNTER_SHARDS = int(os.environ.get('VOTE_COUNTER_SHARDS', 0))
+
+# Votes younger than this stay above the vote tree's sync watermark, so a
+# vote that commits after a later one is still appended
+VOTE_MERKLE_SYNC_LAG_SECONDS = int(os.environ.get('VOTE_MERKLE_SYNC_LAG_SECONDS', 5))
+
+# Maximum number of votes accepted by the batch vote endpoint
+VOTE_BATCH_MAX_SIZE = int(os.environ.get('VOTE_BATCH_MAX_SIZE', 5000))
+
+# Coordinated voting detection: tumbling window length, how recently a member
+# must have been verified to count as fresh, and the cluster thresholds
+SYBIL_WINDOW_SECONDS = int(os.environ.get('SYBIL_WINDOW_SECONDS', 300))
+SYBIL_DETECTOR_LAG_SECONDS = int(os.environ.get('SYBIL_DETECTOR_LAG_SECONDS', 5))
+SYBIL_FRESH_MEMBER_DAYS = int(os.environ.get('SYBIL_FRESH_MEMBER_DAYS', 7))
+SYBIL_MIN_CLUSTER_VOTES = int(os.environ.get('SYBIL_MIN_CLUSTER_VOTES', 10))
+SYBIL_CLUSTER_SHARE = float(os.environ.get('SYBIL_CLUSTER_SHARE', 0.5))
+SYBIL_WALLET_PREFIX_LENGTH = int(os.environ.get('SYBIL_WALLET_PREFIX_LENGTH', 6))
+SYBIL_SUMMARY_SIZE = int(os.environ.get('SYBIL_SUMMARY_SIZE', 32))
+
+# Rows read per database round trip and written per chunk by streaming exports
+EXPORT_CHUNK_SIZE = int(os.environ.get('EXPORT_CHUNK_SIZE', 2000))
 
 # Test settings
 if 'test' in sys.argv or 'test_coverage' in sys.argv:
@@ -299,6 +412,9 @@ if 'test' in sys.argv or 'test_coverage' in sys.argv:
         'django.contrib.auth.hashers.MD5PasswordHasher',
     ]
     
+    # Run Celery tasks in-process
+    CELERY_TASK_ALWAYS_EAGER = True
+    
     # Disable logging during tests
     LOGGING = {
         'version': 1,
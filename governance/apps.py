@@ -3,10 +3,20 @@ Governance app configuration.
 """
 
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class GovernanceConfig(AppConfig):
     """Governance app configuration."""
     
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'governance' 
\ No newline at end of file
+    name = 'governance'
+    
+    def ready(self):
+        """Create the full-text search index after migrations run and keep voting power current."""
+        from .delegation import apply_balance_changes
+        from .search import create_search_index
+        from .signals import balances_changed
+        
+        post_migrate.connect(create_search_index, sender=self)
+        balances_changed.connect(apply_balance_changes, dispatch_uid='governance.effective_voting_power')
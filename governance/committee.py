@@ -0,0 +1,140 @@
+"""
+Arbitration committee selection for the governance app.
+
+Committees are drawn from the holders at or above a balance percentile,
+as described in dao.md. The holder count and the bucket holding the cutoff
+come from the maintained balance histogram (``analytics.BalanceBucket``),
+so the cutoff balance is found by reading only the holders of that one
+bucket from the ``token_balance_rank`` index. The eligible holders are then
+streamed once, in index order, through an A-Res weighted reservoir
+(Efraimidis and Spirakis). Each holder draws the key ``log(u) / weight``
+and the committee is the holders with the largest keys. With equal weights
+this is a uniform draw. The draw uses a seeded generator and hashes the
+eligible rows it reads, so every selection can be replayed and audited.
+"""
+
+import hashlib
+import heapq
+import math
+import random
+import secrets
+
+from django.conf import settings
+
+from analytics.concentration import bucket_bounds, histogram
+
+from .models import GovernanceToken, CommitteeSelection
+
+
+class CommitteeSelectionError(ValueError):
+    """Raised when there are not enough eligible holders for a committee."""
+
+
+def _rank(holder_count, top_percentage):
+    """Return the rank of the last holder in the top percentage."""
+    return max(math.ceil(holder_count * top_percentage / 100), 1)
+
+
+def balance_cutoff(top_percentage):
+    """Return ``(holder_count, cutoff)`` for the top percentage of holders.
+    
+    Holders with a balance of at least ``cutoff`` are eligible; ties at the
+    cutoff are all included.
+    """
+    buckets = [(bucket, count) for bucket, count, _, _ in histogram() if count > 0]
+    holder_count = sum(count for _, count in buckets)
+    if not holder_count:
+        return 0, None
+    
+    rank = _rank(holder_count, top_percentage)
+    holders = GovernanceToken.objects.filter(balance__gt=0).order_by('-balance', 'holder')
+    above = 0
+    for bucket, count in reversed(buckets):
+        if above + count >= rank:
+            low, high = bucket_bounds(bucket)
+            in_bucket = holders.filter(balance__gte=low, balance__lt=high)
+            cutoff = in_bucket.values_list('balance', flat=True)[rank - above - 1:rank - above]
+            if cutoff:
+                return holder_count, cutoff[0]
+            break
+        above += count
+    
+    # The histogram has drifted from the balances; count and seek exactly instead
+    holder_count = holders.count()
+    if not holder_count:
+        return 0, None
+    return holder_count, holders.values_list('balance', flat=True)[_rank(holder_count, top_percentage) - 1]
+
+
+def eligible_holders(cutoff):
+    """Return the eligible (holder_id, balance) rows in index order."""
+    return GovernanceToken.objects.filter(
+        balance__gte=cutoff, balance__gt=0
+    ).order_by('-balance', 'holder').values_list('holder_id', 'balance')
+
+
+def weighted_reservoir(rows, size, rng, weighted=False, digest=None):
+    """Sample ``size`` (holder_id, balance) rows in one pass.
+    
+    Returns ``(members, count)`` with the members ordered by descending key.
+    ``digest``, if given, is updated with every row read.
+    """
+    reservoir = []
+    count = 0
+    for holder_id, balance in rows:
+        count += 1
+        if digest is not None:
+            digest.update(f'{holder_id}:{balance};'.encode())
+        # 1 - random() lies in (0, 1], so the logarithm is always defined
+        key = math.log(1.0 - rng.random()) / (balance if weighted else 1)
+        if len(reservoir) < size:
+            heapq.heappush(reservoir, (key, holder_id, balance))
+        elif key > reservoir[0][0]:
+            heapq.heapreplace(reservoir, (key, holder_id, balance))
+    
+    members = [
+        {'holder': holder_id, 'balance': balance}
+        for _, holder_id, balance in sorted(reservoir, reverse=True)
+    ]
+    return members, count
+
+
+def draw(cutoff, size, seed, weighted=False):
+    """Return ``(members, eligible_count, eligible_digest)`` for a seeded draw."""
+    digest = hashlib.sha256()
+    members, count = weighted_reservoir(
+        eligible_holders(cutoff).iterator(chunk_size=10000), size,
+        random.Random(seed), weighted, digest
+    )
+    return members, count, digest.hexdigest()
+
+
+def select_committee(size=None, top_percentage=None, seed=None, weighted=False, selected_by=None):
+    """Draw an arbitration committee and store its CommitteeSelection audit record."""
+    size = size or settings.ARBITRATION_COMMITTEE_SIZE
+    top_percentage = top_percentage or settings.ARBITRATION_COMMITTEE_TOP_PERCENTAGE
+    seed = seed or secrets.token_hex(16)
+    
+    holder_count, cutoff = balance_cutoff(top_percentage)
+    if cutoff is None:
+        raise CommitteeSelectionError("There are no token holders to select from.")
+    
+    members, eligible_count, eligible_digest = draw(cutoff, size, seed, weighted)
+    if eligible_count < size:
+        raise CommitteeSelectionError(
+            f"Only {eligible_count} holders are eligible for a committee of {size}."
+        )
+    
+    return CommitteeSelection.objects.create(
+        seed=seed, committee_size=size, top_percentage=top_percentage, weighted=weighted,
+        holder_count=holder_count, cutoff_balance=cutoff, eligible_count=eligible_count,
+        eligible_digest=eligible_digest, members=members, selected_by=selected_by
+    )
+
+
+def replay_selection(selection):
+    """Return whether replaying a stored draw yields the same eligible rows and members."""
+    members, _, eligible_digest = draw(
+        selection.cutoff_balance, selection.committee_size, selection.seed, selection.weighted
+    )
+    return eligible_digest == selection.eligible_digest and members == selection.members
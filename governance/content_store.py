@@ -0,0 +1,85 @@
+"""
+Document store for the long text bodies of proposals.
+
+Bodies are stored under ``Proposal.content_document_id`` so list and detail
+queries never need to read them from the relational database. MongoDB is
+used in production; the filesystem store is a local stand-in.
+"""
+
+import json
+import os
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+class FileSystemContentStore:
+    """Content store keeping one JSON file per document."""
+
+    @property
+    def root(self):
+        """Return the directory holding the documents."""
+        return settings.PROPOSAL_CONTENT_ROOT
+
+    def _path(self, document_id):
+        """Return the file path of a document."""
+        return os.path.join(self.root, f'{os.path.basename(document_id)}.json')
+
+    def put(self, document_id, content):
+        """Write a document, replacing any previous version atomically."""
+        os.makedirs(self.root, exist_ok=True)
+        path = self._path(document_id)
+        with open(f'{path}.tmp', 'w', encoding='utf-8') as handle:
+            json.dump(content, handle)
+        os.replace(f'{path}.tmp', path)
+
+    def get(self, document_id):
+        """Return a document, or None if it does not exist."""
+        try:
+            with open(self._path(document_id), encoding='utf-8') as handle:
+                return json.load(handle)
+        except FileNotFoundError:
+            return None
+
+    def delete(self, document_id):
+        """Delete a document if it exists."""
+        try:
+            os.remove(self._path(document_id))
+        except FileNotFoundError:
+            pass
+
+
+class MongoContentStore:
+    """Content store keeping documents in a MongoDB collection."""
+
+    def __init__(self):
+        """Connect to the database named in ``MONGO_URI``."""
+        from pymongo import MongoClient
+
+        client = MongoClient(settings.MONGO_URI)
+        self.collection = client.get_default_database()[settings.PROPOSAL_CONTENT_COLLECTION]
+
+    def put(self, document_id, content):
+        """Insert or replace a document."""
+        self.collection.replace_one({'_id': document_id}, content, upsert=True)
+
+    def get(self, document_id):
+        """Return a document, or None if it does not exist."""
+        return self.collection.find_one({'_id': document_id}, {'_id': False})
+
+    def delete(self, document_id):
+        """Delete a document if it exists."""
+        self.collection.delete_one({'_id': document_id})
+
+
+_stores = {}
+
+
+def get_content_store():
+    """Return the configured content store, or None if none is configured."""
+    path = settings.PROPOSAL_CONTENT_STORE
+    if not path:
+        return None
+    if path not in _stores:
+        _stores[path] = import_string(path)()
+    return _stores[path]
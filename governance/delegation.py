@@ -0,0 +1,293 @@
+"""
+Delegation graph and effective voting power for the governance app.
+
+Every holder may delegate to one other user, so delegations form a forest
+whose roots are the members who actually vote. A root's effective voting
+power is its own balance plus the balances of everyone whose delegation
+chain ends at it; holders who delegate have no effective power of their
+own. Resolved powers are cached in the EffectiveVotingPower table so reads
+are a single primary-key lookup; delegation and balance changes update the
+cache along the affected chains only.
+"""
+
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Case, F, When
+
+from .models import GovernanceToken, EffectiveVotingPower
+
+
+class DelegationCycleError(ValueError):
+    """Raised when a delegation would make a chain loop back on itself."""
+
+
+class DelegationGraph:
+    """In-memory graph of token delegations."""
+    
+    def __init__(self, delegates, balances=None):
+        """Build the graph from ``{holder_id: delegate_id}`` and ``{holder_id: balance}``."""
+        self.delegates = dict(delegates)
+        self.balances = dict(balances or {})
+        self.cycles = []
+        self._break_cycles()
+    
+    @classmethod
+    def load(cls, with_balances=True):
+        """Load the delegation graph from the database."""
+        delegates = GovernanceToken.objects.filter(
+            delegated_to__isnull=False
+        ).values_list('holder_id', 'delegated_to_id')
+        balances = None
+        if with_balances:
+            balances = GovernanceToken.objects.values_list('holder_id', 'balance')
+        return cls(delegates, balances)
+    
+    def _break_cycles(self):
+        """Drop one edge of every delegation cycle, recording the cycle."""
+        done = set()
+        for start in list(self.delegates):
+            path = []
+            on_path = set()
+            node = start
+            while node in self.delegates and node not in done and node not in on_path:
+                path.append(node)
+                on_path.add(node)
+                node = self.delegates[node]
+            
+            if node in on_path:
+                # The last holder on the path closes the loop; ignore that delegation
+                self.cycles.append(path[path.index(node):])
+                del self.delegates[path[-1]]
+            done.update(path)
+    
+    def chain(self, holder_id):
+        """Return the delegates above a holder, nearest first."""
+        chain = []
+        node = self.delegates.get(holder_id)
+        while node is not None:
+            chain.append(node)
+            node = self.delegates.get(node)
+        return chain
+    
+    def resolve(self, holder_id):
+        """Return the member who ultimately votes with a holder's tokens."""
+        chain = self.chain(holder_id)
+        return chain[-1] if chain else holder_id
+    
+    def would_create_cycle(self, holder_id, delegate_id):
+        """Check whether delegating ``holder_id`` to ``delegate_id`` forms a loop."""
+        return delegate_id == holder_id or holder_id in self.chain(delegate_id)
+    
+    def set_delegate(self, holder_id, delegate_id):
+        """Point a holder at a new delegate (or None), rejecting cycles."""
+        if delegate_id is not None and self.would_create_cycle(holder_id, delegate_id):
+            raise DelegationCycleError("Delegation would create a cycle.")
+        
+        if delegate_id is None:
+            self.delegates.pop(holder_id, None)
+        else:
+            self.delegates[holder_id] = delegate_id
+    
+    def compute_powers(self):
+        """Return ``{holder_id: (delegated_power, effective_power)}`` for every node."""
+        delegators = defaultdict(list)
+        for holder_id, delegate_id in self.delegates.items():
+            delegators[delegate_id].append(holder_id)
+        
+        nodes = set(self.balances) | set(self.delegates) | set(delegators)
+        weights = {}
+        for root in nodes:
+            if root in self.delegates:
+                continue
+            # Iterative post-order walk down the tree of holders delegating to root
+            stack = [(root, False)]
+            while stack:
+                node, expanded = stack.pop()
+                if expanded:
+                    weights[node] = self.balances.get(node, 0) + sum(
+                        weights[child] for child in delegators[node]
+                    )
+                else:
+                    stack.append((node, True))
+                    stack.extend((child, False) for child in delegators[node])
+        
+        powers = {}
+        for node, weight in weights.items():
+            delegated_power = weight - self.balances.get(node, 0)
+            effective_power = 0 if node in self.delegates else weight
+            powers[node] = (delegated_power, effective_power)
+        return powers
+
+
+def rebuild_effective_voting_power(batch_size=1000):
+    """Recompute and store the effective voting power of every holder."""
+    graph = DelegationGraph.load()
+    powers = graph.compute_powers()
+    
+    rows = [
+        EffectiveVotingPower(
+            holder_id=holder_id,
+            delegated_power=delegated_power,
+            effective_power=effective_power
+        )
+        for holder_id, (delegated_power, effective_power) in powers.items()
+    ]
+    with transaction.atomic():
+        EffectiveVotingPower.objects.exclude(holder_id__in=powers.keys()).delete()
+        EffectiveVotingPower.objects.bulk_create(
+            rows,
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=['holder'],
+            update_fields=['delegated_power', 'effective_power', 'updated_at']
+        )
+    return graph
+
+
+def _lock_chains(holder_ids):
+    """Lock the tokens of holders and of everyone above them, in primary-key order.
+    
+    Each pass locks and re-reads every token found so far, so the chains are
+    read one level at a time from committed, locked rows; only the tokens on
+    the chains are touched. Returns the DelegationGraph of the locked chains.
+    """
+    locked = set()
+    frontier = set(holder_ids)
+    while frontier:
+        locked |= frontier
+        graph = DelegationGraph(
+            (holder_id, delegate_id)
+            for holder_id, delegate_id in GovernanceToken.objects.select_for_update().filter(
+                holder_id__in=locked
+            ).order_by('pk').values_list('holder_id', 'delegated_to_id')
+            if delegate_id is not None
+        )
+        chained = set(holder_ids).union(*(graph.chain(holder_id) for holder_id in holder_ids))
+        frontier = chained - locked
+    return graph
+
+
+def _carried_power(holder_id):
+    """Return the balance delegated to a holder, directly or through a chain."""
+    carried = 0
+    seen = {holder_id}
+    frontier = {holder_id}
+    while frontier:
+        rows = GovernanceToken.objects.filter(
+            delegated_to_id__in=frontier
+        ).exclude(holder_id__in=seen).values_list('holder_id', 'balance')
+        frontier = set()
+        for delegator_id, balance in rows:
+            carried += balance
+            frontier.add(delegator_id)
+        seen |= frontier
+    return carried
+
+
+def _ensure_power_rows(holder_ids):
+    """Create cached power rows for holders seen for the first time.
+    
+    A missing row is computed from the delegations and balances currently
+    in the database, including power delegated to the holder. Returns the holder ids whose row was
+    created.
+    """
+    existing = set(
+        EffectiveVotingPower.objects.filter(holder_id__in=holder_ids).values_list('holder_id', flat=True)
+    )
+    missing = set(holder_ids) - existing
+    if not missing:
+        return set()
+    
+    tokens = {
+        holder_id: (balance, delegate_id)
+        for holder_id, balance, delegate_id in GovernanceToken.objects.filter(
+            holder_id__in=missing
+        ).values_list('holder_id', 'balance', 'delegated_to_id')
+    }
+    rows = []
+    for holder_id in missing:
+        balance, delegate_id = tokens.get(holder_id, (0, None))
+        delegated_power = _carried_power(holder_id)
+        rows.append(EffectiveVotingPower(
+            holder_id=holder_id,
+            delegated_power=delegated_power,
+            effective_power=0 if delegate_id is not None else balance + delegated_power
+        ))
+    EffectiveVotingPower.objects.bulk_create(rows, ignore_conflicts=True)
+    return missing
+
+
+def _shift_power(chain, weight, skip=()):
+    """Add ``weight`` to the delegated power along a chain and to its root's effective power.
+    
+    Holders in ``skip`` already account for the weight and are left alone.
+    """
+    chain = [holder_id for holder_id in chain if holder_id not in skip]
+    if not chain or not weight:
+        return
+    
+    EffectiveVotingPower.objects.filter(holder_id__in=chain).update(
+        delegated_power=F('delegated_power') + weight
+    )
+    EffectiveVotingPower.objects.filter(holder_id=chain[-1]).update(
+        effective_power=F('effective_power') + weight
+    )
+
+
+def change_delegation(token, delegate_id):
+    """Delegate (or undelegate, with None) a token and update cached powers incrementally.
+    
+    Only the tokens on the old and new delegation chains are read and locked,
+    so the cost is proportional to chain depth rather than to the number of
+    holders. Raises DelegationCycleError if the delegation would loop.
+    """
+    holder_id = token.holder_id
+    with transaction.atomic():
+        roots = {holder_id} if delegate_id is None else {holder_id, delegate_id}
+        graph = _lock_chains(roots)
+        old_chain = graph.chain(holder_id)
+        graph.set_delegate(holder_id, delegate_id)
+        new_chain = graph.chain(holder_id)
+        
+        _ensure_power_rows({holder_id, *old_chain, *new_chain})
+        row = EffectiveVotingPower.objects.select_for_update().get(holder_id=holder_id)
+        balance = GovernanceToken.objects.filter(pk=token.pk).values_list('balance', flat=True).get()
+        
+        token.delegated_to_id = delegate_id
+        token.save(update_fields=['delegated_to'])
+        
+        # Everything this holder carries moves from the old chain to the new one
+        weight = balance + row.delegated_power
+        _shift_power(old_chain, -weight)
+        _shift_power(new_chain, weight)
+        
+        row.effective_power = 0 if delegate_id is not None else weight
+        row.save(update_fields=['effective_power', 'updated_at'])
+
+
+def apply_balance_changes(sender, changes, **kwargs):
+    """Move balance deltas along each holder's chain; connected to ``balances_changed``."""
+    deltas = defaultdict(int)
+    for change in changes:
+        deltas[change.holder_id] += change.new_balance - change.old_balance
+    
+    graph = _lock_chains(deltas)
+    chains = {holder_id: graph.chain(holder_id) for holder_id in deltas}
+    created = _ensure_power_rows(set(deltas).union(*chains.values()))
+    own = {}
+    for holder_id, delta in deltas.items():
+        if chains[holder_id]:
+            _shift_power(chains[holder_id], delta, skip=created)
+        elif holder_id not in created and delta:
+            own[holder_id] = delta
+    
+    # Holders who vote themselves take their own change, in one UPDATE
+    if own:
+        EffectiveVotingPower.objects.filter(holder_id__in=own).update(
+            effective_power=Case(
+                *(When(holder_id=holder_id, then=F('effective_power') + delta) for holder_id, delta in own.items()),
+                default=F('effective_power'),
+                output_field=EffectiveVotingPower._meta.get_field('effective_power')
+            )
+        )
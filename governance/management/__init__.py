@@ -0,0 +1,3 @@
+"""
+Management utilities for the governance app.
+"""
@@ -0,0 +1,48 @@
+"""
+Management command to seed balance checkpoints for holders without history.
+"""
+
+import datetime
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from governance.models import GovernanceToken, TokenCheckpoint
+
+
+class Command(BaseCommand):
+    """Create an initial checkpoint for every holder that has none."""
+    
+    help = 'Seed TokenCheckpoint rows for token holders that predate balance checkpoints.'
+    
+    def add_arguments(self, parser):
+        """Add command arguments."""
+        parser.add_argument(
+            '--as-of', default='1970-01-01',
+            help=(
+                'Date (YYYY-MM-DD) the seeded balances are recorded at. The default '
+                'treats current balances as held since before any proposal started.'
+            )
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+    
+    def handle(self, *args, **options):
+        """Insert the missing checkpoints in batches."""
+        as_of = timezone.make_aware(
+            datetime.datetime.combine(datetime.date.fromisoformat(options['as_of']), datetime.time.min)
+        )
+        tokens = GovernanceToken.objects.exclude(
+            holder__token_checkpoints__isnull=False
+        ).values_list('holder_id', 'balance').order_by('pk')
+        
+        created = 0
+        batch = []
+        for holder_id, balance in tokens.iterator(chunk_size=options['batch_size']):
+            batch.append(TokenCheckpoint(holder_id=holder_id, balance=balance, timestamp=as_of))
+            if len(batch) >= options['batch_size']:
+                created += len(TokenCheckpoint.objects.bulk_create(batch))
+                batch = []
+        if batch:
+            created += len(TokenCheckpoint.objects.bulk_create(batch))
+        
+        self.stdout.write(self.style.SUCCESS(f"Created {created} token checkpoints."))
@@ -0,0 +1,92 @@
+"""
+Management command to benchmark single-row against sharded vote counters.
+"""
+
+import statistics
+import threading
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, connections, transaction
+
+from governance.models import Proposal, VoteCounterShard
+
+
+class Command(BaseCommand):
+    """Compare vote tally write throughput under concurrent writers."""
+    
+    help = 'Benchmark direct proposal-row tally updates against sharded counters.'
+    
+    def add_arguments(self, parser):
+        """Add command arguments."""
+        parser.add_argument('--writers', type=int, default=8, help='Concurrent writer threads.')
+        parser.add_argument('--votes', type=int, default=250, help='Votes cast per writer.')
+        parser.add_argument('--shards', type=int, default=16, help='Shards for the sharded run.')
+    
+    def handle(self, *args, **options):
+        """Run both strategies against a scratch proposal and print the results."""
+        if connection.vendor == 'sqlite':
+            self.stdout.write(self.style.WARNING(
+                'SQLite serializes all writers on a database lock; '
+                'run against PostgreSQL for meaningful numbers.'
+            ))
+        
+        user, _ = User.objects.get_or_create(username='__vote_counter_benchmark__')
+        proposal = Proposal.objects.create(
+            title='Vote counter benchmark',
+            description='', rationale='', implementation_details='', timeline='',
+            proposer=user,
+            status=Proposal.Status.VOTING
+        )
+        
+        try:
+            for label, shards in (('single-row', 0), (f"sharded x{options['shards']}", options['shards'])):
+                elapsed, latencies = self._run(
+                    proposal.pk, shards, options['writers'], options['votes']
+                )
+                VoteCounterShard.merge(proposal.pk)
+                total = options['writers'] * options['votes']
+                latencies.sort()
+                self.stdout.write(
+                    f"{label:>14}: {total / elapsed:8.0f} votes/s, "
+                    f"p50 {statistics.median(latencies) * 1000:6.2f} ms, "
+                    f"p95 {latencies[int(len(latencies) * 0.95) - 1] * 1000:6.2f} ms"
+                )
+            
+            proposal.refresh_from_db()
+            expected = 2 * options['writers'] * options['votes']
+            if proposal.total_votes_for != expected:
+                self.stderr.write(f"Tally mismatch: {proposal.total_votes_for} != {expected}")
+        finally:
+            proposal.delete()
+            user.delete()
+    
+    def _run(self, proposal_id, shards, writers, votes):
+        """Cast votes from concurrent threads and return (elapsed, latencies)."""
+        latencies = []
+        lock = threading.Lock()
+        barrier = threading.Barrier(writers + 1)
+        
+        def writer():
+            local = []
+            barrier.wait()
+            try:
+                for _ in range(votes):
+                    start = time.perf_counter()
+                    with transaction.atomic():
+                        Proposal.apply_tally_delta(proposal_id, 1, 0, shards=shards)
+                    local.append(time.perf_counter() - start)
+            finally:
+                connections.close_all()
+            with lock:
+                latencies.extend(local)
+        
+        threads = [threading.Thread(target=writer) for _ in range(writers)]
+        for thread in threads:
+            thread.start()
+        barrier.wait()
+        start = time.perf_counter()
+        for thread in threads:
+            thread.join()
+        return time.perf_counter() - start, latencies
@@ -0,0 +1,60 @@
+"""
+Management command to distribute quarterly participation rewards.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from governance.rewards import calculate_payouts, distribute_rewards, quarter_bounds
+
+
+class Command(BaseCommand):
+    """Credit each holder's participation reward for a quarter."""
+    
+    help = 'Calculate and credit participation rewards for a quarter such as 2024Q1.'
+    
+    def add_arguments(self, parser):
+        """Add command arguments."""
+        parser.add_argument('quarter', help='Quarter to reward, e.g. 2024Q1.')
+        parser.add_argument(
+            '--reward-amount', type=int, default=None,
+            help='Tokens for voting on every proposal (default: PARTICIPATION_REWARD_AMOUNT).'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Number of holders credited per transaction.'
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Print the reward distribution without storing or crediting it.'
+        )
+    
+    def handle(self, *args, **options):
+        """Distribute the rewards, or print them with --dry-run."""
+        try:
+            period_start, period_end = quarter_bounds(options['quarter'])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        
+        if options['dry_run']:
+            proposal_count, payouts = calculate_payouts(
+                period_start, period_end, options['reward_amount']
+            )
+            self.stdout.write("holder,votes_cast,participation_rate,multiplier,amount")
+            for payout in payouts:
+                self.stdout.write(
+                    f"{payout.holder_id},{payout.votes_cast},{payout.participation_rate},"
+                    f"{payout.multiplier},{payout.amount}"
+                )
+            self.stdout.write(self.style.SUCCESS(
+                f"Dry run: {sum(payout.amount for payout in payouts)} tokens to "
+                f"{len(payouts)} holders over {proposal_count} proposals."
+            ))
+            return
+        
+        distribution = distribute_rewards(
+            period_start, period_end, options['reward_amount'], options['batch_size']
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Credited {distribution.total_rewarded} tokens to "
+            f"{distribution.payouts.count()} holders over {distribution.proposal_count} proposals."
+        ))
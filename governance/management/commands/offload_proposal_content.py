@@ -0,0 +1,45 @@
+"""
+Management command to copy proposal text bodies to the content store.
+"""
+
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+
+from governance.content_store import get_content_store
+from governance.models import Proposal
+
+
+class Command(BaseCommand):
+    """Write every proposal's text bodies to the configured content store."""
+    
+    help = 'Copy proposal descriptions, rationales, implementation details and timelines to the content store.'
+    
+    def add_arguments(self, parser):
+        """Add command arguments."""
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Number of proposals read per batch.'
+        )
+    
+    def handle(self, *args, **options):
+        """Assign missing document ids and store each proposal's content."""
+        store = get_content_store()
+        if store is None:
+            raise CommandError("PROPOSAL_CONTENT_STORE is not configured.")
+        
+        queryset = Proposal.objects.only('id', 'content_document_id', *Proposal.CONTENT_FIELDS)
+        stored = 0
+        for proposal in queryset.order_by('pk').iterator(chunk_size=options['batch_size']):
+            if not proposal.content_document_id:
+                proposal.content_document_id = uuid.uuid4().hex
+                Proposal.objects.filter(pk=proposal.pk).update(
+                    content_document_id=proposal.content_document_id
+                )
+            store.put(
+                proposal.content_document_id,
+                {name: getattr(proposal, name) for name in Proposal.CONTENT_FIELDS}
+            )
+            stored += 1
+        
+        self.stdout.write(self.style.SUCCESS(f"Stored content for {stored} proposals."))
@@ -0,0 +1,52 @@
+"""
+Management command to rebuild the full-text search index.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from governance import search
+from governance.models import Proposal, ProposalComment
+
+
+class Command(BaseCommand):
+    """Re-index every proposal and comment from scratch."""
+    
+    help = 'Rebuild the full-text search index for proposals and comments.'
+    
+    def add_arguments(self, parser):
+        """Add command arguments."""
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Number of documents written per batch.'
+        )
+    
+    def handle(self, *args, **options):
+        """Clear the index and write every document in batches."""
+        backend = search.get_backend()
+        if backend is None:
+            raise CommandError(f"No search backend for the {connection.vendor} database.")
+        
+        batch_size = options['batch_size']
+        sources = [
+            (Proposal.objects.only('id', *Proposal.SEARCH_FIELDS), search.proposal_document),
+            (ProposalComment.objects.only('id', 'proposal_id', 'content'), search.comment_document),
+        ]
+        
+        indexed = 0
+        with transaction.atomic():
+            search.create_search_index()
+            with connection.cursor() as cursor:
+                backend.clear(cursor)
+            for queryset, to_document in sources:
+                batch = []
+                for instance in queryset.order_by('pk').iterator(chunk_size=batch_size):
+                    batch.append(to_document(instance))
+                    if len(batch) >= batch_size:
+                        search.index_documents(batch)
+                        indexed += len(batch)
+                        batch = []
+                search.index_documents(batch)
+                indexed += len(batch)
+        
+        self.stdout.write(self.style.SUCCESS(f"Indexed {indexed} documents."))
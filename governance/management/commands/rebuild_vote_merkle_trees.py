@@ -0,0 +1,83 @@
+"""
+Management command to rebuild the vote Merkle trees of proposals.
+"""
+
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from governance import merkle
+from governance.models import Vote, VoteMerkleTree, VoteMerkleNode
+
+
+class Command(BaseCommand):
+    """Recompute every vote tree from scratch, hashing in worker processes."""
+    
+    help = 'Rebuild the vote Merkle trees of proposals in parallel.'
+    
+    def add_arguments(self, parser):
+        """Add command arguments."""
+        parser.add_argument(
+            'proposal_ids', nargs='*', type=int,
+            help='Proposals to rebuild; all proposals with votes by default.'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 1,
+            help='Number of worker processes computing hashes.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Number of nodes written per INSERT.'
+        )
+    
+    def handle(self, *args, **options):
+        """Read each proposal's votes, build its tree in a worker and store it."""
+        proposal_ids = options['proposal_ids'] or list(
+            Vote.objects.values_list('proposal_id', flat=True).distinct().order_by('proposal_id')
+        )
+        workers = max(options['workers'], 1)
+        
+        rebuilt = leaves = 0
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pending = set()
+            for proposal_id in proposal_ids:
+                # Bound the votes held in memory to a couple of proposals per worker
+                if len(pending) >= workers * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        leaves += self.store(future.result(), options['batch_size'])
+                        rebuilt += 1
+                votes = list(
+                    Vote.objects.filter(proposal_id=proposal_id).order_by('pk').values_list(
+                        'pk', 'voter_id', 'vote_count', 'is_for'
+                    )
+                )
+                pending.add(executor.submit(merkle.build_tree, proposal_id, votes))
+            
+            for future in wait(pending).done:
+                leaves += self.store(future.result(), options['batch_size'])
+                rebuilt += 1
+        
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {rebuilt} vote Merkle trees with {leaves} leaves."
+        ))
+    
+    def store(self, result, batch_size):
+        """Replace a proposal's stored tree with a rebuilt one; return its size.
+        
+        Votes cast after they were read have no leaf afterwards; the stored
+        watermark is reset, so the next ``VoteMerkleTree.sync`` appends them.
+        """
+        proposal_id, size, frontier, _, nodes = result
+        with transaction.atomic():
+            VoteMerkleTree.objects.get_or_create(proposal_id=proposal_id)
+            tree = VoteMerkleTree.objects.select_for_update().get(proposal_id=proposal_id)
+            tree.nodes.all().delete()
+            VoteMerkleNode.objects.bulk_create([
+                VoteMerkleNode(tree=tree, level=level, index=index, hash=value, vote_id=vote_id)
+                for level, index, value, vote_id in nodes
+            ], batch_size=batch_size)
+            tree.store(merkle.IncrementalMerkleTree(size, frontier))
+        return size
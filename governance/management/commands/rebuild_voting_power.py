@@ -0,0 +1,32 @@
+"""
+Management command to rebuild the cached effective voting power table.
+"""
+
+from django.core.management.base import BaseCommand
+
+from governance.delegation import rebuild_effective_voting_power
+
+
+class Command(BaseCommand):
+    """Resolve all delegation chains and store each holder's effective power."""
+    
+    help = 'Rebuild EffectiveVotingPower from the current delegation graph.'
+    
+    def add_arguments(self, parser):
+        """Add command arguments."""
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Number of rows written per INSERT.'
+        )
+    
+    def handle(self, *args, **options):
+        """Rebuild the table and report any delegation cycles found."""
+        graph = rebuild_effective_voting_power(batch_size=options['batch_size'])
+        
+        for cycle in graph.cycles:
+            self.stdout.write(self.style.WARNING(
+                f"Ignored delegation cycle through holders {cycle}"
+            ))
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt effective voting power for {len(graph.balances)} holders."
+        ))
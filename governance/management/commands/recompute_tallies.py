@@ -0,0 +1,120 @@
+"""
+Management command to rebuild proposal vote tallies from the Vote table.
+
+Counts still waiting on vote counter shards are part of a proposal's tally,
+so they are added to the stored totals before comparing, and a correction
+leaves them to be folded in by the next shard merge.
+"""
+
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q, Sum
+
+from governance.models import Proposal, Vote, VoteCounterShard
+
+
+class Command(BaseCommand):
+    """Verify and repair drift in the running proposal vote tallies."""
+    
+    help = 'Recompute total_votes_for/total_votes_against for proposals in chunks.'
+    
+    def add_arguments(self, parser):
+        """Add command arguments."""
+        parser.add_argument(
+            '--chunk-size', type=int, default=500,
+            help='Number of proposals to recompute per transaction.'
+        )
+        parser.add_argument(
+            '--proposal', type=int, action='append', dest='proposal_ids',
+            help='Only recompute the given proposal ID (may be repeated).'
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Report drifted proposals without writing corrections.'
+        )
+    
+    def handle(self, *args, **options):
+        """Walk proposals by primary key and fix any tally that has drifted."""
+        chunk_size = options['chunk_size']
+        dry_run = options['dry_run']
+        
+        proposals = Proposal.objects.order_by('pk')
+        if options['proposal_ids']:
+            proposals = proposals.filter(pk__in=options['proposal_ids'])
+        
+        checked = 0
+        drifted = 0
+        last_pk = 0
+        
+        while True:
+            with transaction.atomic():
+                chunk_qs = proposals.filter(pk__gt=last_pk)
+                if not dry_run:
+                    # Hold the rows so concurrent deltas cannot interleave with the fix
+                    chunk_qs = chunk_qs.select_for_update()
+                chunk = list(chunk_qs.values_list(
+                    'pk', 'total_votes_for', 'total_votes_against'
+                )[:chunk_size])
+                if not chunk:
+                    break
+                last_pk = chunk[-1][0]
+                
+                corrections = self._find_drift(chunk, lock=not dry_run)
+                if corrections and not dry_run:
+                    Proposal.objects.bulk_update(
+                        corrections, ['total_votes_for', 'total_votes_against']
+                    )
+            
+            checked += len(chunk)
+            drifted += len(corrections)
+        
+        action = 'found' if dry_run else 'repaired'
+        self.stdout.write(self.style.SUCCESS(
+            f"Checked {checked} proposals, {action} {drifted} with drifted tallies."
+        ))
+    
+    def _find_drift(self, chunk, lock=False):
+        """Return corrected Proposal instances for rows whose tallies drifted."""
+        proposal_ids = [pk for pk, _, _ in chunk]
+        
+        # Unmerged shard counts; locked first so no voter can move them mid-check
+        shards = VoteCounterShard.objects.filter(proposal_id__in=proposal_ids)
+        if lock:
+            shards = shards.select_for_update()
+        pending = defaultdict(lambda: [0, 0])
+        for proposal_id, votes_for, votes_against in shards.values_list(
+            'proposal_id', 'votes_for', 'votes_against'
+        ):
+            pending[proposal_id][0] += votes_for
+            pending[proposal_id][1] += votes_against
+        
+        # One grouped aggregate over the votes of the whole chunk
+        actual = {
+            row['proposal_id']: (row['votes_for'] or 0, row['votes_against'] or 0)
+            for row in Vote.objects.filter(
+                proposal_id__in=proposal_ids
+            ).values('proposal_id').annotate(
+                votes_for=Sum('vote_count', filter=Q(is_for=True)),
+                votes_against=Sum('vote_count', filter=Q(is_for=False))
+            ).order_by()
+        }
+        
+        corrections = []
+        for pk, stored_for, stored_against in chunk:
+            expected_for, expected_against = actual.get(pk, (0, 0))
+            pending_for, pending_against = pending.get(pk, (0, 0))
+            if (stored_for + pending_for, stored_against + pending_against) != (expected_for, expected_against):
+                self.stdout.write(
+                    f"Proposal {pk}: stored {stored_for}/{stored_against} "
+                    f"(+{pending_for}/{pending_against} unmerged), "
+                    f"actual {expected_for}/{expected_against}"
+                )
+                # Leave the unmerged shard counts for the next merge to add
+                corrections.append(Proposal(
+                    pk=pk,
+                    total_votes_for=expected_for - pending_for,
+                    total_votes_against=expected_against - pending_against
+                ))
+        return corrections
@@ -0,0 +1,24 @@
+"""
+Management command to reconcile the maintained token supply counter.
+"""
+
+from django.core.management.base import BaseCommand
+
+from governance.models import TokenSupply
+
+
+class Command(BaseCommand):
+    """Recompute the token supply totals and correct any drift."""
+    
+    help = 'Reset TokenSupply to the aggregate of all GovernanceToken balances.'
+    
+    def handle(self, *args, **options):
+        """Reconcile the counter and report the drift that was corrected."""
+        supply_drift, locked_drift = TokenSupply.reconcile()
+        
+        if supply_drift or locked_drift:
+            self.stdout.write(self.style.WARNING(
+                f"Corrected drift: total supply {supply_drift:+d}, locked {locked_drift:+d}"
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS("Token supply counter is in sync."))
@@ -0,0 +1,155 @@
+"""
+Incremental Merkle trees over the votes of a proposal.
+
+Each proposal's votes are leaves of an append-only binary tree of fixed
+depth, padded on the right with the roots of empty subtrees. The tree keeps
+a frontier with one hash per level, which is the left sibling on the right
+edge of the tree. Appending a leaf therefore costs O(depth) hashes. Only
+complete subtrees are ever persisted: roughly two per leaf. An inclusion
+proof combines those stored nodes with the edge hashes recomputed from the
+frontier.
+
+Leaves are ``sha256(0x00 || "<proposal>:<voter>:<vote_count>:<is_for>")``
+and interior nodes are ``sha256(0x01 || left || right)``. The prefixes keep
+a leaf from being passed off as an interior node.
+"""
+
+import hashlib
+
+DEPTH = 32
+
+LEAF_PREFIX = b'\x00'
+NODE_PREFIX = b'\x01'
+
+
+def leaf_hash(proposal_id, voter_id, vote_count, is_for):
+    """Return the hex hash of a vote leaf."""
+    payload = f'{proposal_id}:{voter_id}:{vote_count}:{int(bool(is_for))}'.encode()
+    return hashlib.sha256(LEAF_PREFIX + payload).hexdigest()
+
+
+def node_hash(left, right):
+    """Return the hex hash of an interior node from its children's hex hashes."""
+    return hashlib.sha256(NODE_PREFIX + bytes.fromhex(left) + bytes.fromhex(right)).hexdigest()
+
+
+def _zero_hashes():
+    """Return the roots of empty subtrees of height 0 to DEPTH."""
+    hashes = [hashlib.sha256(LEAF_PREFIX).hexdigest()]
+    for _ in range(DEPTH):
+        hashes.append(node_hash(hashes[-1], hashes[-1]))
+    return hashes
+
+
+ZERO_HASHES = _zero_hashes()
+EMPTY_ROOT = ZERO_HASHES[DEPTH]
+
+
+class IncrementalMerkleTree:
+    """Append-only Merkle tree described by its size and frontier.
+    
+    A node at ``level`` with ``index`` covers leaves ``index * 2**level``
+    up to ``(index + 1) * 2**level - 1``. It is complete once all of those
+    leaves are appended. ``frontier[level]`` holds the complete node at that
+    level whose right sibling is still being filled, if any.
+    """
+    
+    def __init__(self, size=0, frontier=None):
+        """Initialize the tree from a stored size and frontier."""
+        self.size = size
+        self.frontier = list(frontier or [None] * DEPTH)
+    
+    def append(self, leaf):
+        """Append a leaf hash and return the (level, index, hash) nodes it completes."""
+        if self.size >= 2 ** DEPTH:
+            raise ValueError("Merkle tree is full.")
+        
+        node, index = leaf, self.size
+        completed = [(0, index, node)]
+        for level in range(DEPTH):
+            if index % 2 == 0:
+                self.frontier[level] = node
+                break
+            node = node_hash(self.frontier[level], node)
+            index //= 2
+            completed.append((level + 1, index, node))
+        self.size += 1
+        return completed
+    
+    def edge_hashes(self):
+        """Return the hash of the partially filled right-edge node at each level.
+        
+        Entry ``level`` is the node at index ``size >> level``; the last
+        entry is the root.
+        """
+        node = ZERO_HASHES[0]
+        hashes = [node]
+        for level in range(DEPTH):
+            if (self.size >> level) & 1:
+                node = node_hash(self.frontier[level], node)
+            else:
+                node = node_hash(node, ZERO_HASHES[level])
+            hashes.append(node)
+        return hashes
+    
+    def root(self):
+        """Return the root hash."""
+        return self.edge_hashes()[DEPTH]
+    
+    def complete_siblings(self, index):
+        """Return the (level, index) keys of stored nodes on a leaf's proof path."""
+        return [
+            (level, (index >> level) ^ 1) for level in range(DEPTH)
+            if (index >> level) ^ 1 < self.size >> level
+        ]
+    
+    def proof(self, index, nodes):
+        """Return the sibling hashes from leaf ``index`` up to the root.
+        
+        ``nodes`` maps the keys listed by ``complete_siblings`` to their hashes.
+        """
+        if not 0 <= index < self.size:
+            raise IndexError(f"Leaf {index} is not in a tree of {self.size} leaves.")
+        
+        edge = self.edge_hashes()
+        path = []
+        for level in range(DEPTH):
+            sibling = (index >> level) ^ 1
+            boundary = self.size >> level
+            if sibling < boundary:
+                path.append(nodes[(level, sibling)])
+            elif sibling == boundary:
+                path.append(edge[level])
+            else:
+                path.append(ZERO_HASHES[level])
+        return path
+
+
+def verify_proof(leaf, index, path, root):
+    """Return whether a proof links a leaf at ``index`` to ``root``."""
+    node = leaf
+    for level, sibling in enumerate(path):
+        if (index >> level) & 1:
+            node = node_hash(sibling, node)
+        else:
+            node = node_hash(node, sibling)
+    return node == root
+
+
+def build_tree(proposal_id, votes):
+    """Build a proposal's tree from (vote_id, voter_id, vote_count, is_for) rows.
+    
+    Returns ``(proposal_id, size, frontier, root, nodes)``, where ``nodes``
+    holds ``(level, index, hash, vote_id)`` for every complete node. The
+    vote id is None above the leaves. The function needs no database
+    access, so batch rebuilds can run it in worker processes.
+    """
+    tree = IncrementalMerkleTree()
+    nodes = []
+    for vote_id, voter_id, vote_count, is_for in votes:
+        completed = tree.append(leaf_hash(proposal_id, voter_id, vote_count, is_for))
+        nodes.extend(
+            (level, index, value, vote_id if level == 0 else None)
+            for level, index, value in completed
+        )
+    return proposal_id, tree.size, tree.frontier, tree.root(), nodes
@@ -0,0 +1,20 @@
+"""
+Prometheus metrics for the governance app.
+"""
+
+from prometheus_client import Counter, Gauge
+
+TOKEN_LOCKS_RELEASED = Counter(
+    'governance_token_locks_released_total',
+    'Number of expired governance token locks released by the sweeper.'
+)
+
+TOKEN_LOCKS_RELEASED_LAST_RUN = Gauge(
+    'governance_token_locks_released_last_run',
+    'Number of expired governance token locks released by the latest sweeper run.'
+)
+
+SUSPICIOUS_VOTING_WINDOWS_FLAGGED = Counter(
+    'governance_suspicious_voting_windows_flagged_total',
+    'Number of voting window findings written to the review queue by the Sybil detector.'
+)
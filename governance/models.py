@@ -2,12 +2,26 @@
 Models for the governance app.
 """
 
+import logging
 import math
-from django.db import models
+import operator
+import random
+import uuid
+from collections import namedtuple
+from functools import partial, reduce
+from django.db import models, transaction, IntegrityError
+from django.db.models import F, Sum
 from django.conf import settings
 from django.utils import timezone
 from django.contrib.auth.models import User
 
+from . import merkle, search
+from .content_store import get_content_store
+from .signals import balances_changed
+from .streams import publish_tally_delta
+
+logger = logging.getLogger(__name__)
+
 
 class Proposal(models.Model):
     """Model for governance proposals."""
@@ -54,6 +68,9 @@ class Proposal(models.Model):
         """Meta options for the Proposal model."""
         
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'voting_end_time'], name='proposal_voting_due'),
+        ]
         permissions = [
             ('start_discussion', 'Can start discussion phase'),
             ('start_voting', 'Can start voting phase'),
@@ -61,10 +78,119 @@ class Proposal(models.Model):
             ('cancel_proposal', 'Can cancel proposal'),
         ]
     
+    # Maintained with in-database deltas; never written from a stale instance
+    TALLY_FIELDS = ('total_votes_for', 'total_votes_against')
+    
+    # Fields covered by the full-text search index
+    SEARCH_FIELDS = ('title', 'description', 'rationale')
+    
+    # Long text bodies, mirrored to the content store when one is configured
+    CONTENT_FIELDS = ('description', 'rationale', 'implementation_details', 'timeline')
+    
     def __str__(self):
         """Return a string representation of the proposal."""
         return f"{self.title} ({self.get_status_display()})"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Remember the loaded text fields so saves only re-index changes."""
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_text = {}
+        instance._remember_text(field_names)
+        return instance
+    
+    def _remember_text(self, names):
+        """Record the current values of the loaded text fields among names."""
+        self._loaded_text.update(
+            (name, self.__dict__[name]) for name in (*self.SEARCH_FIELDS, *self.CONTENT_FIELDS)
+            if name in names and name in self.__dict__
+        )
+    
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        """Reload fields, remembering text fields loaded on first access."""
+        super().refresh_from_db(using, fields, **kwargs)
+        if hasattr(self, '_loaded_text'):
+            self._remember_text(fields if fields is not None else (*self.SEARCH_FIELDS, *self.CONTENT_FIELDS))
+    
+    def save(self, *args, **kwargs):
+        """Override save so full saves do not clobber concurrently applied tallies."""
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            # Like a plain save of a deferred instance, leave unloaded fields alone
+            deferred = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.TALLY_FIELDS
+                and field.attname not in deferred
+            ]
+        
+        changed = self._changed_text(kwargs.get('update_fields'))
+        reindex = bool(changed & set(self.SEARCH_FIELDS))
+        store = get_content_store() if changed & set(self.CONTENT_FIELDS) else None
+        if store is not None and not self.content_document_id:
+            self.content_document_id = uuid.uuid4().hex
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = [*kwargs['update_fields'], 'content_document_id']
+        
+        if not reindex and store is None:
+            super().save(*args, **kwargs)
+        else:
+            with transaction.atomic():
+                super().save(*args, **kwargs)
+                if reindex:
+                    search.index_documents([search.proposal_document(self)])
+                if store is not None:
+                    content = {name: getattr(self, name) for name in self.CONTENT_FIELDS}
+                    transaction.on_commit(
+                        partial(self._put_content, store, self.content_document_id, content)
+                    )
+        
+        self._loaded_text = {
+            **getattr(self, '_loaded_text', {}),
+            **{name: getattr(self, name) for name in changed}
+        }
+    
+    def _changed_text(self, update_fields):
+        """Return the names of text fields being saved with new values."""
+        loaded = getattr(self, '_loaded_text', {})
+        names = (*self.SEARCH_FIELDS, *self.CONTENT_FIELDS)
+        if update_fields is not None:
+            names = [name for name in names if name in update_fields]
+        return {name for name in names if getattr(self, name) != loaded.get(name)}
+    
+    @staticmethod
+    def _put_content(store, document_id, content):
+        """Write the text bodies to the content store after commit."""
+        try:
+            store.put(document_id, content)
+        except Exception:
+            # Reads fall back to the database copy until the next save
+            logger.exception("Failed to store content document %s", document_id)
+    
+    def get_content(self):
+        """Return the long text bodies, from the content store when available."""
+        store = get_content_store()
+        if store is not None and self.content_document_id:
+            content = store.get(self.content_document_id)
+            if content is not None:
+                return content
+        
+        deferred = self.get_deferred_fields() & set(self.CONTENT_FIELDS)
+        if deferred:
+            self.refresh_from_db(fields=list(deferred))
+        return {name: getattr(self, name) for name in self.CONTENT_FIELDS}
+    
+    def delete(self, *args, **kwargs):
+        """Override delete to drop the proposal's search and content documents."""
+        proposal_id = self.pk
+        document_id = self.content_document_id
+        store = get_content_store()
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            search.remove_document(search.PROPOSAL, proposal_id)
+            if store is not None and document_id:
+                transaction.on_commit(partial(store.delete, document_id))
+        return result
+    
     def start_discussion(self):
         """Start the discussion phase for this proposal."""
         self.status = self.Status.DISCUSSION
@@ -84,6 +210,11 @@ class Proposal(models.Model):
     
     def end_voting(self):
         """End the voting phase and determine if the proposal passed."""
+        # Fold any sharded counters in and read the authoritative tallies
+        self.merge_vote_shards()
+        # Seal the vote tree so the final root covers every vote
+        VoteMerkleTree.sync(self.pk, full=True)
+        
         # Calculate if the proposal passed
         quorum_percentage = settings.PROPOSAL_QUORUM_PERCENTAGE
         approval_threshold = settings.PROPOSAL_APPROVAL_THRESHOLD
@@ -106,6 +237,47 @@ class Proposal(models.Model):
             self.save()
             return False
     
+    @classmethod
+    def apply_tally_delta(cls, proposal_id, votes_for=0, votes_against=0, shards=None, publish=True):
+        """Atomically add vote deltas to a proposal's running tallies.
+        
+        When ``VOTE_COUNTER_SHARDS`` is set, the delta lands on a random
+        VoteCounterShard row instead of the contended proposal row. Unless
+        ``publish`` is False, the delta is pushed to live tally streams once
+        the transaction commits.
+        """
+        if not votes_for and not votes_against:
+            return
+        
+        if publish:
+            publish_tally_delta(proposal_id, votes_for, votes_against)
+        
+        if shards is None:
+            shards = getattr(settings, 'VOTE_COUNTER_SHARDS', 0)
+        if shards:
+            VoteCounterShard.add(proposal_id, votes_for, votes_against, shards)
+            return
+        
+        cls.objects.filter(pk=proposal_id).update(
+            total_votes_for=F('total_votes_for') + votes_for,
+            total_votes_against=F('total_votes_against') + votes_against
+        )
+    
+    def merge_vote_shards(self):
+        """Merge pending shard counts into this proposal and refresh its tallies."""
+        VoteCounterShard.merge(self.pk)
+        self.refresh_from_db(fields=list(self.TALLY_FIELDS))
+    
+    def get_live_tallies(self):
+        """Return (for, against) totals including shard counts not yet merged."""
+        pending = self.vote_shards.aggregate(
+            votes_for=Sum('votes_for'), votes_against=Sum('votes_against')
+        )
+        return (
+            self.total_votes_for + (pending['votes_for'] or 0),
+            self.total_votes_against + (pending['votes_against'] or 0)
+        )
+    
     def execute(self):
         """Execute the approved proposal."""
         self.status = self.Status.EXECUTED
@@ -133,6 +305,12 @@ class Vote(models.Model):
         
         unique_together = ('proposal', 'voter')
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='vote_created_keyset'),
+        ]
+        permissions = [
+            ('relay_votes', 'Can submit votes on behalf of members'),
+        ]
     
     def __str__(self):
         """Return a string representation of the vote."""
@@ -144,21 +322,233 @@ class Vote(models.Model):
         """Calculate the cost of votes using quadratic voting."""
         return vote_count ** 2
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Remember the loaded tally contribution so saves can apply deltas."""
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_tally = instance._tally_contribution()
+        return instance
+    
+    def _tally_contribution(self):
+        """Return the (for, against) amounts this vote adds to its proposal."""
+        if self.is_for:
+            return self.proposal_id, self.vote_count, 0
+        return self.proposal_id, 0, self.vote_count
+    
     def save(self, *args, **kwargs):
         """Override save to calculate vote cost and update proposal totals."""
         # Calculate vote cost
         self.vote_cost = self.calculate_vote_cost(self.vote_count)
         
-        # Save the vote
-        super().save(*args, **kwargs)
+        previous = getattr(self, '_loaded_tally', None)
+        
+        # Save the vote and apply only the change in its contribution to the tallies
+        proposal_id, votes_for, votes_against = self._tally_contribution()
+        if previous is not None and previous[0] == proposal_id:
+            votes_for -= previous[1]
+            votes_against -= previous[2]
+        # No savepoint: the vote path is already in a transaction and the
+        # whole vote rolls back together
+        with transaction.atomic(savepoint=False):
+            super().save(*args, **kwargs)
+            if previous is not None and previous[0] != proposal_id:
+                Proposal.apply_tally_delta(previous[0], -previous[1], -previous[2])
+            Proposal.apply_tally_delta(proposal_id, votes_for, votes_against)
+        self._loaded_tally = self._tally_contribution()
+    
+    def delete(self, *args, **kwargs):
+        """Override delete to remove this vote from the proposal totals."""
+        proposal_id, votes_for, votes_against = self._tally_contribution()
+        with transaction.atomic(savepoint=False):
+            result = super().delete(*args, **kwargs)
+            Proposal.apply_tally_delta(proposal_id, -votes_for, -votes_against)
+        return result
+
+
+class VoteCounterShard(models.Model):
+    """Model for sharded vote counters on hot proposals.
+    
+    Votes are spread over ``VOTE_COUNTER_SHARDS`` rows per proposal so
+    concurrent voters do not serialize on the proposal row lock. A periodic
+    job folds the shards back into the proposal tallies.
+    """
+    
+    proposal = models.ForeignKey(Proposal, on_delete=models.CASCADE, related_name='vote_shards')
+    shard = models.PositiveSmallIntegerField()
+    # Plain integers: a shard may carry a negative delta from a changed vote
+    votes_for = models.IntegerField(default=0)
+    votes_against = models.IntegerField(default=0)
+    
+    class Meta:
+        """Meta options for the VoteCounterShard model."""
         
-        # Update proposal vote totals
-        proposal = self.proposal
-        votes = Vote.objects.filter(proposal=proposal)
+        unique_together = ('proposal', 'shard')
+    
+    def __str__(self):
+        """Return a string representation of the shard."""
+        return f"Shard {self.shard} of proposal {self.proposal_id}: {self.votes_for}/{self.votes_against}"
+    
+    @classmethod
+    def add(cls, proposal_id, votes_for, votes_against, shards):
+        """Add a delta to a randomly chosen shard, creating it on first use."""
+        shard = random.randrange(shards)
+        delta = {
+            'votes_for': F('votes_for') + votes_for,
+            'votes_against': F('votes_against') + votes_against,
+        }
+        if cls.objects.filter(proposal_id=proposal_id, shard=shard).update(**delta):
+            return
         
-        proposal.total_votes_for = sum(v.vote_count for v in votes if v.is_for)
-        proposal.total_votes_against = sum(v.vote_count for v in votes if not v.is_for)
-        proposal.save(update_fields=['total_votes_for', 'total_votes_against'])
+        try:
+            with transaction.atomic():
+                cls.objects.create(
+                    proposal_id=proposal_id, shard=shard,
+                    votes_for=votes_for, votes_against=votes_against
+                )
+        except IntegrityError:
+            # Another writer created the shard first
+            cls.objects.filter(proposal_id=proposal_id, shard=shard).update(**delta)
+    
+    @classmethod
+    def merge(cls, proposal_id):
+        """Move all shard counts of a proposal onto the proposal row."""
+        with transaction.atomic():
+            pending = list(
+                cls.objects.select_for_update().filter(proposal_id=proposal_id).exclude(
+                    votes_for=0, votes_against=0
+                ).values_list('pk', 'votes_for', 'votes_against')
+            )
+            if not pending:
+                return 0
+            
+            votes_for = sum(row[1] for row in pending)
+            votes_against = sum(row[2] for row in pending)
+            cls.objects.filter(pk__in=[row[0] for row in pending]).update(
+                votes_for=0, votes_against=0
+            )
+            Proposal.apply_tally_delta(proposal_id, votes_for, votes_against, shards=0, publish=False)
+        return len(pending)
+
+
+class VoteMerkleTree(models.Model):
+    """Model for the append-only Merkle tree over a proposal's votes.
+    
+    Votes are appended in batches by ``sync`` rather than on the voting path,
+    so hot proposals do not serialize on the tree row. Only complete subtrees
+    are stored as ``VoteMerkleNode`` rows; the frontier kept here supplies
+    the rest of the right edge. A vote deleted after it was appended keeps
+    its leaf until the tree is rebuilt.
+    """
+    
+    proposal = models.OneToOneField(Proposal, on_delete=models.CASCADE, related_name='vote_merkle_tree')
+    leaf_count = models.PositiveBigIntegerField(default=0)
+    root = models.CharField(max_length=64, default=merkle.EMPTY_ROOT)
+    frontier = models.JSONField(default=list)
+    last_vote_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        """Return a string representation of the tree."""
+        return f"Vote tree of proposal {self.proposal_id}: {self.leaf_count} leaves"
+    
+    def as_incremental(self):
+        """Return the stored state as an IncrementalMerkleTree."""
+        return merkle.IncrementalMerkleTree(self.leaf_count, self.frontier)
+    
+    @classmethod
+    def sync(cls, proposal_id, full=False):
+        """Append the proposal's votes that are not in its tree yet.
+        
+        Returns the number of votes appended. Only votes above the
+        ``last_vote_id`` watermark are read, and the watermark advances only
+        over votes older than ``VOTE_MERKLE_SYNC_LAG_SECONDS``, so a vote that
+        commits shortly after a later vote is still picked up. ``full``
+        ignores the watermark, as when voting ends and the tree is sealed.
+        """
+        settled = timezone.now() - timezone.timedelta(seconds=settings.VOTE_MERKLE_SYNC_LAG_SECONDS)
+        with transaction.atomic():
+            cls.objects.get_or_create(proposal_id=proposal_id)
+            tree = cls.objects.select_for_update().get(proposal_id=proposal_id)
+            pending = Vote.objects.filter(proposal_id=proposal_id, merkle_leaf__isnull=True)
+            if not full:
+                pending = pending.filter(pk__gt=tree.last_vote_id)
+            votes = list(
+                pending.order_by('pk').values_list('pk', 'voter_id', 'vote_count', 'is_for', 'created_at')
+            )
+            if not votes:
+                return 0
+            
+            incremental = tree.as_incremental()
+            nodes = []
+            last_vote_id = tree.last_vote_id
+            advancing = True
+            for vote_id, voter_id, vote_count, is_for, created_at in votes:
+                # Stop at the first unsettled vote; later ones stay above the watermark
+                advancing = advancing and created_at <= settled
+                if advancing:
+                    last_vote_id = max(last_vote_id, vote_id)
+                leaf = merkle.leaf_hash(proposal_id, voter_id, vote_count, is_for)
+                nodes.extend(
+                    VoteMerkleNode(
+                        tree=tree, level=level, index=index, hash=value,
+                        vote_id=vote_id if level == 0 else None
+                    )
+                    for level, index, value in incremental.append(leaf)
+                )
+            VoteMerkleNode.objects.bulk_create(nodes, batch_size=1000)
+            tree.store(incremental, last_vote_id)
+        return len(votes)
+    
+    def store(self, incremental, last_vote_id=0):
+        """Save the size, frontier and root of an IncrementalMerkleTree.
+        
+        ``last_vote_id`` is the id up to which every vote has a leaf; the
+        default makes the next ``sync`` look at all of the proposal's votes.
+        """
+        self.leaf_count = incremental.size
+        self.frontier = incremental.frontier
+        self.root = incremental.root()
+        self.last_vote_id = last_vote_id
+        self.save(update_fields=['leaf_count', 'frontier', 'root', 'last_vote_id', 'updated_at'])
+    
+    def proof(self, leaf):
+        """Return the sibling hashes proving a leaf VoteMerkleNode."""
+        incremental = self.as_incremental()
+        keys = incremental.complete_siblings(leaf.index)
+        nodes = {}
+        if keys:
+            condition = reduce(
+                operator.or_, (models.Q(level=level, index=index) for level, index in keys)
+            )
+            nodes = {
+                (level, index): value
+                for level, index, value in self.nodes.filter(condition).values_list('level', 'index', 'hash')
+            }
+        return incremental.proof(leaf.index, nodes)
+
+
+class VoteMerkleNode(models.Model):
+    """Model for a complete subtree of a proposal's vote Merkle tree.
+    
+    Level 0 nodes are the vote leaves and link back to their vote.
+    """
+    
+    tree = models.ForeignKey(VoteMerkleTree, on_delete=models.CASCADE, related_name='nodes')
+    level = models.PositiveSmallIntegerField()
+    index = models.PositiveBigIntegerField()
+    hash = models.CharField(max_length=64)
+    vote = models.OneToOneField(
+        Vote, on_delete=models.SET_NULL, null=True, blank=True, related_name='merkle_leaf'
+    )
+    
+    class Meta:
+        """Meta options for the VoteMerkleNode model."""
+        
+        unique_together = ('tree', 'level', 'index')
+    
+    def __str__(self):
+        """Return a string representation of the node."""
+        return f"Node ({self.level}, {self.index}) of tree {self.tree_id}"
 
 
 class ProposalComment(models.Model):
@@ -178,6 +568,22 @@ class ProposalComment(models.Model):
     def __str__(self):
         """Return a string representation of the comment."""
         return f"Comment by {self.author.username} on {self.proposal.title}"
+    
+    def save(self, *args, **kwargs):
+        """Override save to keep the comment's search document current."""
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            update_fields = kwargs.get('update_fields')
+            if update_fields is None or 'content' in update_fields:
+                search.index_documents([search.comment_document(self)])
+    
+    def delete(self, *args, **kwargs):
+        """Override delete to drop the comment from search."""
+        comment_id = self.pk
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            search.remove_document(search.COMMENT, comment_id)
+        return result
 
 
 class GovernanceToken(models.Model):
@@ -200,11 +606,80 @@ class GovernanceToken(models.Model):
                 name='unique_token_holder'
             )
         ]
+        indexes = [
+            models.Index(
+                fields=['locked_until'], name='token_lock_expiry', condition=models.Q(is_locked=True)
+            ),
+            models.Index(fields=['-balance', 'holder'], name='token_balance_rank'),
+        ]
     
     def __str__(self):
         """Return a string representation of the token."""
         return f"{self.holder.username}'s tokens: {self.balance}"
     
+    @classmethod
+    def release_expired_locks(cls, now=None, batch_size=10000):
+        """Unlock every token whose lock has expired and return the row count.
+        
+        Expired rows are found through the partial ``locked_until`` index and
+        released with one UPDATE per primary-key range, each in its own
+        transaction, so no single statement holds locks on millions of rows.
+        """
+        now = now or timezone.now()
+        expired = cls.objects.filter(is_locked=True, locked_until__lte=now)
+        bounds = expired.aggregate(low=models.Min('pk'), high=models.Max('pk'))
+        if bounds['low'] is None:
+            return 0
+        
+        released = 0
+        for start in range(bounds['low'], bounds['high'] + 1, batch_size):
+            with transaction.atomic():
+                batch = expired.filter(pk__gte=start, pk__lt=start + batch_size)
+                balances = list(batch.select_for_update().values_list('balance', flat=True))
+                if not balances:
+                    continue
+                released += batch.update(is_locked=False, locked_until=None)
+                TokenSupply.apply_delta(locked=-sum(balances))
+        return released
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Remember the loaded balance and lock so saves can record the change."""
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_state = (instance.__dict__.get('balance'), instance.__dict__.get('is_locked'))
+        return instance
+    
+    def save(self, *args, **kwargs):
+        """Override save to record balance and lock changes."""
+        update_fields = kwargs.get('update_fields')
+        tracked = update_fields is None or {'balance', 'is_locked'} & set(update_fields)
+        old_balance, was_locked = getattr(self, '_loaded_state', (0, False))
+        
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if tracked and (old_balance, was_locked) != (self.balance, self.is_locked):
+                record_balance_changes([
+                    BalanceChange(self.holder_id, old_balance, self.balance, was_locked, self.is_locked)
+                ])
+        
+        if tracked:
+            self._loaded_state = (self.balance, self.is_locked)
+    
+    def refresh_from_db(self, *args, **kwargs):
+        """Reload fields and the remembered balance and lock state."""
+        super().refresh_from_db(*args, **kwargs)
+        self._loaded_state = (self.balance, self.is_locked)
+    
+    def delete(self, *args, **kwargs):
+        """Override delete to remove the balance from the supply totals."""
+        old_balance, was_locked = getattr(self, '_loaded_state', (self.balance, self.is_locked))
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            record_balance_changes([
+                BalanceChange(self.holder_id, old_balance, 0, was_locked, False)
+            ])
+        return result
+    
     def lock_for_voting(self, days=30):
         """Lock tokens for a specified number of days."""
         self.locked_until = timezone.now() + timezone.timedelta(days=days)
@@ -213,13 +688,240 @@ class GovernanceToken(models.Model):
     
     def delegate(self, delegate_user):
         """Delegate voting power to another user."""
+        from .delegation import change_delegation
+        change_delegation(self, delegate_user.pk)
         self.delegated_to = delegate_user
-        self.save()
     
     def undelegate(self):
         """Remove delegation."""
-        self.delegated_to = None
-        self.save()
+        from .delegation import change_delegation
+        change_delegation(self, None)
+
+
+class TokenSupply(models.Model):
+    """Singleton model holding the maintained governance token totals.
+    
+    Updated with deltas by every balance or lock change, so reads of the
+    total and locked supply never aggregate over all holders.
+    """
+    
+    total_supply = models.BigIntegerField(default=0)
+    total_locked = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        """Meta options for the TokenSupply model."""
+        
+        verbose_name_plural = "Token supply"
+    
+    def __str__(self):
+        """Return a string representation of the token supply."""
+        return f"Token supply: {self.total_supply} ({self.total_locked} locked)"
+    
+    @staticmethod
+    def aggregate_totals():
+        """Compute (total_supply, total_locked) with a full scan of GovernanceToken."""
+        totals = GovernanceToken.objects.aggregate(
+            total=Sum('balance'), locked=Sum('balance', filter=models.Q(is_locked=True))
+        )
+        return totals['total'] or 0, totals['locked'] or 0
+    
+    @classmethod
+    def current(cls):
+        """Return the supply row, seeding it from a full aggregate on first use."""
+        try:
+            return cls.objects.get(pk=1)
+        except cls.DoesNotExist:
+            total_supply, total_locked = cls.aggregate_totals()
+            supply, _ = cls.objects.get_or_create(
+                pk=1, defaults={'total_supply': total_supply, 'total_locked': total_locked}
+            )
+            return supply
+    
+    @classmethod
+    def apply_delta(cls, supply=0, locked=0):
+        """Atomically add deltas to the maintained totals."""
+        if not supply and not locked:
+            return
+        if not cls.objects.filter(pk=1).update(
+            total_supply=F('total_supply') + supply,
+            total_locked=F('total_locked') + locked,
+            updated_at=timezone.now()
+        ):
+            # First change ever: seeding aggregates the already-changed rows
+            cls.current()
+    
+    @classmethod
+    def reconcile(cls):
+        """Reset the maintained totals to a full aggregate and return the drift."""
+        with transaction.atomic():
+            supply = cls.current()
+            supply = cls.objects.select_for_update().get(pk=supply.pk)
+            total_supply, total_locked = cls.aggregate_totals()
+            drift = (total_supply - supply.total_supply, total_locked - supply.total_locked)
+            if any(drift):
+                supply.total_supply = total_supply
+                supply.total_locked = total_locked
+                supply.save(update_fields=['total_supply', 'total_locked', 'updated_at'])
+        return drift
+
+
+class TokenCheckpoint(models.Model):
+    """Model for the append-only history of each holder's token balance."""
+    
+    holder = models.ForeignKey(User, on_delete=models.CASCADE, related_name='token_checkpoints')
+    balance = models.PositiveIntegerField()
+    timestamp = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        """Meta options for the TokenCheckpoint model."""
+        
+        ordering = ['-timestamp']
+        indexes = [
+            models.Index(fields=['holder', 'timestamp'], name='token_checkpoint_lookup'),
+        ]
+    
+    def __str__(self):
+        """Return a string representation of the checkpoint."""
+        return f"{self.holder_id} held {self.balance} at {self.timestamp}"
+    
+    @classmethod
+    def balance_at(cls, holder_id, when):
+        """Return a holder's balance as of ``when`` (0 if it had no tokens yet).
+        
+        A single index seek on (holder, timestamp), so the cost is
+        logarithmic in the length of the history.
+        """
+        balance = cls.objects.filter(
+            holder_id=holder_id, timestamp__lte=when
+        ).order_by('-timestamp', '-pk').values_list('balance', flat=True).first()
+        return balance or 0
+    
+    @classmethod
+    def balances_at(cls, holder_ids, when):
+        """Return ``{holder_id: balance}`` as of ``when`` for many holders in one query."""
+        latest = cls.objects.filter(
+            holder_id=models.OuterRef('pk'), timestamp__lte=when
+        ).order_by('-timestamp', '-pk').values('balance')[:1]
+        
+        rows = User.objects.filter(pk__in=holder_ids).annotate(
+            checkpoint_balance=models.Subquery(latest)
+        ).values_list('pk', 'checkpoint_balance')
+        return {holder_id: balance or 0 for holder_id, balance in rows}
+
+
+class EffectiveVotingPower(models.Model):
+    """Model for cached effective voting power after resolving delegations."""
+    
+    holder = models.OneToOneField(
+        User, on_delete=models.CASCADE, related_name='effective_voting_power'
+    )
+    # Power delegated to this holder, directly or through a chain
+    delegated_power = models.BigIntegerField(default=0)
+    # Own balance plus delegated power, or 0 if this holder delegates
+    effective_power = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        """Meta options for the EffectiveVotingPower model."""
+        
+        verbose_name_plural = "Effective voting power"
+    
+    def __str__(self):
+        """Return a string representation of the effective voting power."""
+        return f"{self.holder.username}'s effective voting power: {self.effective_power}"
+
+
+class RewardDistribution(models.Model):
+    """Model for a participation reward run over one period.
+    
+    The payouts are calculated once and stored, then credited in chunks;
+    a run that stops part way resumes with the payouts not yet credited.
+    """
+    
+    class Status(models.TextChoices):
+        """Status choices for reward distributions."""
+        
+        CALCULATED = 'CALCULATED', 'Calculated'
+        COMPLETED = 'COMPLETED', 'Completed'
+    
+    period_start = models.DateTimeField()
+    period_end = models.DateTimeField()
+    proposal_count = models.PositiveIntegerField(default=0)
+    # Tokens paid for taking part in every proposal of the period
+    reward_amount = models.PositiveIntegerField()
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.CALCULATED)
+    total_rewarded = models.PositiveBigIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        """Meta options for the RewardDistribution model."""
+        
+        ordering = ['-period_start']
+        constraints = [
+            models.UniqueConstraint(fields=['period_start', 'period_end'], name='unique_reward_period')
+        ]
+    
+    def __str__(self):
+        """Return a string representation of the distribution."""
+        return f"Rewards for {self.period_start:%Y-%m-%d} to {self.period_end:%Y-%m-%d} ({self.get_status_display()})"
+
+
+class RewardPayout(models.Model):
+    """Model for one holder's participation reward in a distribution."""
+    
+    distribution = models.ForeignKey(RewardDistribution, on_delete=models.CASCADE, related_name='payouts')
+    holder = models.ForeignKey(User, on_delete=models.CASCADE, related_name='reward_payouts')
+    votes_cast = models.PositiveIntegerField()
+    participation_rate = models.DecimalField(max_digits=5, decimal_places=4)
+    multiplier = models.DecimalField(max_digits=4, decimal_places=2, default=1)
+    amount = models.PositiveIntegerField()
+    credited_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        """Meta options for the RewardPayout model."""
+        
+        constraints = [
+            models.UniqueConstraint(fields=['distribution', 'holder'], name='unique_reward_payout')
+        ]
+    
+    def __str__(self):
+        """Return a string representation of the payout."""
+        return f"{self.amount} tokens to {self.holder_id} ({self.participation_rate:.0%} participation)"
+
+
+class CommitteeSelection(models.Model):
+    """Model for the audit record of an arbitration committee draw.
+    
+    The seed and a digest of the eligible holders in draw order are stored,
+    so anyone can replay the draw and check that the same holders and
+    balances were used.
+    """
+    
+    seed = models.CharField(max_length=64)
+    committee_size = models.PositiveIntegerField()
+    top_percentage = models.PositiveIntegerField()
+    weighted = models.BooleanField(default=False)
+    holder_count = models.PositiveIntegerField()
+    cutoff_balance = models.PositiveIntegerField()
+    eligible_count = models.PositiveIntegerField()
+    eligible_digest = models.CharField(max_length=64)
+    # [{'holder': id, 'balance': balance}, ...] in selection order
+    members = models.JSONField(default=list)
+    selected_by = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name='committee_selections'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        """Meta options for the CommitteeSelection model."""
+        
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        """Return a string representation of the selection."""
+        return f"Committee of {len(self.members)} drawn at {self.created_at} (seed {self.seed})"
 
 
 class Guardian(models.Model):
@@ -262,6 +964,7 @@ class Member(models.Model):
         default=VerificationStatus.UNVERIFIED
     )
     join_date = models.DateField(auto_now_add=True)
+    verified_at = models.DateTimeField(null=True, blank=True)
     reputation_score = models.PositiveIntegerField(default=0)
     
     class Meta:
@@ -275,6 +978,82 @@ class Member(models.Model):
     def __str__(self):
         """Return a string representation of the member."""
         return f"Member: {self.user.username} ({self.get_verification_status_display()})"
+    
+    def save(self, *args, **kwargs):
+        """Override save to record when the member was verified."""
+        if self.verification_status == self.VerificationStatus.VERIFIED:
+            if self.verified_at is None:
+                self.verified_at = timezone.now()
+        else:
+            self.verified_at = None
+        super().save(*args, **kwargs)
+
+
+class VoteStreamCursor(models.Model):
+    """Model for the position of a consumer reading new votes in id order."""
+    
+    name = models.CharField(max_length=100, unique=True)
+    last_vote_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        """Return a string representation of the cursor."""
+        return f"{self.name} at vote {self.last_vote_id}"
+
+
+class SuspiciousVotingWindow(models.Model):
+    """Model for a window of votes flagged as possibly coordinated, awaiting review."""
+    
+    class Reason(models.TextChoices):
+        """Reason choices for suspicious windows."""
+        
+        FRESH_MEMBER_BURST = 'FRESH_MEMBER_BURST', 'Burst of votes from freshly verified members'
+        VOTE_COUNT_CLUSTER = 'VOTE_COUNT_CLUSTER', 'Cluster of identical vote counts'
+        WALLET_PREFIX_CLUSTER = 'WALLET_PREFIX_CLUSTER', 'Cluster of wallets sharing a prefix'
+    
+    class Status(models.TextChoices):
+        """Review status choices for suspicious windows."""
+        
+        PENDING = 'PENDING', 'Pending Review'
+        CONFIRMED = 'CONFIRMED', 'Confirmed'
+        DISMISSED = 'DISMISSED', 'Dismissed'
+    
+    proposal = models.ForeignKey(Proposal, on_delete=models.CASCADE, related_name='suspicious_windows')
+    window_start = models.DateTimeField()
+    window_end = models.DateTimeField()
+    reason = models.CharField(max_length=30, choices=Reason.choices)
+    # The direction, vote count or wallet prefix shared by the flagged votes
+    detail = models.CharField(max_length=100)
+    window_votes = models.PositiveIntegerField(default=0)
+    flagged_votes = models.PositiveIntegerField(default=0)
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.PENDING)
+    reviewed_by = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name='reviewed_voting_windows'
+    )
+    reviewed_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        """Meta options for the SuspiciousVotingWindow model."""
+        
+        ordering = ['-window_start']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['proposal', 'window_start', 'reason', 'detail'], name='unique_suspicious_window'
+            )
+        ]
+    
+    def __str__(self):
+        """Return a string representation of the window."""
+        return f"{self.get_reason_display()} on proposal {self.proposal_id} at {self.window_start}"
+    
+    def review(self, reviewer, confirmed):
+        """Record a reviewer's decision."""
+        self.status = self.Status.CONFIRMED if confirmed else self.Status.DISMISSED
+        self.reviewed_by = reviewer
+        self.reviewed_at = timezone.now()
+        self.save()
 
 
 class VerificationRequest(models.Model):
@@ -345,4 +1124,43 @@ class CircuitBreaker(models.Model):
         self.is_active = False
         self.deactivation_time = timezone.now()
         self.deactivated_by = user
-        self.save() 
\ No newline at end of file
+        self.save()
+
+
+BalanceChange = namedtuple(
+    'BalanceChange',
+    ['holder_id', 'old_balance', 'new_balance', 'was_locked', 'is_locked'],
+    defaults=(False, False)
+)
+
+
+def record_balance_changes(changes, timestamp=None):
+    """Record governance token balance and lock changes.
+    
+    Every code path that changes ``GovernanceToken.balance`` or
+    ``is_locked`` reports the change here, in the same transaction, so the
+    per-holder checkpoint history and the maintained supply totals stay
+    complete. Balance moves are also sent as ``balances_changed`` so other
+    apps can maintain their own aggregates.
+    """
+    timestamp = timestamp or timezone.now()
+    checkpoints = []
+    supply_delta = 0
+    locked_delta = 0
+    for change in changes:
+        if change.old_balance != change.new_balance:
+            checkpoints.append(TokenCheckpoint(
+                holder_id=change.holder_id, balance=change.new_balance, timestamp=timestamp
+            ))
+        supply_delta += change.new_balance - change.old_balance
+        locked_delta += (
+            (change.new_balance if change.is_locked else 0)
+            - (change.old_balance if change.was_locked else 0)
+        )
+    
+    TokenCheckpoint.objects.bulk_create(checkpoints, batch_size=1000)
+    TokenSupply.apply_delta(supply_delta, locked_delta)
+    
+    moved = [change for change in changes if change.old_balance != change.new_balance]
+    if moved:
+        balances_changed.send(sender=GovernanceToken, changes=moved)
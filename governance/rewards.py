@@ -0,0 +1,189 @@
+"""
+Participation rewards for the governance app.
+
+A member's participation rate for a period is the share of the proposals
+whose voting ended in that period that they voted on. Rates for every holder
+come from a single aggregate over ``Vote``, grouped by voter. The same pass
+counts the previous period as well, which feeds the loyalty multiplier.
+Payouts are stored on a RewardDistribution before any balance changes, then
+credited in chunks. Each chunk commits the token balances together with the
+payouts' ``credited_at``, so the job can be re-run after a failure without
+paying anyone twice.
+"""
+
+import datetime
+import re
+from decimal import Decimal, ROUND_DOWN
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from .models import (
+    Proposal, Vote, GovernanceToken, RewardDistribution, RewardPayout,
+    BalanceChange, record_balance_changes
+)
+
+# Proposals whose voting has concluded
+FINISHED_STATUSES = [
+    Proposal.Status.APPROVED, Proposal.Status.QUEUED,
+    Proposal.Status.EXECUTED, Proposal.Status.REJECTED
+]
+
+RATE_PLACES = Decimal('0.0001')
+
+
+def quarter_bounds(label):
+    """Return the (start, end) datetimes of a quarter such as ``2024Q1``."""
+    match = re.fullmatch(r'(\d{4})-?Q([1-4])', label.strip().upper())
+    if match is None:
+        raise ValueError(f"Invalid quarter {label!r}; expected e.g. 2024Q1.")
+    
+    year, quarter = int(match.group(1)), int(match.group(2))
+    start = datetime.datetime(year, 3 * quarter - 2, 1, tzinfo=datetime.timezone.utc)
+    if quarter == 4:
+        end = datetime.datetime(year + 1, 1, 1, tzinfo=datetime.timezone.utc)
+    else:
+        end = datetime.datetime(year, 3 * quarter + 1, 1, tzinfo=datetime.timezone.utc)
+    return start, end
+
+
+def previous_quarter_bounds(period_start):
+    """Return the (start, end) datetimes of the quarter before the one holding ``period_start``."""
+    quarter = (period_start.month - 1) // 3 + 1
+    if quarter == 1:
+        return quarter_bounds(f'{period_start.year - 1}Q4')
+    return quarter_bounds(f'{period_start.year}Q{quarter - 1}')
+
+
+def calculate_payouts(period_start, period_end, reward_amount=None):
+    """Return ``(proposal_count, payouts)`` for a period without saving anything.
+    
+    ``payouts`` are unsaved RewardPayout instances, ordered by holder, for
+    every token holder who voted at least once in the period.
+    """
+    reward_amount = settings.PARTICIPATION_REWARD_AMOUNT if reward_amount is None else reward_amount
+    # Quarters run 90 to 92 days, so the previous one is looked up, not subtracted
+    previous_start = previous_quarter_bounds(period_start)[0]
+    in_period = Q(proposal__voting_end_time__gte=period_start)
+    in_previous = Q(proposal__voting_end_time__lt=period_start)
+    
+    proposals = Proposal.objects.filter(
+        status__in=FINISHED_STATUSES,
+        voting_end_time__gte=previous_start, voting_end_time__lt=period_end
+    )
+    counts = proposals.aggregate(
+        current=Count('pk', filter=Q(voting_end_time__gte=period_start)),
+        previous=Count('pk', filter=Q(voting_end_time__lt=period_start))
+    )
+    if not counts['current']:
+        return 0, []
+    
+    # One grouped pass over the votes of both periods; (proposal, voter) is unique
+    rows = Vote.objects.filter(
+        proposal__status__in=FINISHED_STATUSES,
+        proposal__voting_end_time__gte=previous_start,
+        proposal__voting_end_time__lt=period_end,
+        voter__governance_tokens__isnull=False
+    ).values('voter_id').annotate(
+        current=Count('pk', filter=in_period),
+        previous=Count('pk', filter=in_previous)
+    ).filter(current__gt=0).order_by('voter_id').values_list('voter_id', 'current', 'previous')
+    
+    threshold = Decimal(settings.PARTICIPATION_LOYALTY_THRESHOLD) / 100
+    loyalty = Decimal(settings.PARTICIPATION_LOYALTY_MULTIPLIER)
+    both_periods = counts['current'] + counts['previous']
+    
+    payouts = []
+    for holder_id, current, previous in rows.iterator(chunk_size=10000):
+        rate = Decimal(current) / counts['current']
+        multiplier = Decimal(1)
+        # Loyalty needs votes in both periods and a high average across them
+        if previous and Decimal(current + previous) / both_periods >= threshold:
+            multiplier = loyalty
+        payouts.append(RewardPayout(
+            holder_id=holder_id,
+            votes_cast=current,
+            participation_rate=rate.quantize(RATE_PLACES, rounding=ROUND_DOWN),
+            multiplier=multiplier,
+            amount=int((reward_amount * rate * multiplier).to_integral_value(rounding=ROUND_DOWN))
+        ))
+    return counts['current'], payouts
+
+
+def prepare_distribution(period_start, period_end, reward_amount=None, batch_size=1000):
+    """Return the period's RewardDistribution, calculating and storing it once."""
+    distribution = RewardDistribution.objects.filter(
+        period_start=period_start, period_end=period_end
+    ).first()
+    if distribution is not None:
+        return distribution
+    
+    reward_amount = settings.PARTICIPATION_REWARD_AMOUNT if reward_amount is None else reward_amount
+    proposal_count, payouts = calculate_payouts(period_start, period_end, reward_amount)
+    try:
+        with transaction.atomic():
+            distribution = RewardDistribution.objects.create(
+                period_start=period_start, period_end=period_end,
+                proposal_count=proposal_count, reward_amount=reward_amount
+            )
+            for payout in payouts:
+                payout.distribution = distribution
+            RewardPayout.objects.bulk_create(
+                [payout for payout in payouts if payout.amount], batch_size=batch_size
+            )
+    except IntegrityError:
+        # Another run stored this period first
+        return RewardDistribution.objects.get(period_start=period_start, period_end=period_end)
+    return distribution
+
+
+def credit_distribution(distribution, batch_size=1000):
+    """Credit every payout not yet credited and return the tokens credited.
+    
+    Each chunk locks its holders' tokens, applies the rewards with one
+    ``bulk_update`` and marks the payouts credited in the same transaction.
+    """
+    pending = distribution.payouts.filter(credited_at__isnull=True).order_by('holder_id')
+    credited = 0
+    while True:
+        with transaction.atomic():
+            chunk = list(
+                pending.select_for_update().values_list('pk', 'holder_id', 'amount')[:batch_size]
+            )
+            if not chunk:
+                break
+            
+            amounts = {holder_id: amount for _, holder_id, amount in chunk}
+            tokens = list(GovernanceToken.objects.select_for_update().filter(holder_id__in=amounts))
+            changes = []
+            for token in tokens:
+                changes.append(BalanceChange(
+                    token.holder_id, token.balance, token.balance + amounts[token.holder_id],
+                    token.is_locked, token.is_locked
+                ))
+                token.balance += amounts[token.holder_id]
+            GovernanceToken.objects.bulk_update(tokens, ['balance'], batch_size=batch_size)
+            record_balance_changes(changes)
+            RewardPayout.objects.filter(pk__in=[pk for pk, _, _ in chunk]).update(
+                credited_at=timezone.now()
+            )
+            credited += sum(change.new_balance - change.old_balance for change in changes)
+    
+    total = distribution.payouts.filter(credited_at__isnull=False).aggregate(total=Sum('amount'))
+    RewardDistribution.objects.filter(pk=distribution.pk).update(
+        status=RewardDistribution.Status.COMPLETED,
+        total_rewarded=total['total'] or 0,
+        completed_at=timezone.now()
+    )
+    distribution.refresh_from_db()
+    return credited
+
+
+def distribute_rewards(period_start, period_end, reward_amount=None, batch_size=1000):
+    """Calculate, store and credit a period's rewards; safe to re-run."""
+    distribution = prepare_distribution(period_start, period_end, reward_amount, batch_size)
+    if distribution.status != RewardDistribution.Status.COMPLETED:
+        credit_distribution(distribution, batch_size)
+    return distribution
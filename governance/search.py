@@ -0,0 +1,272 @@
+"""
+Full-text search index for proposals and comments.
+
+Proposal titles, descriptions and rationales and comment bodies are kept in
+a maintained inverted index: a SQLite FTS5 table, or a weighted ``tsvector``
+column with a GIN index on PostgreSQL. Documents are re-indexed by the
+model ``save`` overrides in the same transaction as the change.
+"""
+
+import html
+import re
+from collections import namedtuple
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import Case, IntegerField, When
+from rest_framework import filters
+
+SEARCH_TABLE = 'governance_search'
+
+PROPOSAL = 'proposal'
+COMMENT = 'comment'
+KINDS = (PROPOSAL, COMMENT)
+
+# Highlight markers that cannot occur in text, swapped for <mark> after escaping
+_START, _STOP = '\x02', '\x03'
+
+SearchResult = namedtuple(
+    'SearchResult', ['kind', 'object_id', 'proposal_id', 'rank', 'title', 'snippet']
+)
+
+
+def _highlight(text):
+    """Escape indexed text and turn the backend's markers into <mark> tags."""
+    text = html.escape(text or '')
+    return text.replace(_START, '<mark>').replace(_STOP, '</mark>')
+
+
+class SQLiteSearchBackend:
+    """Search backend using an SQLite FTS5 virtual table.
+    
+    The FTS rowid is derived from the document kind and primary key, so a
+    re-index replaces a single row by rowid.
+    """
+    
+    def create(self, cursor):
+        """Create the FTS5 table if it does not exist."""
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5("
+            "kind UNINDEXED, object_id UNINDEXED, proposal_id UNINDEXED, title, body, "
+            "tokenize='porter unicode61')"
+        )
+    
+    @staticmethod
+    def _rowid(kind, object_id):
+        """Return the FTS rowid of a document."""
+        return object_id * len(KINDS) + KINDS.index(kind)
+    
+    def index(self, cursor, documents):
+        """Insert or replace (kind, object_id, proposal_id, title, body) documents."""
+        documents = list(documents)
+        self.remove(cursor, [(kind, object_id) for kind, object_id, *_ in documents])
+        cursor.executemany(
+            f"INSERT INTO {SEARCH_TABLE} (rowid, kind, object_id, proposal_id, title, body) "
+            "VALUES (%s, %s, %s, %s, %s, %s)",
+            [(self._rowid(kind, object_id), kind, object_id, *rest) for kind, object_id, *rest in documents]
+        )
+    
+    def remove(self, cursor, keys):
+        """Remove documents by (kind, object_id)."""
+        cursor.executemany(
+            f"DELETE FROM {SEARCH_TABLE} WHERE rowid = %s",
+            [(self._rowid(kind, object_id),) for kind, object_id in keys]
+        )
+    
+    def remove_proposal(self, cursor, proposal_id):
+        """Remove a proposal's document and those of its comments."""
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE proposal_id = %s", [proposal_id])
+    
+    def clear(self, cursor):
+        """Remove every document."""
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE}")
+    
+    @staticmethod
+    def _match_expression(query):
+        """Quote each search term so user input cannot inject FTS5 syntax."""
+        terms = re.findall(r'\w+', query)
+        return ' '.join(f'"{term}"' for term in terms)
+    
+    def search(self, cursor, query, kind=None, limit=50):
+        """Return ranked SearchResults, best match first."""
+        expression = self._match_expression(query)
+        if not expression:
+            return []
+        
+        sql = (
+            f"SELECT kind, object_id, proposal_id, -bm25({SEARCH_TABLE}, 0, 0, 0, 10.0, 1.0), "
+            f"highlight({SEARCH_TABLE}, 3, %s, %s), "
+            f"snippet({SEARCH_TABLE}, 4, %s, %s, '...', 24) "
+            f"FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s"
+        )
+        params = [_START, _STOP, _START, _STOP, expression]
+        if kind:
+            sql += " AND kind = %s"
+            params.append(kind)
+        sql += f" ORDER BY bm25({SEARCH_TABLE}, 0, 0, 0, 10.0, 1.0) LIMIT %s"
+        params.append(limit)
+        
+        cursor.execute(sql, params)
+        return [SearchResult(*row) for row in cursor.fetchall()]
+
+
+class PostgresSearchBackend:
+    """Search backend using a weighted tsvector column with a GIN index."""
+    
+    def create(self, cursor):
+        """Create the document table and its indexes if they do not exist."""
+        config = settings.SEARCH_TEXT_CONFIG
+        cursor.execute(
+            f"CREATE TABLE IF NOT EXISTS {SEARCH_TABLE} ("
+            "kind varchar(16) NOT NULL, object_id bigint NOT NULL, proposal_id bigint NOT NULL, "
+            "title text NOT NULL, body text NOT NULL, "
+            f"document tsvector GENERATED ALWAYS AS ("
+            f"setweight(to_tsvector('{config}', title), 'A') || "
+            f"setweight(to_tsvector('{config}', body), 'B')) STORED, "
+            "PRIMARY KEY (kind, object_id))"
+        )
+        cursor.execute(
+            f"CREATE INDEX IF NOT EXISTS {SEARCH_TABLE}_document ON {SEARCH_TABLE} USING GIN (document)"
+        )
+        cursor.execute(
+            f"CREATE INDEX IF NOT EXISTS {SEARCH_TABLE}_proposal ON {SEARCH_TABLE} (proposal_id)"
+        )
+    
+    def index(self, cursor, documents):
+        """Upsert (kind, object_id, proposal_id, title, body) documents."""
+        cursor.executemany(
+            f"INSERT INTO {SEARCH_TABLE} (kind, object_id, proposal_id, title, body) "
+            "VALUES (%s, %s, %s, %s, %s) ON CONFLICT (kind, object_id) DO UPDATE SET "
+            "proposal_id = EXCLUDED.proposal_id, title = EXCLUDED.title, body = EXCLUDED.body",
+            list(documents)
+        )
+    
+    def remove(self, cursor, keys):
+        """Remove documents by (kind, object_id)."""
+        cursor.executemany(
+            f"DELETE FROM {SEARCH_TABLE} WHERE kind = %s AND object_id = %s", list(keys)
+        )
+    
+    def remove_proposal(self, cursor, proposal_id):
+        """Remove a proposal's document and those of its comments."""
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE proposal_id = %s", [proposal_id])
+    
+    def clear(self, cursor):
+        """Remove every document."""
+        cursor.execute(f"TRUNCATE {SEARCH_TABLE}")
+    
+    def search(self, cursor, query, kind=None, limit=50):
+        """Return ranked SearchResults, best match first."""
+        config = settings.SEARCH_TEXT_CONFIG
+        options = f'StartSel={_START}, StopSel={_STOP}'
+        sql = (
+            "SELECT kind, object_id, proposal_id, ts_rank_cd(document, query), "
+            f"ts_headline('{config}', title, query, %s), "
+            f"ts_headline('{config}', body, query, %s) "
+            f"FROM {SEARCH_TABLE}, websearch_to_tsquery('{config}', %s) query "
+            "WHERE document @@ query"
+        )
+        params = [options + ', HighlightAll=true', options + ', MaxFragments=2', query]
+        if kind:
+            sql += " AND kind = %s"
+            params.append(kind)
+        sql += " ORDER BY 4 DESC LIMIT %s"
+        params.append(limit)
+        
+        cursor.execute(sql, params)
+        return [SearchResult(*row) for row in cursor.fetchall()]
+
+
+BACKENDS = {
+    'sqlite': SQLiteSearchBackend(),
+    'postgresql': PostgresSearchBackend(),
+}
+
+
+def get_backend(using=DEFAULT_DB_ALIAS):
+    """Return the search backend for a database, or None if it has none."""
+    return BACKENDS.get(connections[using].vendor)
+
+
+def create_search_index(using=DEFAULT_DB_ALIAS, **kwargs):
+    """Create the search index table; connected to ``post_migrate``."""
+    backend = get_backend(using)
+    if backend is not None:
+        with connections[using].cursor() as cursor:
+            backend.create(cursor)
+
+
+def proposal_document(proposal):
+    """Return the index document of a proposal."""
+    body = '\n\n'.join(part for part in (proposal.description, proposal.rationale) if part)
+    return (PROPOSAL, proposal.pk, proposal.pk, proposal.title or '', body)
+
+
+def comment_document(comment):
+    """Return the index document of a comment."""
+    return (COMMENT, comment.pk, comment.proposal_id, '', comment.content or '')
+
+
+def index_documents(documents, using=DEFAULT_DB_ALIAS):
+    """Add or replace documents in the search index."""
+    backend = get_backend(using)
+    if backend is not None:
+        with connections[using].cursor() as cursor:
+            backend.index(cursor, documents)
+
+
+def remove_document(kind, object_id, using=DEFAULT_DB_ALIAS):
+    """Remove a single document from the search index."""
+    backend = get_backend(using)
+    if backend is not None:
+        with connections[using].cursor() as cursor:
+            if kind == PROPOSAL:
+                backend.remove_proposal(cursor, object_id)
+            else:
+                backend.remove(cursor, [(kind, object_id)])
+
+
+def search(query, kind=None, limit=None, using=DEFAULT_DB_ALIAS):
+    """Return ranked, highlighted SearchResults for a query."""
+    backend = get_backend(using)
+    if backend is None:
+        return []
+    
+    with connections[using].cursor() as cursor:
+        results = backend.search(cursor, query, kind, limit or settings.SEARCH_MAX_RESULTS)
+    return [
+        result._replace(title=_highlight(result.title), snippet=_highlight(result.snippet))
+        for result in results
+    ]
+
+
+class FullTextSearchFilter(filters.SearchFilter):
+    """Filter backend that answers ``?search=`` from the full-text index.
+    
+    Views set ``search_kind`` to the indexed document kind. Results are
+    ordered by rank unless an explicit ``?ordering=`` is given; databases
+    without a search backend fall back to the ``icontains`` search. At most
+    ``SEARCH_MAX_RESULTS`` documents match; ``request.search_truncated``
+    records whether more did, for the paginator to report.
+    """
+    
+    def filter_queryset(self, request, queryset, view):
+        """Restrict the queryset to matching documents, best match first."""
+        query = request.query_params.get(self.search_param, '').strip()
+        kind = getattr(view, 'search_kind', None)
+        if not query or kind is None or get_backend(queryset.db) is None:
+            return super().filter_queryset(request, queryset, view)
+        
+        limit = settings.SEARCH_MAX_RESULTS
+        ids = [result.object_id for result in search(query, kind, limit + 1, using=queryset.db)]
+        request.search_truncated = len(ids) > limit
+        ids = ids[:limit]
+        queryset = queryset.filter(pk__in=ids)
+        if not ids or request.query_params.get('ordering'):
+            return queryset
+        
+        rank = Case(
+            *[When(pk=object_id, then=position) for position, object_id in enumerate(ids)],
+            output_field=IntegerField()
+        )
+        return queryset.order_by(rank)
@@ -3,11 +3,14 @@ Serializers for the governance app.
 """
 
 from rest_framework import serializers
+from django.conf import settings
 from django.contrib.auth.models import User
 from .models import (
     Proposal, Vote, ProposalComment, GovernanceToken, 
-    Guardian, Member, VerificationRequest, CircuitBreaker
+    Guardian, Member, VerificationRequest, CircuitBreaker, EffectiveVotingPower,
+    SuspiciousVotingWindow, CommitteeSelection
 )
+from .services import cast_vote
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -20,12 +23,35 @@ class UserSerializer(serializers.ModelSerializer):
         fields = ['id', 'username', 'email', 'first_name', 'last_name']
 
 
-class ProposalSerializer(serializers.ModelSerializer):
-    """Serializer for Proposal model."""
+class ProposalSummarySerializer(serializers.ModelSerializer):
+    """Serializer for Proposal lists, without the long text bodies."""
     
     proposer = UserSerializer(read_only=True)
     status_display = serializers.CharField(source='get_status_display', read_only=True)
     
+    class Meta:
+        """Meta options for the ProposalSummarySerializer."""
+        
+        model = Proposal
+        fields = [
+            'id', 'title', 'proposer', 'status', 'status_display', 'created_at',
+            'updated_at', 'discussion_start_time', 'voting_start_time',
+            'voting_end_time', 'execution_time', 'content_document_id',
+            'total_votes_for', 'total_votes_against', 'total_voting_power'
+        ]
+        read_only_fields = fields
+    
+    def to_representation(self, instance):
+        """Include sharded vote counts that have not been merged yet."""
+        data = super().to_representation(instance)
+        data['total_votes_for'] += getattr(instance, 'pending_votes_for', 0)
+        data['total_votes_against'] += getattr(instance, 'pending_votes_against', 0)
+        return data
+
+
+class ProposalSerializer(ProposalSummarySerializer):
+    """Serializer for Proposal model."""
+    
     class Meta:
         """Meta options for the ProposalSerializer."""
         
@@ -40,8 +66,8 @@ class ProposalSerializer(serializers.ModelSerializer):
         read_only_fields = [
             'proposer', 'status', 'created_at', 'updated_at',
             'discussion_start_time', 'voting_start_time', 'voting_end_time',
-            'execution_time', 'total_votes_for', 'total_votes_against',
-            'total_voting_power'
+            'execution_time', 'content_document_id', 'total_votes_for',
+            'total_votes_against', 'total_voting_power'
         ]
 
 
@@ -62,48 +88,56 @@ class VoteSerializer(serializers.ModelSerializer):
     
     def validate(self, data):
         """Validate the vote data."""
-        user = self.context['request'].user
-        proposal = data['proposal']
+        if self.instance is not None:
+            raise serializers.ValidationError("Votes cannot be changed once cast.")
         
-        # Check if proposal is in voting phase
-        if proposal.status != Proposal.Status.VOTING:
+        # Check if proposal is in voting phase; balance checks happen under lock in cast_vote
+        if data['proposal'].status != Proposal.Status.VOTING:
             raise serializers.ValidationError("This proposal is not in the voting phase.")
         
-        # Check if user has already voted
-        if Vote.objects.filter(proposal=proposal, voter=user).exists():
-            raise serializers.ValidationError("You have already voted on this proposal.")
-        
-        # Check if user has enough voting power
-        governance_token = GovernanceToken.objects.filter(holder=user).first()
-        if not governance_token:
-            raise serializers.ValidationError("You don't have any governance tokens.")
-        
-        vote_cost = Vote.calculate_vote_cost(data['vote_count'])
-        if vote_cost > governance_token.balance:
-            raise serializers.ValidationError(
-                f"You don't have enough voting power. Required: {vote_cost}, Available: {governance_token.balance}"
-            )
-        
-        # Check if vote exceeds maximum voting power percentage
-        from django.conf import settings
-        max_voting_power = proposal.total_voting_power * settings.MAX_VOTING_POWER_PERCENTAGE / 100
-        if data['vote_count'] > max_voting_power:
-            raise serializers.ValidationError(
-                f"Your vote exceeds the maximum allowed voting power ({settings.MAX_VOTING_POWER_PERCENTAGE}%)."
-            )
-        
         return data
     
     def create(self, validated_data):
-        """Create a new vote."""
-        user = self.context['request'].user
-        validated_data['voter'] = user
-        
-        # Lock tokens after voting
-        governance_token = GovernanceToken.objects.get(holder=user)
-        governance_token.lock_for_voting()
-        
-        return super().create(validated_data)
+        """Create a new vote, charging and locking the voter's tokens."""
+        return cast_vote(
+            voter=validated_data.get('voter', self.context['request'].user),
+            proposal=validated_data['proposal'],
+            vote_count=validated_data['vote_count'],
+            is_for=validated_data.get('is_for', True)
+        )
+
+
+class BatchVoteItemSerializer(serializers.Serializer):
+    """Serializer for a single vote in a relayed batch."""
+    
+    proposal = serializers.IntegerField(min_value=1)
+    voter = serializers.IntegerField(min_value=1)
+    vote_count = serializers.IntegerField(min_value=1)
+    is_for = serializers.BooleanField(default=True)
+
+
+class BatchVoteSerializer(serializers.Serializer):
+    """Serializer for relayed vote batches."""
+    
+    votes = serializers.ListField(child=serializers.DictField(), allow_empty=False)
+    
+    def validate_votes(self, value):
+        """Limit the batch size."""
+        max_size = getattr(settings, 'VOTE_BATCH_MAX_SIZE', 5000)
+        if len(value) > max_size:
+            raise serializers.ValidationError(f"A batch may contain at most {max_size} votes.")
+        return value
+
+
+class SearchResultSerializer(serializers.Serializer):
+    """Serializer for full-text search results."""
+    
+    type = serializers.CharField(source='kind')
+    id = serializers.IntegerField(source='object_id')
+    proposal = serializers.IntegerField(source='proposal_id')
+    rank = serializers.FloatField()
+    title = serializers.CharField()
+    snippet = serializers.CharField()
 
 
 class ProposalCommentSerializer(serializers.ModelSerializer):
@@ -140,6 +174,17 @@ class GovernanceTokenSerializer(serializers.ModelSerializer):
         read_only_fields = ['holder', 'locked_until', 'is_locked']
 
 
+class EffectiveVotingPowerSerializer(serializers.ModelSerializer):
+    """Serializer for EffectiveVotingPower model."""
+    
+    class Meta:
+        """Meta options for the EffectiveVotingPowerSerializer."""
+        
+        model = EffectiveVotingPower
+        fields = ['holder', 'delegated_power', 'effective_power', 'updated_at']
+        read_only_fields = fields
+
+
 class GuardianSerializer(serializers.ModelSerializer):
     """Serializer for Guardian model."""
     
@@ -165,9 +210,9 @@ class MemberSerializer(serializers.ModelSerializer):
         model = Member
         fields = [
             'id', 'user', 'wallet_address', 'verification_status',
-            'verification_status_display', 'join_date', 'reputation_score'
+            'verification_status_display', 'join_date', 'verified_at', 'reputation_score'
         ]
-        read_only_fields = ['user', 'verification_status', 'join_date']
+        read_only_fields = ['user', 'verification_status', 'join_date', 'verified_at']
 
 
 class VerificationRequestSerializer(serializers.ModelSerializer):
@@ -189,6 +234,50 @@ class VerificationRequestSerializer(serializers.ModelSerializer):
         read_only_fields = ['user', 'status', 'rejection_reason', 'created_at', 'updated_at']
 
 
+class SuspiciousVotingWindowSerializer(serializers.ModelSerializer):
+    """Serializer for SuspiciousVotingWindow model."""
+    
+    reason_display = serializers.CharField(source='get_reason_display', read_only=True)
+    reviewed_by = UserSerializer(read_only=True)
+    
+    class Meta:
+        """Meta options for the SuspiciousVotingWindowSerializer."""
+        
+        model = SuspiciousVotingWindow
+        fields = [
+            'id', 'proposal', 'window_start', 'window_end', 'reason', 'reason_display',
+            'detail', 'window_votes', 'flagged_votes', 'status', 'reviewed_by',
+            'reviewed_at', 'created_at', 'updated_at'
+        ]
+        read_only_fields = fields
+
+
+class CommitteeSelectionSerializer(serializers.ModelSerializer):
+    """Serializer for CommitteeSelection model."""
+    
+    selected_by = UserSerializer(read_only=True)
+    
+    class Meta:
+        """Meta options for the CommitteeSelectionSerializer."""
+        
+        model = CommitteeSelection
+        fields = [
+            'id', 'seed', 'committee_size', 'top_percentage', 'weighted', 'holder_count',
+            'cutoff_balance', 'eligible_count', 'eligible_digest', 'members',
+            'selected_by', 'created_at'
+        ]
+        read_only_fields = fields
+
+
+class CommitteeDrawSerializer(serializers.Serializer):
+    """Serializer for the parameters of a committee draw."""
+    
+    committee_size = serializers.IntegerField(min_value=1, required=False)
+    top_percentage = serializers.IntegerField(min_value=1, max_value=100, required=False)
+    seed = serializers.CharField(max_length=64, required=False)
+    weighted = serializers.BooleanField(default=False)
+
+
 class CircuitBreakerSerializer(serializers.ModelSerializer):
     """Serializer for CircuitBreaker model."""
     
@@ -0,0 +1,202 @@
+"""
+Services for the governance app.
+"""
+
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from rest_framework import serializers
+
+from .models import (
+    Proposal, Vote, GovernanceToken, TokenCheckpoint,
+    BalanceChange, record_balance_changes
+)
+
+
+def check_vote_rules(proposal, balance, vote_count, now=None):
+    """Return the reason a vote may not be cast, or None if it is allowed."""
+    now = now or timezone.now()
+    
+    # Check if proposal is in voting phase
+    if proposal.status != Proposal.Status.VOTING:
+        return "This proposal is not in the voting phase."
+    
+    # Check if voting period has ended
+    if proposal.voting_end_time and now > proposal.voting_end_time:
+        return "Voting period has ended."
+    
+    # Check if user has enough tokens
+    vote_cost = Vote.calculate_vote_cost(vote_count)
+    if vote_cost > balance:
+        return f"Not enough tokens. Cost: {vote_cost}, Balance: {balance}"
+    
+    # Check maximum voting power limit
+    max_power_percentage = getattr(settings, 'MAX_VOTING_POWER_PERCENTAGE', 0.25)
+    if vote_count > proposal.total_voting_power * max_power_percentage:
+        return f"Exceeds maximum voting power limit of {max_power_percentage * 100}%"
+    
+    return None
+
+
+def available_balance(proposal, token, snapshot_balance=None):
+    """Return the credits a holder may spend on a proposal.
+    
+    Voting power is fixed at the holder's balance when voting started, so
+    tokens acquired later cannot be used on the proposal; credits already
+    spent elsewhere since then cannot be spent twice either.
+    """
+    if proposal.voting_start_time is None:
+        return token.balance
+    if snapshot_balance is None:
+        snapshot_balance = TokenCheckpoint.balance_at(token.holder_id, proposal.voting_start_time)
+    return min(snapshot_balance, token.balance)
+
+
+def cast_vote(voter, proposal, vote_count, is_for=True, lock_days=30):
+    """Cast a single vote, charging and locking the voter's tokens.
+    
+    The voter's token row is locked for the duration of the transaction, so
+    concurrent votes from the same member are serialized and the balance and
+    duplicate checks cannot race. Raises ``serializers.ValidationError`` when
+    a voting rule is violated.
+    """
+    now = timezone.now()
+    
+    with transaction.atomic():
+        token = GovernanceToken.objects.select_for_update().filter(holder=voter).first()
+        if token is None:
+            raise serializers.ValidationError("You don't have any governance tokens.")
+        
+        if Vote.objects.filter(proposal=proposal, voter=voter).exists():
+            raise serializers.ValidationError("You have already voted on this proposal.")
+        
+        error = check_vote_rules(proposal, available_balance(proposal, token), vote_count, now)
+        if error:
+            raise serializers.ValidationError(error)
+        
+        # Deduct and lock in a single UPDATE
+        vote_cost = Vote.calculate_vote_cost(vote_count)
+        GovernanceToken.objects.filter(pk=token.pk).update(
+            balance=F('balance') - vote_cost,
+            locked_until=now + timezone.timedelta(days=lock_days),
+            is_locked=True
+        )
+        record_balance_changes([BalanceChange(
+            token.holder_id, token.balance, token.balance - vote_cost, token.is_locked, True
+        )], now)
+        
+        return Vote.objects.create(
+            proposal=proposal,
+            voter=voter,
+            vote_count=vote_count,
+            is_for=is_for
+        )
+
+
+def cast_votes_batch(items, lock_days=30):
+    """Cast many votes set-wise in a single transaction.
+    
+    ``items`` is a sequence of dicts with ``proposal``, ``voter``,
+    ``vote_count`` and ``is_for`` keys holding primary keys and values.
+    Returns one result dict per item, in order. Invalid items are reported
+    and skipped; valid items are all committed together.
+    """
+    now = timezone.now()
+    locked_until = now + timezone.timedelta(days=lock_days)
+    results = [None] * len(items)
+    
+    proposal_ids = {item['proposal'] for item in items}
+    voter_ids = {item['voter'] for item in items}
+    
+    with transaction.atomic():
+        proposals = Proposal.objects.in_bulk(proposal_ids)
+        tokens = {
+            token.holder_id: token
+            for token in GovernanceToken.objects.select_for_update().filter(
+                holder_id__in=voter_ids
+            )
+        }
+        original_state = {token.pk: (token.balance, token.is_locked) for token in tokens.values()}
+        snapshots = _snapshot_balances(items, proposals)
+        already_voted = set(
+            Vote.objects.filter(
+                proposal_id__in=proposal_ids, voter_id__in=voter_ids
+            ).values_list('proposal_id', 'voter_id').order_by()
+        )
+        
+        votes = []
+        vote_indexes = []
+        tally_deltas = defaultdict(lambda: [0, 0])
+        changed_tokens = {}
+        
+        for index, item in enumerate(items):
+            key = (item['proposal'], item['voter'])
+            proposal = proposals.get(item['proposal'])
+            token = tokens.get(item['voter'])
+            
+            if proposal is None:
+                error = "Proposal not found."
+            elif token is None:
+                error = "Voter doesn't have any governance tokens."
+            elif key in already_voted:
+                error = "Voter has already voted on this proposal."
+            else:
+                balance = available_balance(
+                    proposal, token, snapshots.get(item['proposal'], {}).get(item['voter'])
+                )
+                error = check_vote_rules(proposal, balance, item['vote_count'], now)
+            
+            if error:
+                results[index] = {'index': index, 'status': 'error', 'errors': [error]}
+                continue
+            
+            vote_cost = Vote.calculate_vote_cost(item['vote_count'])
+            token.balance -= vote_cost
+            token.locked_until = locked_until
+            token.is_locked = True
+            changed_tokens[token.pk] = token
+            already_voted.add(key)
+            
+            votes.append(Vote(
+                proposal_id=item['proposal'],
+                voter_id=item['voter'],
+                vote_count=item['vote_count'],
+                vote_cost=vote_cost,
+                is_for=item['is_for']
+            ))
+            vote_indexes.append(index)
+            tally_deltas[item['proposal']][0 if item['is_for'] else 1] += item['vote_count']
+        
+        GovernanceToken.objects.bulk_update(
+            changed_tokens.values(), ['balance', 'locked_until', 'is_locked'], batch_size=1000
+        )
+        changes = []
+        for token in changed_tokens.values():
+            old_balance, was_locked = original_state[token.pk]
+            changes.append(BalanceChange(token.holder_id, old_balance, token.balance, was_locked, True))
+        record_balance_changes(changes, now)
+        # bulk_create skips Vote.save, so tallies are applied once per proposal below
+        Vote.objects.bulk_create(votes, batch_size=1000)
+        for proposal_id, (votes_for, votes_against) in tally_deltas.items():
+            Proposal.apply_tally_delta(proposal_id, votes_for, votes_against)
+    
+    for index, vote in zip(vote_indexes, votes):
+        results[index] = {'index': index, 'status': 'created', 'id': vote.pk}
+    return results
+
+
+def _snapshot_balances(items, proposals):
+    """Return ``{proposal_id: {voter_id: balance}}`` at each proposal's voting start."""
+    voters_by_proposal = defaultdict(set)
+    for item in items:
+        proposal = proposals.get(item['proposal'])
+        if proposal is not None and proposal.voting_start_time is not None:
+            voters_by_proposal[proposal.pk].add(item['voter'])
+    
+    return {
+        proposal_id: TokenCheckpoint.balances_at(voter_ids, proposals[proposal_id].voting_start_time)
+        for proposal_id, voter_ids in voters_by_proposal.items()
+    }
@@ -0,0 +1,9 @@
+"""
+Signals for the governance app.
+"""
+
+from django.dispatch import Signal
+
+# Sent by record_balance_changes, inside the transaction, with the
+# BalanceChanges whose balance moved as ``changes``
+balances_changed = Signal()
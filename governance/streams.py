@@ -0,0 +1,241 @@
+"""
+Live vote tally streams for the governance app.
+
+Vote tally deltas are published once per committed transaction to a
+broadcast backend. Each ASGI process holds a single backend subscription
+and fans the deltas out to its connected Server-Sent Events clients, so the
+number of watchers does not change the number of database queries. Clients
+also receive a periodic snapshot, shared by every watcher of a proposal in
+the process, which corrects any delta that raced their initial read.
+"""
+
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+
+import redis
+import redis.asyncio
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_PREFIX = 'governance:tally:'
+
+
+def channel_name(proposal_id):
+    """Return the broadcast channel carrying a proposal's tally deltas."""
+    return f'{CHANNEL_PREFIX}{proposal_id}'
+
+
+def format_event(event, data):
+    """Format a Server-Sent Events message."""
+    if not isinstance(data, str):
+        data = json.dumps(data)
+    return f'event: {event}\ndata: {data}\n\n'
+
+
+class InMemoryBroadcastBackend:
+    """Broadcast backend that only reaches listeners in the current process."""
+    
+    def __init__(self, **options):
+        """Initialize the listener registry."""
+        self._listeners = []
+        self._lock = threading.Lock()
+    
+    def publish(self, channel, message):
+        """Deliver a message to every listener's event loop."""
+        with self._lock:
+            listeners = list(self._listeners)
+        for loop, queue in listeners:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, (channel, message))
+            except RuntimeError:
+                # The listener's event loop has already been closed
+                pass
+    
+    async def listen(self):
+        """Yield (channel, message) pairs published after the first iteration."""
+        entry = (asyncio.get_running_loop(), asyncio.Queue())
+        with self._lock:
+            self._listeners.append(entry)
+        try:
+            while True:
+                yield await entry[1].get()
+        finally:
+            with self._lock:
+                self._listeners.remove(entry)
+
+
+class RedisBroadcastBackend:
+    """Broadcast backend using Redis pub/sub to reach every process."""
+    
+    def __init__(self, url=None, timeout=None, **options):
+        """Initialize the backend for the given Redis URL."""
+        self.url = url or settings.TALLY_STREAM_REDIS_URL
+        self.timeout = timeout if timeout is not None else settings.TALLY_STREAM_PUBLISH_TIMEOUT_SECONDS
+        self._client = None
+    
+    def publish(self, channel, message):
+        """Publish a message with a shared synchronous client.
+        
+        Publishes run in the voter's request, so the client gives up after
+        a short timeout rather than stalling it on an unreachable Redis.
+        """
+        if self._client is None:
+            self._client = redis.Redis.from_url(
+                self.url, socket_timeout=self.timeout, socket_connect_timeout=self.timeout
+            )
+        self._client.publish(channel, message)
+    
+    async def listen(self):
+        """Yield (channel, message) pairs from a pattern subscription."""
+        client = redis.asyncio.Redis.from_url(self.url)
+        pubsub = client.pubsub()
+        try:
+            await pubsub.psubscribe(f'{CHANNEL_PREFIX}*')
+            async for message in pubsub.listen():
+                if message['type'] == 'pmessage':
+                    yield message['channel'].decode(), message['data'].decode()
+        finally:
+            await pubsub.reset()
+            await client.close()
+
+
+def load_tally_snapshot(proposal_id):
+    """Return the live tallies of a proposal, or None if it does not exist."""
+    from .models import Proposal
+    
+    proposal = Proposal.objects.filter(pk=proposal_id).first()
+    if proposal is None:
+        return None
+    
+    votes_for, votes_against = proposal.get_live_tallies()
+    return {
+        'proposal': proposal.pk,
+        'status': proposal.status,
+        'total_votes_for': votes_for,
+        'total_votes_against': votes_against,
+    }
+
+
+class TallyBroadcaster:
+    """Fan tally deltas out from one backend subscription to local subscribers."""
+    
+    def __init__(self, backend):
+        """Initialize the broadcaster around a backend."""
+        self.backend = backend
+        self._subscribers = defaultdict(set)
+        self._snapshots = {}
+        self._listener = None
+    
+    def publish(self, proposal_id, votes_for, votes_against):
+        """Publish a tally delta; failures are logged and never reach the voter."""
+        message = json.dumps({
+            'proposal': proposal_id, 'votes_for': votes_for, 'votes_against': votes_against
+        })
+        try:
+            self.backend.publish(channel_name(proposal_id), message)
+        except Exception:
+            logger.exception("Failed to publish tally delta for proposal %s", proposal_id)
+    
+    async def snapshot(self, proposal_id):
+        """Return the proposal's tallies, loaded at most once per interval.
+        
+        Concurrent callers share a single in-flight query.
+        """
+        entry = self._snapshots.get(proposal_id)
+        if (
+            entry is None
+            or entry[1].get_loop() is not asyncio.get_running_loop()
+            or time.monotonic() - entry[0] >= settings.TALLY_STREAM_SNAPSHOT_SECONDS
+        ):
+            loader = asyncio.ensure_future(sync_to_async(load_tally_snapshot)(proposal_id))
+            entry = (time.monotonic(), loader)
+            self._snapshots[proposal_id] = entry
+        try:
+            snapshot = await asyncio.shield(entry[1])
+        except Exception:
+            self._snapshots.pop(proposal_id, None)
+            raise
+        if snapshot is None:
+            self._snapshots.pop(proposal_id, None)
+        return snapshot
+    
+    async def stream(self, proposal_id):
+        """Yield Server-Sent Events for a proposal until the client disconnects."""
+        queue = asyncio.Queue(maxsize=settings.TALLY_STREAM_QUEUE_SIZE)
+        self._subscribers[proposal_id].add(queue)
+        self._ensure_listener()
+        # Let a newly started listener subscribe before the snapshot is read
+        await asyncio.sleep(0)
+        
+        try:
+            yield format_event('snapshot', await self.snapshot(proposal_id))
+            while True:
+                try:
+                    message = await asyncio.wait_for(
+                        queue.get(), timeout=settings.TALLY_STREAM_SNAPSHOT_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    yield format_event('snapshot', await self.snapshot(proposal_id))
+                else:
+                    yield format_event('delta', message)
+        finally:
+            self._unsubscribe(proposal_id, queue)
+    
+    def _ensure_listener(self):
+        """Start the backend listener in the running event loop if needed."""
+        loop = asyncio.get_running_loop()
+        if self._listener is not None and self._listener.get_loop() is not loop:
+            # Tasks cannot be shared across event loops
+            self._listener = None
+        if self._listener is None or self._listener.done():
+            self._listener = loop.create_task(self._listen())
+    
+    def _unsubscribe(self, proposal_id, queue):
+        """Remove a subscriber and stop listening once nobody is watching."""
+        subscribers = self._subscribers.get(proposal_id)
+        if subscribers is not None:
+            subscribers.discard(queue)
+            if not subscribers:
+                del self._subscribers[proposal_id]
+                self._snapshots.pop(proposal_id, None)
+        
+        if not self._subscribers and self._listener is not None:
+            self._listener.cancel()
+            self._listener = None
+    
+    async def _listen(self):
+        """Dispatch backend messages to the queues of local subscribers."""
+        async for channel, message in self.backend.listen():
+            proposal_id = int(channel[len(CHANNEL_PREFIX):])
+            for queue in list(self._subscribers.get(proposal_id, ())):
+                if queue.full():
+                    # Slow client: drop its oldest delta, the next snapshot resyncs it
+                    queue.get_nowait()
+                queue.put_nowait(message)
+
+
+_broadcaster = None
+
+
+def get_broadcaster():
+    """Return the process-wide broadcaster for the configured backend."""
+    global _broadcaster
+    if _broadcaster is None:
+        backend_class = import_string(settings.TALLY_STREAM_BACKEND)
+        _broadcaster = TallyBroadcaster(backend_class())
+    return _broadcaster
+
+
+def publish_tally_delta(proposal_id, votes_for, votes_against):
+    """Publish a tally delta once the current transaction commits."""
+    transaction.on_commit(
+        lambda: get_broadcaster().publish(proposal_id, votes_for, votes_against)
+    )
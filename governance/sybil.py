@@ -0,0 +1,220 @@
+"""
+Streaming detection of coordinated (Sybil) voting for the governance app.
+
+The detector reads votes after they are committed, in id order from a
+stored cursor, so casting a vote pays nothing for it. Votes are grouped into
+tumbling windows of ``SYBIL_WINDOW_SECONDS`` per proposal. Each open window
+keeps a few counters and two Misra-Gries summaries of at most
+``SYBIL_SUMMARY_SIZE`` entries: one over vote counts and one over wallet
+prefixes. Its memory therefore stays bounded however many votes it sees.
+Windows live in the cache until they expire, with the id of the last vote
+folded into them, so a batch that is rolled back and read again after its
+windows were cached is not counted twice. When a window crosses a threshold
+it is flagged to the SuspiciousVotingWindow review queue.
+"""
+
+import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Vote, VoteStreamCursor, SuspiciousVotingWindow
+
+CURSOR_NAME = 'sybil-detector'
+CACHE_PREFIX = 'governance:sybil:'
+
+Reason = SuspiciousVotingWindow.Reason
+
+
+class HeavyHitters:
+    """Misra-Gries summary keeping at most ``size`` counters.
+    
+    Any value seen more than ``n / (size + 1)`` times out of ``n`` is
+    guaranteed to keep a counter. Counts are underestimates by at most
+    that amount, which only ever delays a flag.
+    """
+    
+    def __init__(self, size, counters=None):
+        """Initialize the summary, optionally from stored counters."""
+        self.size = size
+        self.counters = dict(counters or {})
+    
+    def add(self, value):
+        """Count one occurrence of a value."""
+        if value in self.counters:
+            self.counters[value] += 1
+        elif len(self.counters) < self.size:
+            self.counters[value] = 1
+        else:
+            # Decrement every counter; those reaching zero free their slot
+            self.counters = {key: count - 1 for key, count in self.counters.items() if count > 1}
+    
+    def most_common(self):
+        """Return the (value, count) pair with the highest count, or None."""
+        if not self.counters:
+            return None
+        return max(self.counters.items(), key=lambda item: item[1])
+
+
+class VotingWindow:
+    """Rolling statistics of one proposal's votes within one window."""
+    
+    def __init__(self, proposal_id, start, state=None):
+        """Initialize the window, optionally from its cached state."""
+        state = state or {}
+        size = settings.SYBIL_SUMMARY_SIZE
+        self.proposal_id = proposal_id
+        self.start = start
+        self.votes = state.get('votes', 0)
+        self.last_vote_id = state.get('last_vote_id', 0)
+        self.fresh = state.get('fresh', {'FOR': 0, 'AGAINST': 0})
+        self.vote_counts = HeavyHitters(size, state.get('vote_counts'))
+        self.wallet_prefixes = HeavyHitters(size, state.get('wallet_prefixes'))
+    
+    @property
+    def end(self):
+        """Return the end of the window."""
+        return self.start + datetime.timedelta(seconds=settings.SYBIL_WINDOW_SECONDS)
+    
+    def state(self):
+        """Return the window's counters for the cache."""
+        return {
+            'votes': self.votes,
+            'last_vote_id': self.last_vote_id,
+            'fresh': self.fresh,
+            'vote_counts': self.vote_counts.counters,
+            'wallet_prefixes': self.wallet_prefixes.counters,
+        }
+    
+    def add(self, vote_id, is_for, vote_count, verified_at, wallet_address, created_at):
+        """Add a vote to the window's statistics, ignoring votes it already holds."""
+        if vote_id <= self.last_vote_id:
+            return
+        self.last_vote_id = vote_id
+        self.votes += 1
+        fresh_after = created_at - datetime.timedelta(days=settings.SYBIL_FRESH_MEMBER_DAYS)
+        if verified_at is not None and verified_at >= fresh_after:
+            self.fresh['FOR' if is_for else 'AGAINST'] += 1
+        # One vote is the cheapest quadratic vote, so identical ones are expected
+        if vote_count > 1:
+            self.vote_counts.add(vote_count)
+        prefix = wallet_prefix(wallet_address)
+        if prefix:
+            self.wallet_prefixes.add(prefix)
+    
+    def findings(self):
+        """Return (reason, detail, flagged votes) for every threshold crossed."""
+        minimum = settings.SYBIL_MIN_CLUSTER_VOTES
+        share = self.votes * settings.SYBIL_CLUSTER_SHARE
+        findings = []
+        
+        for direction, count in self.fresh.items():
+            if count >= minimum and count >= share:
+                findings.append((Reason.FRESH_MEMBER_BURST, direction, count))
+        
+        common = self.vote_counts.most_common()
+        if common and common[1] >= minimum and common[1] >= share:
+            findings.append((Reason.VOTE_COUNT_CLUSTER, str(common[0]), common[1]))
+        
+        # Shared random prefixes are rare, so no share of the window is required
+        common = self.wallet_prefixes.most_common()
+        if common and common[1] >= minimum:
+            findings.append((Reason.WALLET_PREFIX_CLUSTER, common[0], common[1]))
+        return findings
+
+
+def wallet_prefix(address):
+    """Return the leading characters of a wallet address after any 0x."""
+    address = (address or '').lower()
+    if address.startswith('0x'):
+        address = address[2:]
+    length = settings.SYBIL_WALLET_PREFIX_LENGTH
+    return address[:length] if len(address) >= length else ''
+
+
+def window_start(created_at):
+    """Return the start of the tumbling window containing a timestamp."""
+    seconds = settings.SYBIL_WINDOW_SECONDS
+    timestamp = int(created_at.timestamp())
+    return datetime.datetime.fromtimestamp(timestamp - timestamp % seconds, tz=datetime.timezone.utc)
+
+
+def _cache_key(proposal_id, start):
+    """Return the cache key of a window."""
+    return f'{CACHE_PREFIX}{proposal_id}:{int(start.timestamp())}'
+
+
+def process_votes(rows):
+    """Fold (vote, proposal, is_for, vote_count, created_at, verified_at, wallet) rows into windows.
+    
+    Rows must be in vote id order. Returns the number of findings newly
+    added to the review queue; findings already queued are only updated.
+    """
+    keys = {}
+    for _, proposal_id, _, _, created_at, _, _ in rows:
+        start = window_start(created_at)
+        keys[(proposal_id, start)] = _cache_key(proposal_id, start)
+    
+    cached = cache.get_many(keys.values())
+    windows = {
+        key: VotingWindow(key[0], key[1], cached.get(cache_key))
+        for key, cache_key in keys.items()
+    }
+    for vote_id, proposal_id, is_for, vote_count, created_at, verified_at, wallet_address in rows:
+        windows[(proposal_id, window_start(created_at))].add(
+            vote_id, is_for, vote_count, verified_at, wallet_address, created_at
+        )
+    
+    # Windows outlive their end by one window, for late-committing votes
+    cache.set_many(
+        {keys[key]: window.state() for key, window in windows.items()},
+        timeout=settings.SYBIL_WINDOW_SECONDS * 2 + settings.SYBIL_DETECTOR_LAG_SECONDS
+    )
+    
+    flagged = 0
+    for window in windows.values():
+        for reason, detail, count in window.findings():
+            _, created = SuspiciousVotingWindow.objects.update_or_create(
+                proposal_id=window.proposal_id, window_start=window.start,
+                reason=reason, detail=detail,
+                defaults={'window_end': window.end, 'window_votes': window.votes, 'flagged_votes': count}
+            )
+            flagged += created
+    return flagged
+
+
+def detect_coordinated_voting(batch_size=5000, now=None):
+    """Process every vote committed since the last run; return (votes, flags).
+    
+    Only votes older than ``SYBIL_DETECTOR_LAG_SECONDS`` are read, so a
+    transaction that took a lower id but committed later is not skipped.
+    """
+    now = now or timezone.now()
+    settled = now - datetime.timedelta(seconds=settings.SYBIL_DETECTOR_LAG_SECONDS)
+    VoteStreamCursor.objects.get_or_create(name=CURSOR_NAME)
+    
+    processed = flagged = 0
+    while True:
+        with transaction.atomic():
+            cursor = VoteStreamCursor.objects.select_for_update().get(name=CURSOR_NAME)
+            rows = list(
+                Vote.objects.filter(pk__gt=cursor.last_vote_id).order_by('pk').values_list(
+                    'pk', 'proposal_id', 'is_for', 'vote_count', 'created_at',
+                    'voter__member__verified_at', 'voter__member__wallet_address'
+                )[:batch_size]
+            )
+            # Stop at the first unsettled vote so the cursor never passes it
+            for position, row in enumerate(rows):
+                if row[4] > settled:
+                    rows = rows[:position]
+                    break
+            if not rows:
+                break
+            
+            flagged += process_votes(rows)
+            cursor.last_vote_id = rows[-1][0]
+            cursor.save(update_fields=['last_vote_id', 'updated_at'])
+            processed += len(rows)
+    return processed, flagged
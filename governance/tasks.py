@@ -0,0 +1,138 @@
+"""
+Celery tasks for the governance app.
+"""
+
+import logging
+import time
+
+from celery import shared_task
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Proposal, GovernanceToken, VoteCounterShard, TokenSupply, VoteMerkleTree
+from .metrics import (
+    TOKEN_LOCKS_RELEASED, TOKEN_LOCKS_RELEASED_LAST_RUN, SUSPICIOUS_VOTING_WINDOWS_FLAGGED
+)
+from .sybil import detect_coordinated_voting
+from .delegation import rebuild_effective_voting_power
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(ignore_result=True)
+def merge_vote_counter_shards():
+    """Fold pending sharded vote counters into their proposal tallies."""
+    proposal_ids = VoteCounterShard.objects.filter(
+        ~Q(votes_for=0) | ~Q(votes_against=0)
+    ).values_list('proposal_id', flat=True).distinct().order_by()
+    
+    merged = 0
+    for proposal_id in proposal_ids.iterator():
+        merged += VoteCounterShard.merge(proposal_id)
+    
+    if merged:
+        logger.info("Merged %d vote counter shards", merged)
+    return merged
+
+
+@shared_task(ignore_result=True)
+def sync_vote_merkle_trees():
+    """Append newly cast votes to the Merkle trees of proposals in voting."""
+    proposal_ids = Proposal.objects.filter(
+        status=Proposal.Status.VOTING
+    ).values_list('pk', flat=True).order_by()
+    
+    appended = 0
+    for proposal_id in proposal_ids.iterator():
+        appended += VoteMerkleTree.sync(proposal_id)
+    
+    if appended:
+        logger.info("Appended %d votes to vote Merkle trees", appended)
+    return appended
+
+
+@shared_task(ignore_result=True)
+def detect_sybil_voting(batch_size=5000):
+    """Scan newly committed votes for coordinated voting patterns."""
+    processed, flagged = detect_coordinated_voting(batch_size=batch_size)
+    SUSPICIOUS_VOTING_WINDOWS_FLAGGED.inc(flagged)
+    if flagged:
+        logger.warning("Flagged %d suspicious voting windows in %d votes", flagged, processed)
+    return processed, flagged
+
+
+@shared_task(ignore_result=True)
+def rebuild_voting_power():
+    """Recompute the cached effective voting power of all holders."""
+    graph = rebuild_effective_voting_power()
+    for cycle in graph.cycles:
+        logger.warning("Ignoring delegation cycle through holders %s", cycle)
+
+
+@shared_task(ignore_result=True)
+def reconcile_token_supply():
+    """Correct any drift between the supply counter and the token balances."""
+    supply_drift, locked_drift = TokenSupply.reconcile()
+    if supply_drift or locked_drift:
+        logger.warning(
+            "Corrected token supply drift: total %+d, locked %+d", supply_drift, locked_drift
+        )
+    return supply_drift, locked_drift
+
+
+@shared_task
+def finalize_expired_proposals(batch_size=500):
+    """Close every proposal whose voting period has ended.
+    
+    Due proposals are read in batches from the (status, voting_end_time)
+    index, and each one is finalized in its own short transaction.
+    """
+    started = time.monotonic()
+    now = timezone.now()
+    due = Proposal.objects.filter(
+        status=Proposal.Status.VOTING, voting_end_time__lte=now
+    ).order_by('voting_end_time', 'pk')
+    
+    processed = 0
+    cursor = None
+    while True:
+        batch = due
+        if cursor:
+            batch = batch.filter(
+                Q(voting_end_time__gt=cursor[0]) | Q(voting_end_time=cursor[0], pk__gt=cursor[1])
+            )
+        rows = list(batch.values_list('voting_end_time', 'pk')[:batch_size])
+        
+        for voting_end_time, proposal_id in rows:
+            try:
+                with transaction.atomic():
+                    proposal = Proposal.objects.select_for_update().filter(
+                        pk=proposal_id, status=Proposal.Status.VOTING
+                    ).first()
+                    if proposal is None:
+                        continue
+                    proposal.end_voting()
+                processed += 1
+            except Exception:
+                logger.exception("Failed to finalize proposal %s", proposal_id)
+        
+        if len(rows) < batch_size:
+            break
+        cursor = rows[-1]
+    
+    duration = time.monotonic() - started
+    if processed:
+        logger.info("Finalized %d expired proposals in %.3fs", processed, duration)
+    return {'processed': processed, 'duration': duration}
+
+
+@shared_task(ignore_result=True)
+def release_expired_token_locks(batch_size=10000):
+    """Unlock governance tokens whose voting lock has expired."""
+    released = GovernanceToken.release_expired_locks(batch_size=batch_size)
+    TOKEN_LOCKS_RELEASED.inc(released)
+    TOKEN_LOCKS_RELEASED_LAST_RUN.set(released)
+    if released:
+        logger.info("Released %d expired token locks", released)
+    return released
@@ -0,0 +1,152 @@
+"""
+Tests for the batch vote casting endpoint in the governance app.
+"""
+
+from django.test import TestCase
+from django.contrib.auth.models import User, Permission
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from analytics.concentration import rebuild_buckets
+from analytics.models import BalanceBucket
+from governance.models import (
+    Proposal, Vote, GovernanceToken, TokenSupply, TokenCheckpoint, EffectiveVotingPower
+)
+from governance.services import cast_votes_batch
+
+
+class BatchVotingTest(TestCase):
+    """Test casting relayed votes in bulk."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.relayer = User.objects.create_user(username='relayer', password='password123')
+        self.relayer.user_permissions.add(Permission.objects.get(codename='relay_votes'))
+        
+        self.proposer = User.objects.create_user(username='proposer', password='password123')
+        self.voters = []
+        for i in range(6):
+            user = User.objects.create_user(username=f'voter{i}', password='password123')
+            GovernanceToken.objects.create(holder=user, balance=100)
+            self.voters.append(user)
+        
+        now = timezone.now()
+        self.proposals = [
+            Proposal.objects.create(
+                title=f'Proposal {i}',
+                description='Batch test',
+                rationale='Testing',
+                implementation_details='None',
+                timeline='None',
+                proposer=self.proposer,
+                status=Proposal.Status.VOTING,
+                voting_start_time=now,
+                voting_end_time=now + timezone.timedelta(days=7),
+                total_voting_power=1000
+            )
+            for i in range(2)
+        ]
+        
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.relayer)
+    
+    def post_batch(self, votes):
+        """Post a batch of votes."""
+        return self.client.post(
+            '/api/v1/governance/votes/batch/', {'votes': votes}, format='json'
+        )
+    
+    def test_batch_creates_votes_and_applies_tallies(self):
+        """Test that valid votes are created, charged and tallied."""
+        votes = [
+            {'proposal': self.proposals[0].id, 'voter': voter.id, 'vote_count': 3, 'is_for': i % 2 == 0}
+            for i, voter in enumerate(self.voters)
+        ]
+        votes.append({'proposal': self.proposals[1].id, 'voter': self.voters[0].id, 'vote_count': 2})
+        
+        response = self.post_batch(votes)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['created'], 7)
+        self.assertEqual(response.data['failed'], 0)
+        
+        first, second = self.proposals
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(first.total_votes_for, 9)
+        self.assertEqual(first.total_votes_against, 9)
+        self.assertEqual(second.total_votes_for, 2)
+        
+        # voter0 paid 9 + 4 credits across both proposals
+        token = GovernanceToken.objects.get(holder=self.voters[0])
+        self.assertEqual(token.balance, 87)
+        self.assertTrue(token.is_locked)
+        self.assertEqual(Vote.objects.get(voter=self.voters[1], proposal=first).vote_cost, 9)
+    
+    def test_batch_records_balance_changes(self):
+        """Test that supply, checkpoints, voting power and the histogram see the charged balances."""
+        cast_votes_batch([
+            {'proposal': self.proposals[0].id, 'voter': voter.id, 'vote_count': 3, 'is_for': True}
+            for voter in self.voters[:3]
+        ])
+        
+        supply = TokenSupply.current()
+        self.assertEqual((supply.total_supply, supply.total_locked), (573, 273))
+        for voter in self.voters[:3]:
+            self.assertEqual(TokenCheckpoint.objects.filter(holder=voter).latest('timestamp', 'id').balance, 91)
+            self.assertEqual(EffectiveVotingPower.objects.get(holder=voter).effective_power, 91)
+        
+        buckets = list(BalanceBucket.objects.filter(holder_count__gt=0).values_list('bucket', 'holder_count'))
+        rebuild_buckets()
+        self.assertEqual(
+            list(BalanceBucket.objects.filter(holder_count__gt=0).values_list('bucket', 'holder_count')), buckets
+        )
+        self.assertFalse(BalanceBucket.objects.filter(holder_count__lt=0).exists())
+    
+    def test_batch_reports_errors_per_item(self):
+        """Test that invalid items are rejected without blocking valid ones."""
+        Vote.objects.create(proposal=self.proposals[0], voter=self.voters[1], vote_count=1)
+        no_tokens = User.objects.create_user(username='no_tokens', password='password123')
+        
+        response = self.post_batch([
+            {'proposal': self.proposals[0].id, 'voter': self.voters[0].id, 'vote_count': 2},
+            {'proposal': self.proposals[0].id, 'voter': self.voters[0].id, 'vote_count': 2},
+            {'proposal': self.proposals[0].id, 'voter': self.voters[1].id, 'vote_count': 1},
+            {'proposal': self.proposals[0].id, 'voter': no_tokens.id, 'vote_count': 1},
+            {'proposal': self.proposals[0].id, 'voter': self.voters[2].id, 'vote_count': 11},
+            {'proposal': 9999, 'voter': self.voters[3].id, 'vote_count': 1},
+            {'proposal': self.proposals[0].id, 'voter': self.voters[4].id},
+        ])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['created'], 1)
+        statuses = [result['status'] for result in response.data['results']]
+        self.assertEqual(statuses, ['created'] + ['error'] * 6)
+        self.assertIn('vote_count', response.data['results'][6]['errors'])
+        
+        self.assertEqual(GovernanceToken.objects.get(holder=self.voters[2]).balance, 100)
+        self.assertEqual(Vote.objects.filter(proposal=self.proposals[0]).count(), 2)
+    
+    def test_batch_query_count_is_independent_of_size(self):
+        """Test that the batch is validated and written with bulk queries."""
+        def batch(voters):
+            return [
+                {'proposal': self.proposals[0].id, 'voter': voter.id, 'vote_count': 1, 'is_for': True}
+                for voter in voters
+            ]
+        
+        # SAVEPOINT, 3 bulk reads, 1 checkpoint read per proposal, token UPDATE,
+        # checkpoint INSERT, supply UPDATE, delegation chain lock, voting power
+        # row check, voting power UPDATE, balance bucket upsert, vote INSERT,
+        # tally UPDATE, RELEASE
+        with self.assertNumQueries(15):
+            cast_votes_batch(batch(self.voters[:2]))
+        with self.assertNumQueries(15):
+            cast_votes_batch(batch(self.voters[2:]))
+    
+    def test_batch_requires_relay_permission(self):
+        """Test that regular members cannot relay votes."""
+        self.client.force_authenticate(user=self.voters[0])
+        response = self.post_batch([
+            {'proposal': self.proposals[0].id, 'voter': self.voters[1].id, 'vote_count': 1}
+        ])
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
@@ -0,0 +1,109 @@
+"""
+Tests for seeded arbitration committee selection.
+"""
+
+import random
+from collections import Counter
+
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth.models import User
+from django.db import connection
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from analytics.concentration import rebuild_buckets
+from analytics.models import BalanceBucket
+from governance.committee import (
+    CommitteeSelectionError, balance_cutoff, replay_selection, select_committee, weighted_reservoir
+)
+from governance.models import GovernanceToken, CommitteeSelection
+
+
+class CommitteeSelectionTest(TestCase):
+    """Test the percentile cutoff, the reservoir draw and the audit trail."""
+    
+    def setUp(self):
+        """Create 100 holders with balances 1 to 100 and one empty wallet."""
+        users = User.objects.bulk_create([User(username=f'holder{i}') for i in range(101)])
+        GovernanceToken.objects.bulk_create([
+            GovernanceToken(holder=user, balance=index) for index, user in enumerate(users)
+        ])
+        # Bulk writes skip the balance signal, so build the histogram they bypassed
+        rebuild_buckets()
+        self.balances = dict(GovernanceToken.objects.values_list('holder_id', 'balance'))
+    
+    def test_cutoff_is_the_top_percentile(self):
+        """Test that the cutoff admits exactly the top 10% of non-empty holders."""
+        self.assertEqual(balance_cutoff(10), (100, 91))
+        self.assertEqual(balance_cutoff(100), (100, 1))
+    
+    def test_cutoff_reads_only_the_cutoff_bucket(self):
+        """Test that the cutoff comes from the histogram and one bucket of holders."""
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(balance_cutoff(50), (100, 51))
+        self.assertFalse(any('COUNT(' in query['sql'] for query in queries.captured_queries))
+        self.assertIn('"balance" < ', queries.captured_queries[-1]['sql'])
+        
+        # A drifted histogram falls back to an exact count
+        BalanceBucket.objects.filter(holder_count__gt=0).update(holder_count=1000)
+        self.assertEqual(balance_cutoff(10), (100, 91))
+    
+    def test_selection_is_seeded_and_auditable(self):
+        """Test that draws are reproducible, eligible-only and replayable."""
+        first = select_committee(size=5, top_percentage=10, seed='audit-seed')
+        second = select_committee(size=5, top_percentage=10, seed='audit-seed')
+        other = select_committee(size=5, top_percentage=10, seed='other-seed')
+        
+        self.assertEqual(first.members, second.members)
+        self.assertNotEqual(first.members, other.members)
+        self.assertEqual(first.eligible_count, 10)
+        self.assertEqual(len({member['holder'] for member in first.members}), 5)
+        self.assertTrue(all(member['balance'] >= 91 for member in first.members))
+        self.assertTrue(replay_selection(first))
+        
+        # A balance change among the eligible holders is detected on replay
+        GovernanceToken.objects.filter(balance=95).update(balance=96)
+        self.assertFalse(replay_selection(first))
+    
+    def test_selection_query_count(self):
+        """Test that a draw costs a fixed handful of queries."""
+        # Histogram read, cutoff seek within one bucket, eligible stream, INSERT
+        with self.assertNumQueries(4):
+            select_committee(size=5, top_percentage=10, seed='seed')
+    
+    def test_weighted_sampling_favours_large_balances(self):
+        """Test that A-Res picks holders roughly in proportion to their weight."""
+        rows = [(1, 1), (2, 9)]
+        rng = random.Random(7)
+        picks = Counter(
+            weighted_reservoir(rows, 1, rng, weighted=True)[0][0]['holder'] for _ in range(2000)
+        )
+        self.assertAlmostEqual(picks[2] / 2000, 0.9, delta=0.03)
+    
+    def test_not_enough_eligible_holders(self):
+        """Test that a committee larger than the eligible set is refused."""
+        with self.assertRaises(CommitteeSelectionError):
+            select_committee(size=31, top_percentage=10)
+    
+    def test_api_draw_and_verify(self):
+        """Test that staff draw committees and anyone can verify them."""
+        client = APIClient()
+        member = User.objects.get(username='holder1')
+        client.force_authenticate(user=member)
+        response = client.post('/api/v1/governance/committee-selections/', {'committee_size': 5})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        
+        staff = User.objects.create_user(username='staff', is_staff=True)
+        client.force_authenticate(user=staff)
+        response = client.post(
+            '/api/v1/governance/committee-selections/',
+            {'committee_size': 5, 'seed': 'public', 'weighted': True}
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data['members']), 5)
+        
+        client.force_authenticate(user=member)
+        response = client.get(f"/api/v1/governance/committee-selections/{response.data['id']}/verify/")
+        self.assertTrue(response.data['verified'])
+        self.assertEqual(CommitteeSelection.objects.get().selected_by, staff)
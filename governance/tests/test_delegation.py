@@ -0,0 +1,145 @@
+"""
+Tests for delegation resolution and effective voting power in the governance app.
+"""
+
+from django.test import TestCase
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from governance.models import GovernanceToken, EffectiveVotingPower
+from governance.delegation import (
+    DelegationGraph, DelegationCycleError, rebuild_effective_voting_power
+)
+
+
+class DelegationGraphTest(TestCase):
+    """Test the in-memory delegation graph."""
+    
+    def test_transitive_delegation(self):
+        """Test that power flows to the end of a delegation chain."""
+        graph = DelegationGraph({1: 2, 2: 3, 4: 3}, {1: 10, 2: 20, 3: 30, 4: 40, 5: 50})
+        
+        self.assertEqual(graph.chain(1), [2, 3])
+        self.assertEqual(graph.resolve(1), 3)
+        powers = graph.compute_powers()
+        self.assertEqual(powers[3], (70, 100))
+        self.assertEqual(powers[2], (10, 0))
+        self.assertEqual(powers[1], (0, 0))
+        self.assertEqual(powers[5], (0, 50))
+    
+    def test_cycles_are_detected(self):
+        """Test that loaded cycles are broken and new ones rejected."""
+        graph = DelegationGraph({1: 2, 2: 3, 3: 1}, {1: 1, 2: 1, 3: 1})
+        self.assertEqual(len(graph.cycles), 1)
+        self.assertEqual(sum(effective for _, effective in graph.compute_powers().values()), 3)
+        
+        graph = DelegationGraph({1: 2, 2: 3}, {})
+        with self.assertRaises(DelegationCycleError):
+            graph.set_delegate(3, 1)
+        with self.assertRaises(DelegationCycleError):
+            graph.set_delegate(4, 4)
+
+
+class EffectiveVotingPowerTest(TestCase):
+    """Test incremental maintenance of the cached effective power table."""
+    
+    def setUp(self):
+        """Set up test data."""
+        self.users = []
+        for i, balance in enumerate([10, 20, 30, 40]):
+            user = User.objects.create_user(username=f'holder{i}', password='password123')
+            GovernanceToken.objects.create(holder=user, balance=balance)
+            self.users.append(user)
+        rebuild_effective_voting_power()
+        
+        self.client = APIClient()
+    
+    def powers(self):
+        """Return the cached (delegated, effective) power per user."""
+        return {
+            row.holder_id: (row.delegated_power, row.effective_power)
+            for row in EffectiveVotingPower.objects.all()
+        }
+    
+    def delegate(self, holder, delegate):
+        """Delegate a holder's tokens through the API."""
+        token = GovernanceToken.objects.get(holder=holder)
+        self.client.force_authenticate(user=holder)
+        return self.client.post(
+            f'/api/v1/governance/tokens/{token.id}/delegate/', {'delegate_id': delegate.id}
+        )
+    
+    def test_incremental_updates_match_rebuild(self):
+        """Test that delegate/undelegate keep the cache equal to a full rebuild."""
+        a, b, c, d = self.users
+        self.assertEqual(self.delegate(a, b).status_code, status.HTTP_200_OK)
+        self.assertEqual(self.delegate(b, c).status_code, status.HTTP_200_OK)
+        self.assertEqual(self.delegate(d, a).status_code, status.HTTP_200_OK)
+        
+        incremental = self.powers()
+        self.assertEqual(incremental[c.id], (70, 100))
+        rebuild_effective_voting_power()
+        self.assertEqual(self.powers(), incremental)
+        
+        # Re-point b's subtree (a, b, d) away from c
+        GovernanceToken.objects.get(holder=b).undelegate()
+        incremental = self.powers()
+        self.assertEqual(incremental[b.id], (50, 70))
+        self.assertEqual(incremental[c.id], (0, 30))
+        rebuild_effective_voting_power()
+        self.assertEqual(self.powers(), incremental)
+    
+    def test_delegation_cycle_is_rejected(self):
+        """Test that the API refuses delegations that would loop."""
+        a, b, c, _ = self.users
+        self.delegate(a, b)
+        self.delegate(b, c)
+        
+        response = self.delegate(c, a)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIsNone(GovernanceToken.objects.get(holder=c).delegated_to)
+    
+    def test_effective_power_endpoint(self):
+        """Test looking up a member's effective power by user ID."""
+        a, b, _, _ = self.users
+        self.delegate(a, b)
+        
+        with self.assertNumQueries(1):
+            response = self.client.get(f'/api/v1/governance/voting-power/{b.id}/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['effective_power'], 30)
+        self.assertEqual(response.data['delegated_power'], 10)
+    
+    def test_balance_changes_follow_the_chain(self):
+        """Test that balance changes move along delegation chains without a rebuild."""
+        a, b, c, _ = self.users
+        self.delegate(a, b)
+        self.delegate(b, c)
+        
+        token = GovernanceToken.objects.get(holder=a)
+        token.balance = 15
+        token.save()
+        token = GovernanceToken.objects.get(holder=c)
+        token.balance = 25
+        token.save()
+        
+        incremental = self.powers()
+        self.assertEqual(incremental[c.id], (35, 60))
+        self.assertEqual(incremental[b.id], (15, 0))
+        rebuild_effective_voting_power()
+        self.assertEqual(self.powers(), incremental)
+    
+    def test_missing_rows_are_seeded_from_current_delegations(self):
+        """Test that rows created on first use include delegations made before them."""
+        a, b, c, d = self.users
+        self.delegate(a, b)
+        self.delegate(b, c)
+        EffectiveVotingPower.objects.all().delete()
+        
+        self.assertEqual(self.delegate(c, d).status_code, status.HTTP_200_OK)
+        incremental = self.powers()
+        self.assertEqual(incremental[d.id], (60, 100))
+        self.assertEqual(incremental[c.id], (30, 0))
+        rebuild_effective_voting_power()
+        self.assertEqual({holder_id: self.powers()[holder_id] for holder_id in incremental}, incremental)
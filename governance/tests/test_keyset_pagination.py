@@ -0,0 +1,85 @@
+"""
+Tests for keyset pagination on high-volume list endpoints.
+"""
+
+from django.test import TestCase
+from django.contrib.auth.models import User
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from governance.models import Proposal
+from treasury.models import TreasuryMetric
+
+
+class KeysetPaginationTest(TestCase):
+    """Test cursor pagination of the treasury metric list."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.user = User.objects.create_user(username='reader', password='password123')
+        TreasuryMetric.objects.bulk_create([TreasuryMetric() for _ in range(25)])
+        # Pairs of metrics share a timestamp to exercise the tie-breaking on id
+        now = timezone.now()
+        for metric_id in TreasuryMetric.objects.values_list('id', flat=True):
+            TreasuryMetric.objects.filter(id=metric_id).update(
+                timestamp=now + timezone.timedelta(seconds=metric_id // 2)
+            )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+    
+    def fetch_all(self, url):
+        """Follow next links and return the ids of every row."""
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn('count', response.data)
+            ids.extend(row['id'] for row in response.data['results'])
+            url = response.data['next']
+        return ids
+    
+    def test_cursor_walks_every_row_once(self):
+        """Test that following cursors returns each metric exactly once."""
+        ids = self.fetch_all('/api/v1/treasury/metrics/?page_size=10')
+        self.assertEqual(ids, sorted(TreasuryMetric.objects.values_list('id', flat=True), reverse=True))
+    
+    def test_deep_pages_cost_the_same_as_the_first(self):
+        """Test that later pages issue the same queries as the first one."""
+        with self.assertNumQueries(1) as first:
+            response = self.client.get('/api/v1/treasury/metrics/?page_size=5')
+        for _ in range(3):
+            response = self.client.get(response.data['next'])
+        with self.assertNumQueries(1):
+            self.client.get(response.data['next'])
+        self.assertFalse(any('COUNT(' in query['sql'] for query in first.captured_queries))
+    
+    def test_estimated_count_is_opt_in(self):
+        """Test that ?count=estimate adds an approximate total."""
+        response = self.client.get('/api/v1/treasury/metrics/?count=estimate')
+        self.assertEqual(response.data['count'], 25)
+        self.assertEqual(list(response.data)[0], 'count')
+        
+        response = self.client.get('/api/v1/governance/votes/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('next', response.data)
+    
+    def test_cursor_ignores_ordering_on_other_fields(self):
+        """Test that ?ordering= cannot move the cursor onto a non-unique field."""
+        TreasuryMetric.objects.update(reserve_ratio=1)
+        ids = self.fetch_all('/api/v1/treasury/metrics/?page_size=10&ordering=reserve_ratio')
+        self.assertEqual(ids, sorted(TreasuryMetric.objects.values_list('id', flat=True), reverse=True))
+    
+    def test_page_ordering_breaks_ties_on_id(self):
+        """Test that sorting proposals by a tally orders equal tallies by id."""
+        proposals = [
+            Proposal.objects.create(
+                title=f'Proposal {index}', description='Tie', rationale='Tie',
+                implementation_details='None', timeline='None', proposer=self.user,
+                total_votes_for=index % 2
+            )
+            for index in range(6)
+        ]
+        response = self.client.get('/api/v1/governance/proposals/?ordering=-total_votes_for')
+        expected = sorted(proposals, key=lambda proposal: (proposal.total_votes_for, proposal.pk), reverse=True)
+        self.assertEqual([row['id'] for row in response.data['results']], [proposal.pk for proposal in expected])
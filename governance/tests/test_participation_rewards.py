@@ -0,0 +1,134 @@
+"""
+Tests for the quarterly participation rewards engine.
+"""
+
+import datetime
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+from django.test import TestCase
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.utils import timezone
+
+from governance.models import (
+    Proposal, Vote, GovernanceToken, TokenSupply, TokenCheckpoint,
+    RewardDistribution, RewardPayout, record_balance_changes
+)
+from governance.rewards import (
+    calculate_payouts, distribute_rewards, previous_quarter_bounds, quarter_bounds
+)
+
+
+class ParticipationRewardsTest(TestCase):
+    """Test participation rates, loyalty multipliers and resumable crediting."""
+    
+    def setUp(self):
+        """Set up two quarters of proposals and votes."""
+        self.proposer = User.objects.create_user(username='proposer', password='password123')
+        self.start, self.end = quarter_bounds('2024Q2')
+        self.current = [self.create_proposal(self.start + datetime.timedelta(days=i)) for i in range(10)]
+        self.previous = [self.create_proposal(self.start - datetime.timedelta(days=i + 1)) for i in range(10)]
+        # Still voting, so it does not count towards the quarter
+        self.create_proposal(self.start + datetime.timedelta(days=20), Proposal.Status.VOTING)
+        
+        self.regular, self.loyal, self.absent, self.untokened = [
+            User.objects.create_user(username=name)
+            for name in ('regular', 'loyal', 'absent', 'untokened')
+        ]
+        for user in (self.regular, self.loyal, self.absent):
+            GovernanceToken.objects.create(holder=user, balance=1000)
+        
+        self.vote(self.regular, self.current[:8])
+        self.vote(self.loyal, self.current + self.previous[:9])
+        self.vote(self.absent, self.previous)
+        self.vote(self.untokened, self.current)
+    
+    def create_proposal(self, voting_end_time, status=Proposal.Status.REJECTED):
+        """Create a proposal whose voting ended at the given time."""
+        return Proposal.objects.create(
+            title='Reward Proposal', description='Test', rationale='Test',
+            implementation_details='None', timeline='None', proposer=self.proposer,
+            status=status, voting_end_time=voting_end_time
+        )
+    
+    def vote(self, voter, proposals):
+        """Record a vote by the voter on each proposal."""
+        Vote.objects.bulk_create([Vote(proposal=proposal, voter=voter, vote_count=1) for proposal in proposals])
+    
+    def test_quarter_bounds(self):
+        """Test parsing quarter labels."""
+        start, end = quarter_bounds('2023q4')
+        self.assertEqual((start.month, end.year, end.month), (10, 2024, 1))
+        with self.assertRaises(ValueError):
+            quarter_bounds('2023Q5')
+        self.assertEqual(previous_quarter_bounds(start)[0].month, 7)
+        self.assertEqual(previous_quarter_bounds(quarter_bounds('2024Q1')[0])[0].year, 2023)
+    
+    def test_previous_quarter_uses_its_real_length(self):
+        """Test that the loyalty window is the previous quarter, not an equal span of days."""
+        # 2025Q1 has 90 days and 2024Q4 has 92
+        start, end = quarter_bounds('2025Q1')
+        current = [self.create_proposal(start + datetime.timedelta(days=i)) for i in range(2)]
+        previous = [self.create_proposal(start - datetime.timedelta(days=92 - i)) for i in range(2)]
+        self.vote(self.absent, current + previous)
+        
+        _, payouts = calculate_payouts(start, end, reward_amount=100)
+        self.assertEqual([payout.multiplier for payout in payouts], [Decimal('1.2')])
+    
+    def test_rates_and_multipliers(self):
+        """Test that rewards follow participation and loyalty, skipping the inactive."""
+        proposal_count, payouts = calculate_payouts(self.start, self.end, reward_amount=100)
+        self.assertEqual(proposal_count, 10)
+        
+        by_holder = {payout.holder_id: payout for payout in payouts}
+        self.assertEqual(set(by_holder), {self.regular.id, self.loyal.id})
+        self.assertEqual(by_holder[self.regular.id].participation_rate, Decimal('0.8'))
+        self.assertEqual(by_holder[self.regular.id].amount, 80)
+        self.assertEqual(by_holder[self.loyal.id].multiplier, Decimal('1.2'))
+        self.assertEqual(by_holder[self.loyal.id].amount, 120)
+    
+    def test_distribution_credits_once(self):
+        """Test that balances, checkpoints and supply are updated exactly once."""
+        supply = TokenSupply.current().total_supply
+        distribution = distribute_rewards(self.start, self.end, reward_amount=100)
+        self.assertEqual(distribution.status, RewardDistribution.Status.COMPLETED)
+        self.assertEqual(distribution.total_rewarded, 200)
+        
+        distribute_rewards(self.start, self.end, reward_amount=100)
+        self.assertEqual(GovernanceToken.objects.get(holder=self.regular).balance, 1080)
+        self.assertEqual(GovernanceToken.objects.get(holder=self.loyal).balance, 1120)
+        self.assertEqual(GovernanceToken.objects.get(holder=self.absent).balance, 1000)
+        self.assertEqual(TokenSupply.current().total_supply, supply + 200)
+        self.assertEqual(TokenCheckpoint.balance_at(self.loyal.id, timezone.now()), 1120)
+        self.assertEqual(RewardDistribution.objects.count(), 1)
+    
+    def test_interrupted_run_resumes(self):
+        """Test that a failed chunk is retried without paying earlier chunks again."""
+        calls = []
+        
+        def fail_on_second_chunk(changes):
+            calls.append(changes)
+            if len(calls) == 2:
+                raise RuntimeError("worker killed")
+            record_balance_changes(changes)
+        
+        with mock.patch('governance.rewards.record_balance_changes', fail_on_second_chunk):
+            with self.assertRaises(RuntimeError):
+                distribute_rewards(self.start, self.end, reward_amount=100, batch_size=1)
+        self.assertEqual(RewardPayout.objects.filter(credited_at__isnull=False).count(), 1)
+        
+        distribute_rewards(self.start, self.end, reward_amount=100, batch_size=1)
+        self.assertEqual(GovernanceToken.objects.get(holder=self.regular).balance, 1080)
+        self.assertEqual(GovernanceToken.objects.get(holder=self.loyal).balance, 1120)
+    
+    def test_dry_run_writes_nothing(self):
+        """Test that the dry run prints the distribution without crediting it."""
+        out = StringIO()
+        call_command('distribute_participation_rewards', '2024Q2', '--dry-run', '--reward-amount', '100', stdout=out)
+        
+        self.assertIn(f"{self.loyal.id},10,1.0000,1.2,120", out.getvalue())
+        self.assertIn("200 tokens to 2 holders over 10 proposals", out.getvalue())
+        self.assertFalse(RewardDistribution.objects.exists())
+        self.assertEqual(GovernanceToken.objects.get(holder=self.loyal).balance, 1000)
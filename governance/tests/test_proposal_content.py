@@ -0,0 +1,98 @@
+"""
+Tests for deferred proposal text bodies and the proposal content store.
+"""
+
+import tempfile
+
+from django.test import TestCase, override_settings
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from governance.content_store import get_content_store
+from governance.models import Proposal
+
+
+class ProposalContentTest(TestCase):
+    """Test the slim proposal list and the content endpoint."""
+    
+    def setUp(self):
+        """Set up test data."""
+        self.user = User.objects.create_user(username='author', password='password123')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+    
+    def create_proposal(self, index=0):
+        """Create a draft proposal with long text bodies."""
+        return Proposal.objects.create(
+            title=f'Proposal {index}', description='Description ' * 500, rationale='Rationale',
+            implementation_details='Details', timeline='Timeline', proposer=self.user
+        )
+    
+    def test_list_omits_text_bodies(self):
+        """Test that lists neither select nor return the long text fields."""
+        for index in range(3):
+            self.create_proposal(index)
+        
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get('/api/v1/governance/proposals/')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        result = response.data['results'][0]
+        self.assertIn('title', result)
+        self.assertEqual(result['proposer']['username'], 'author')
+        self.assertNotIn('description', result)
+        self.assertFalse(any('"description"' in query['sql'] for query in context.captured_queries))
+    
+    def test_list_query_count_does_not_grow(self):
+        """Test that the proposer is joined rather than loaded per row."""
+        self.create_proposal()
+        with CaptureQueriesContext(connection) as context:
+            self.client.get('/api/v1/governance/proposals/')
+        
+        for index in range(1, 6):
+            self.create_proposal(index)
+        with self.assertNumQueries(len(context.captured_queries)):
+            self.client.get('/api/v1/governance/proposals/')
+    
+    def test_detail_and_content_return_bodies(self):
+        """Test that detail and content requests still return the full text."""
+        proposal = self.create_proposal()
+        
+        response = self.client.get(f'/api/v1/governance/proposals/{proposal.id}/')
+        self.assertEqual(response.data['description'], proposal.description)
+        
+        response = self.client.get(f'/api/v1/governance/proposals/{proposal.id}/content/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['rationale'], 'Rationale')
+        self.assertEqual(response.data['timeline'], 'Timeline')
+    
+    def test_content_store_receives_bodies_on_commit(self):
+        """Test that bodies are written to the store and served from it."""
+        with tempfile.TemporaryDirectory() as root, override_settings(
+            PROPOSAL_CONTENT_STORE='governance.content_store.FileSystemContentStore',
+            PROPOSAL_CONTENT_ROOT=root
+        ):
+            with self.captureOnCommitCallbacks(execute=True):
+                proposal = self.create_proposal()
+            
+            store = get_content_store()
+            self.assertTrue(proposal.content_document_id)
+            self.assertEqual(store.get(proposal.content_document_id)['rationale'], 'Rationale')
+            
+            # The store is the source for content reads
+            store.put(proposal.content_document_id, {'rationale': 'From the store'})
+            response = self.client.get(f'/api/v1/governance/proposals/{proposal.id}/content/')
+            self.assertEqual(response.data['rationale'], 'From the store')
+            
+            # Edits to other fields do not rewrite the document
+            with self.captureOnCommitCallbacks(execute=True) as callbacks:
+                proposal.title = 'Renamed'
+                proposal.save()
+            self.assertEqual(callbacks, [])
+            
+            with self.captureOnCommitCallbacks(execute=True):
+                proposal.delete()
+            self.assertIsNone(store.get(proposal.content_document_id))
@@ -0,0 +1,58 @@
+"""
+Tests for the scheduled finalization of expired proposals.
+"""
+
+from django.test import TestCase
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+from governance.models import Proposal
+from governance.tasks import finalize_expired_proposals
+
+
+class ProposalFinalizationTest(TestCase):
+    """Test the finalize_expired_proposals task."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.proposer = User.objects.create_user(username='proposer', password='password123')
+    
+    def create_proposal(self, title, ends_in_days, votes_for=0, status=Proposal.Status.VOTING):
+        """Create a proposal whose voting period ends relative to now."""
+        now = timezone.now()
+        return Proposal.objects.create(
+            title=title,
+            description='Finalization test',
+            rationale='Testing',
+            implementation_details='None',
+            timeline='None',
+            proposer=self.proposer,
+            status=status,
+            voting_start_time=now - timezone.timedelta(days=7),
+            voting_end_time=now + timezone.timedelta(days=ends_in_days),
+            total_voting_power=100,
+            total_votes_for=votes_for
+        )
+    
+    def test_finalizes_only_expired_voting_proposals(self):
+        """Test that due proposals are closed in batches and others are left alone."""
+        passed = self.create_proposal('Passed', -1, votes_for=60)
+        rejected = [self.create_proposal(f'Rejected {i}', -2) for i in range(4)]
+        open_proposal = self.create_proposal('Open', 1)
+        draft = self.create_proposal('Draft', -1, status=Proposal.Status.DRAFT)
+        
+        report = finalize_expired_proposals(batch_size=2)
+        
+        self.assertEqual(report['processed'], 5)
+        self.assertGreaterEqual(report['duration'], 0)
+        passed.refresh_from_db()
+        self.assertEqual(passed.status, Proposal.Status.APPROVED)
+        for proposal in rejected:
+            proposal.refresh_from_db()
+            self.assertEqual(proposal.status, Proposal.Status.REJECTED)
+        open_proposal.refresh_from_db()
+        self.assertEqual(open_proposal.status, Proposal.Status.VOTING)
+        draft.refresh_from_db()
+        self.assertEqual(draft.status, Proposal.Status.DRAFT)
+        
+        self.assertEqual(finalize_expired_proposals()['processed'], 0)
@@ -0,0 +1,121 @@
+"""
+Tests for the full-text search index over proposals and comments.
+"""
+
+from io import StringIO
+
+from django.test import TestCase, override_settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from governance import search
+from governance.models import Proposal, ProposalComment
+
+
+class FullTextSearchTest(TestCase):
+    """Test indexing, ranking and the search endpoints."""
+    
+    def setUp(self):
+        """Set up test data."""
+        self.user = User.objects.create_user(username='searcher', password='password123')
+        self.grant = self.create_proposal(
+            'Community grants program', 'Fund grants for tooling.', 'Grants grow the ecosystem.'
+        )
+        self.audit = self.create_proposal(
+            'Security audit', 'Hire auditors for the treasury contracts.', 'Reduce risk.'
+        )
+        self.comment = ProposalComment.objects.create(
+            proposal=self.audit, author=self.user, content='Maybe we should fund two audit firms & compare.'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+    
+    def create_proposal(self, title, description, rationale):
+        """Create a draft proposal with searchable text."""
+        return Proposal.objects.create(
+            title=title, description=description, rationale=rationale,
+            implementation_details='None', timeline='None', proposer=self.user
+        )
+    
+    def test_results_are_ranked_and_highlighted(self):
+        """Test that title matches outrank body matches and terms are marked."""
+        results = search.search('grants')
+        self.assertEqual([(r.kind, r.object_id) for r in results], [('proposal', self.grant.id)])
+        self.assertEqual(results[0].title, 'Community <mark>grants</mark> program')
+        
+        results = search.search('audit')
+        self.assertEqual(
+            [(r.kind, r.object_id) for r in results],
+            [('proposal', self.audit.id), ('comment', self.comment.id)]
+        )
+        self.assertIn('<mark>audit</mark>', results[1].snippet)
+        self.assertIn('&amp;', results[1].snippet)
+    
+    def test_index_follows_saves_and_deletes(self):
+        """Test that edits replace documents and deletes remove them."""
+        self.grant.title = 'Developer bounties'
+        self.grant.save()
+        self.assertEqual(search.search('grants program'), [])
+        self.assertEqual(len(search.search('bounties')), 1)
+        
+        # Status changes do not rewrite the document
+        with self.assertNumQueries(1):
+            self.grant.start_discussion()
+        
+        self.audit.delete()
+        self.assertEqual(search.search('audit'), [])
+    
+    def test_filter_backends_use_index(self):
+        """Test ?search= on the proposal and comment lists."""
+        response = self.client.get('/api/v1/governance/proposals/?search=auditors')
+        self.assertEqual([row['id'] for row in response.data['results']], [self.audit.id])
+        
+        response = self.client.get('/api/v1/governance/comments/?search=firms')
+        self.assertEqual([row['id'] for row in response.data['results']], [self.comment.id])
+    
+    def test_filter_reports_capped_results(self):
+        """Test that ?search= says when matches beyond the cap were left out."""
+        response = self.client.get('/api/v1/governance/proposals/?search=audit')
+        self.assertFalse(response.data['truncated'])
+        response = self.client.get('/api/v1/governance/proposals/')
+        self.assertNotIn('truncated', response.data)
+        
+        self.create_proposal('Second audit', 'Audit the bridge.', 'Audits again.')
+        with override_settings(SEARCH_MAX_RESULTS=1):
+            response = self.client.get('/api/v1/governance/proposals/?search=audit')
+        self.assertEqual(response.data['count'], 1)
+        self.assertTrue(response.data['truncated'])
+    
+    def test_deferred_text_is_not_reindexed(self):
+        """Test that saving a list-style instance leaves its unloaded text alone."""
+        proposal = Proposal.objects.defer(*Proposal.CONTENT_FIELDS).get(pk=self.grant.pk)
+        with self.assertNumQueries(1):
+            proposal.start_discussion()
+        
+        # Text loaded on first access is not mistaken for an edit either
+        proposal.description
+        with self.assertNumQueries(1):
+            proposal.save()
+        self.assertEqual(len(search.search('tooling')), 1)
+    
+    def test_search_endpoint(self):
+        """Test the ranked search endpoint and its validation."""
+        response = self.client.get('/api/v1/governance/search/', {'q': 'audit', 'type': 'comment'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 1)
+        self.assertEqual(response.data[0]['proposal'], self.audit.id)
+        
+        response = self.client.get('/api/v1/governance/search/', {'q': 'audit', 'type': 'vote'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_rebuild_command(self):
+        """Test that the index can be rebuilt from the tables."""
+        with connection.cursor() as cursor:
+            search.get_backend().clear(cursor)
+        self.assertEqual(search.search('audit'), [])
+        
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(len(search.search('audit')), 2)
@@ -0,0 +1,109 @@
+"""
+Tests for the streaming NDJSON and CSV export endpoints.
+"""
+
+import csv
+import io
+import json
+from decimal import Decimal
+
+from asgiref.sync import sync_to_async
+from django.test import TestCase, override_settings
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from governance.models import Guardian, Proposal, Vote
+from treasury.models import Asset, TransactionApproval, TreasuryTransaction
+
+
+@override_settings(EXPORT_CHUNK_SIZE=2)
+class StreamingExportTest(TestCase):
+    """Test exports of votes, proposals and treasury transactions."""
+    
+    def setUp(self):
+        """Set up test data."""
+        self.user = User.objects.create_user(username='auditor', password='password123')
+        self.proposal = Proposal.objects.create(
+            title='Audit, "quoted"', description='Body', rationale='Why',
+            implementation_details='How', timeline='When', proposer=self.user
+        )
+        self.voters = [User.objects.create_user(username=f'voter{i}') for i in range(5)]
+        for index, voter in enumerate(self.voters):
+            Vote.objects.create(proposal=self.proposal, voter=voter, vote_count=index + 1, is_for=index % 2 == 0)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+    
+    def read(self, response):
+        """Return the streamed body of a response."""
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+    
+    def test_votes_export_as_ndjson(self):
+        """Test that every vote is streamed as one JSON object per line."""
+        response = self.client.get('/api/v1/governance/votes/export/')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertIn('vote-export.ndjson', response['Content-Disposition'])
+        
+        rows = [json.loads(line) for line in self.read(response).splitlines()]
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(
+            sorted(row['voter__username'] for row in rows), [f'voter{i}' for i in range(5)]
+        )
+        self.assertEqual(rows[0]['proposal_id'], self.proposal.id)
+    
+    def test_export_applies_list_filters(self):
+        """Test that filterset fields restrict the exported rows."""
+        response = self.client.get('/api/v1/governance/votes/export/', {'is_for': 'false'})
+        rows = [json.loads(line) for line in self.read(response).splitlines()]
+        self.assertEqual(sorted(row['vote_count'] for row in rows), [2, 4])
+    
+    def test_proposals_export_as_csv(self):
+        """Test that CSV exports have a header and quote awkward values."""
+        response = self.client.get('/api/v1/governance/proposals/export/', {'file_format': 'csv'})
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        
+        rows = list(csv.DictReader(io.StringIO(self.read(response))))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['title'], 'Audit, "quoted"')
+        self.assertEqual(rows[0]['execution_time'], '')
+        self.assertEqual(rows[0]['proposer__username'], 'auditor')
+    
+    def test_unknown_format_is_rejected(self):
+        """Test that an unsupported format returns a 400."""
+        response = self.client.get('/api/v1/governance/votes/export/', {'file_format': 'xml'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_treasury_exports(self):
+        """Test exporting transactions and the approvals visible to the user."""
+        asset = Asset.objects.create(name='Ether', symbol='ETH', asset_type=Asset.AssetType.CRYPTOCURRENCY)
+        transaction = TreasuryTransaction.objects.create(
+            asset=asset, amount=Decimal('1.5'), usd_value=Decimal('3000.00'),
+            transaction_type=TreasuryTransaction.TransactionType.WITHDRAWAL, proposer=self.user
+        )
+        guardian_user = User.objects.create_user(username='guardian')
+        guardian = Guardian.objects.create(
+            user=guardian_user, term_start_date='2023-01-01', term_end_date='2023-04-01'
+        )
+        TransactionApproval.objects.create(transaction=transaction, guardian=guardian, comments='ok')
+        
+        response = self.client.get('/api/v1/treasury/transactions/export/', {'file_format': 'csv'})
+        rows = list(csv.DictReader(io.StringIO(self.read(response))))
+        self.assertEqual(rows[0]['asset__symbol'], 'ETH')
+        self.assertEqual(rows[0]['amount'], '1.500000000000000000')
+        
+        response = self.client.get('/api/v1/treasury/approvals/export/')
+        rows = [json.loads(line) for line in self.read(response).splitlines()]
+        self.assertEqual([row['guardian__user__username'] for row in rows], ['guardian'])
+    
+    async def test_asgi_export_streams_asynchronously(self):
+        """Test that ASGI requests get an async iterator instead of a buffered one."""
+        await sync_to_async(self.async_client.force_login)(self.user)
+        response = await self.async_client.get('/api/v1/governance/votes/export/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.is_async)
+        
+        chunks = [chunk async for chunk in response.streaming_content]
+        self.assertEqual(len(b''.join(chunks).decode().splitlines()), 5)
+        self.assertGreater(len(chunks), 1)
@@ -0,0 +1,168 @@
+"""
+Tests for the streaming coordinated (Sybil) voting detector.
+"""
+
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import DatabaseError
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from governance.models import Member, Proposal, Vote, SuspiciousVotingWindow, VoteStreamCursor
+from governance.sybil import HeavyHitters, detect_coordinated_voting, window_start
+
+
+@override_settings(SYBIL_MIN_CLUSTER_VOTES=10, SYBIL_CLUSTER_SHARE=0.5, SYBIL_WINDOW_SECONDS=3600)
+class SybilDetectionTest(TestCase):
+    """Test window statistics, flagging and the review queue."""
+    
+    def setUp(self):
+        """Set up test data."""
+        cache.clear()
+        self.proposer = User.objects.create_user(username='proposer', password='password123')
+        self.proposal = Proposal.objects.create(
+            title='Sybil Proposal', description='Test', rationale='Test',
+            implementation_details='None', timeline='None', proposer=self.proposer,
+            status=Proposal.Status.VOTING
+        )
+        # Votes are placed inside one past window so runs never straddle a boundary
+        self.voted_at = window_start(timezone.now() - timezone.timedelta(hours=2)) + timezone.timedelta(minutes=30)
+    
+    def create_members(self, prefix, count, wallet, fresh=True):
+        """Create verified members, verified just now or a month ago."""
+        users = []
+        for index in range(count):
+            user = User.objects.create_user(username=f'{prefix}{index}')
+            Member.objects.create(
+                user=user, wallet_address=wallet(index),
+                verification_status=Member.VerificationStatus.VERIFIED
+            )
+            users.append(user)
+        if not fresh:
+            Member.objects.filter(user__in=users).update(
+                verified_at=timezone.now() - timezone.timedelta(days=30)
+            )
+        return users
+    
+    def vote(self, voters, vote_count=1, is_for=True, settled=True):
+        """Record votes by the given voters."""
+        votes = Vote.objects.bulk_create([
+            Vote(proposal=self.proposal, voter=voter, vote_count=vote_count, is_for=is_for)
+            for voter in voters
+        ])
+        if settled:
+            Vote.objects.filter(pk__in=[vote.pk for vote in votes]).update(created_at=self.voted_at)
+    
+    def test_coordinated_burst_is_flagged(self):
+        """Test that fresh members voting alike from similar wallets are queued."""
+        sybils = self.create_members('sybil', 12, lambda i: f'0xDEADBE{i:034x}')
+        self.vote(sybils, vote_count=3)
+        
+        processed, flagged = detect_coordinated_voting()
+        self.assertEqual(processed, 12)
+        self.assertEqual(flagged, 3)
+        
+        findings = dict(SuspiciousVotingWindow.objects.values_list('reason', 'detail'))
+        self.assertEqual(findings, {
+            SuspiciousVotingWindow.Reason.FRESH_MEMBER_BURST: 'FOR',
+            SuspiciousVotingWindow.Reason.VOTE_COUNT_CLUSTER: '3',
+            SuspiciousVotingWindow.Reason.WALLET_PREFIX_CLUSTER: 'deadbe',
+        })
+        self.assertTrue(all(
+            window.flagged_votes == 12 and window.window_votes == 12
+            for window in SuspiciousVotingWindow.objects.all()
+        ))
+    
+    def test_organic_votes_are_not_flagged(self):
+        """Test that established members with distinct wallets pass."""
+        members = self.create_members('member', 20, lambda i: f'0x{i:02x}{i * 7919:038x}', fresh=False)
+        self.vote(members[:12], is_for=True)
+        self.vote(members[12:], is_for=False)
+        
+        self.assertEqual(detect_coordinated_voting(), (20, 0))
+        self.assertFalse(SuspiciousVotingWindow.objects.exists())
+    
+    def test_windows_accumulate_across_runs(self):
+        """Test that window statistics survive between runs and votes are read once."""
+        sybils = self.create_members('sybil', 12, lambda i: f'0x{i:02x}{i:038x}')
+        self.vote(sybils[:6], is_for=False)
+        self.assertEqual(detect_coordinated_voting(), (6, 0))
+        
+        self.vote(sybils[6:], is_for=False)
+        self.assertEqual(detect_coordinated_voting(), (6, 1))
+        self.assertEqual(
+            SuspiciousVotingWindow.objects.get().reason, SuspiciousVotingWindow.Reason.FRESH_MEMBER_BURST
+        )
+        self.assertEqual(detect_coordinated_voting(), (0, 0))
+        self.assertEqual(VoteStreamCursor.objects.get().last_vote_id, Vote.objects.latest('pk').pk)
+    
+    def test_retried_batches_are_counted_once(self):
+        """Test that a retried batch is counted once and re-flags are not counted again."""
+        sybils = self.create_members('sybil', 14, lambda i: f'0x{i:02x}{i:038x}')
+        self.vote(sybils[:6])
+        with mock.patch.object(VoteStreamCursor, 'save', side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                detect_coordinated_voting()
+        self.assertEqual(detect_coordinated_voting(), (6, 0))
+        
+        self.vote(sybils[6:12])
+        self.assertEqual(detect_coordinated_voting(), (6, 1))
+        self.vote(sybils[12:])
+        self.assertEqual(detect_coordinated_voting(), (2, 0))
+        self.assertEqual(SuspiciousVotingWindow.objects.get().flagged_votes, 14)
+    
+    def test_unsettled_votes_wait_for_the_next_run(self):
+        """Test that votes newer than the lag are left for a later run."""
+        self.vote(self.create_members('member', 3, lambda i: f'0x{i:040x}'), settled=False)
+        self.assertEqual(detect_coordinated_voting(), (0, 0))
+        later = timezone.now() + timezone.timedelta(minutes=1)
+        self.assertEqual(detect_coordinated_voting(now=later), (3, 0))
+    
+    def test_heavy_hitters_stay_bounded(self):
+        """Test that the summary keeps a frequent value among many distinct ones."""
+        summary = HeavyHitters(4)
+        for value in range(1000):
+            summary.add(value)
+            summary.add('frequent')
+        self.assertLessEqual(len(summary.counters), 4)
+        self.assertEqual(summary.most_common()[0], 'frequent')
+    
+    def test_review_queue(self):
+        """Test that staff can confirm or dismiss a flagged window once."""
+        window = SuspiciousVotingWindow.objects.create(
+            proposal=self.proposal, window_start=timezone.now(), window_end=timezone.now(),
+            reason=SuspiciousVotingWindow.Reason.WALLET_PREFIX_CLUSTER, detail='deadbe'
+        )
+        client = APIClient()
+        client.force_authenticate(user=self.proposer)
+        url = f'/api/v1/governance/suspicious-voting-windows/{window.id}/confirm/'
+        self.assertEqual(client.post(url).status_code, status.HTTP_403_FORBIDDEN)
+        
+        reviewer = User.objects.create_user(username='reviewer', is_staff=True)
+        client.force_authenticate(user=reviewer)
+        response = client.post(url)
+        self.assertEqual(response.data['status'], SuspiciousVotingWindow.Status.CONFIRMED)
+        self.assertEqual(client.post(url).status_code, status.HTTP_400_BAD_REQUEST)
+        
+        window.refresh_from_db()
+        self.assertEqual(window.reviewed_by, reviewer)
+    
+    def test_verified_at_follows_status(self):
+        """Test that members record when they were verified."""
+        member = Member.objects.create(user=self.proposer, wallet_address='0xabc')
+        self.assertIsNone(member.verified_at)
+        
+        member.verification_status = Member.VerificationStatus.VERIFIED
+        member.save()
+        verified_at = member.verified_at
+        self.assertIsNotNone(verified_at)
+        member.save()
+        self.assertEqual(member.verified_at, verified_at)
+        
+        member.verification_status = Member.VerificationStatus.REJECTED
+        member.save()
+        self.assertIsNone(member.verified_at)
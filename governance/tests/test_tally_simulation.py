@@ -0,0 +1,113 @@
+"""
+Tests for the what-if tally simulator in the analytics app.
+"""
+
+from io import StringIO
+
+from django.test import TestCase, override_settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from analytics.simulation import TallySimulator
+from governance.models import Proposal, Vote
+
+
+class TallySimulationTest(TestCase):
+    """Test that simulated outcomes match the end_voting rules."""
+    
+    def setUp(self):
+        """Set up finished proposals with a spread of tallies."""
+        self.proposer = User.objects.create_user(username='proposer', password='password123')
+        self.voters = [
+            User.objects.create_user(username=f'voter{i}', password='password123') for i in range(4)
+        ]
+        
+        # (votes for, votes against) per voter, per proposal
+        ballots = [
+            [(10, 0), (10, 0), (0, 5), (5, 0)],
+            [(30, 0), (0, 10), (0, 5), (0, 0)],
+            [(5, 0), (0, 0), (0, 0), (0, 0)],
+            [(20, 0), (10, 0), (0, 10), (0, 10)],
+        ]
+        self.proposals = []
+        for i, proposal_ballots in enumerate(ballots):
+            proposal = Proposal.objects.create(
+                title=f'Finished {i}',
+                description='Simulation test',
+                rationale='Testing',
+                implementation_details='None',
+                timeline='None',
+                proposer=self.proposer,
+                status=Proposal.Status.APPROVED,
+                total_voting_power=100
+            )
+            for voter, (votes_for, votes_against) in zip(self.voters, proposal_ballots):
+                if votes_for or votes_against:
+                    Vote.objects.create(
+                        proposal=proposal, voter=voter, vote_count=votes_for or votes_against,
+                        vote_cost=0, is_for=bool(votes_for)
+                    )
+            self.proposals.append(proposal)
+        
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.proposer)
+    
+    def replay(self, quorum, threshold, max_power):
+        """Count approvals by running end_voting on copies of each proposal."""
+        approved = 0
+        with override_settings(PROPOSAL_QUORUM_PERCENTAGE=quorum, PROPOSAL_APPROVAL_THRESHOLD=threshold):
+            for proposal in self.proposals:
+                votes = proposal.votes.filter(vote_count__lte=proposal.total_voting_power * max_power / 100)
+                copy = Proposal(
+                    pk=proposal.pk, total_voting_power=proposal.total_voting_power,
+                    total_votes_for=sum(v.vote_count for v in votes if v.is_for),
+                    total_votes_against=sum(v.vote_count for v in votes if not v.is_for)
+                )
+                copy.merge_vote_shards = lambda: None
+                copy.save = lambda *args, **kwargs: None
+                approved += copy.end_voting()
+        return approved
+    
+    def test_grid_matches_end_voting_rules(self):
+        """Test that every grid cell agrees with a direct end_voting replay."""
+        quorums, thresholds, limits = [10, 25, 40], [50, 70, 90], [15, 25, 100]
+        result = TallySimulator.load().run(quorums, thresholds, limits)
+        
+        rows = list(result.rows())
+        self.assertEqual(len(rows), 27)
+        for row in rows:
+            expected = self.replay(
+                row['quorum_percentage'], row['approval_threshold'], row['max_voting_power_percentage']
+            )
+            self.assertEqual(row['approved'], expected, row)
+            self.assertEqual(row['rejected'], 4 - expected)
+            # All four proposals were recorded as approved
+            self.assertEqual(row['changed_outcomes'], 4 - expected)
+    
+    def test_simulation_endpoint(self):
+        """Test the simulation endpoint with default and explicit axes."""
+        response = self.client.post('/api/v1/analytics/tally-simulations/', {
+            'quorum_percentages': [10, 40], 'approval_thresholds': [70]
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['proposals'], 4)
+        self.assertEqual(response.data['votes'], 12)
+        self.assertEqual([row['max_voting_power_percentage'] for row in response.data['results']], [25.0, 25.0])
+    
+    @override_settings(TALLY_SIMULATION_MAX_COMBINATIONS=4)
+    def test_simulation_endpoint_caps_grid_size(self):
+        """Test that oversized grids are rejected."""
+        response = self.client.post('/api/v1/analytics/tally-simulations/', {
+            'quorum_percentages': [10, 20, 30], 'approval_thresholds': [50, 70]
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_simulate_tallies_command(self):
+        """Test that the command prints one line per combination."""
+        out = StringIO()
+        call_command('simulate_tallies', '--quorum', '10:40:15', '--threshold', '70', stdout=out)
+        lines = out.getvalue().strip().splitlines()
+        self.assertEqual(len(lines), 5)
+        self.assertTrue(lines[-1].startswith('Simulated 3 combinations over 4 proposals'))
@@ -0,0 +1,115 @@
+"""
+Tests for the live vote tally Server-Sent Events stream.
+"""
+
+import asyncio
+import json
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.test import TestCase
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+from governance import streams
+from governance.models import Proposal, Vote
+
+
+def parse_event(chunk):
+    """Split a Server-Sent Events message into its name and JSON payload."""
+    if isinstance(chunk, bytes):
+        chunk = chunk.decode()
+    event, data = chunk.strip().split('\n')
+    return event[len('event: '):], json.loads(data[len('data: '):])
+
+
+class TallyStreamTest(TestCase):
+    """Test the tally broadcaster and the streaming endpoint."""
+    
+    def setUp(self):
+        """Set up test data."""
+        self.user = User.objects.create_user(username='watcher', password='password123')
+        self.voter = User.objects.create_user(username='voter', password='password123')
+        now = timezone.now()
+        self.proposal = Proposal.objects.create(
+            title='Streamed Proposal',
+            description='Stream test',
+            rationale='Testing',
+            implementation_details='None',
+            timeline='None',
+            proposer=self.user,
+            status=Proposal.Status.VOTING,
+            voting_start_time=now,
+            voting_end_time=now + timezone.timedelta(days=7),
+            total_voting_power=1000,
+            total_votes_for=7
+        )
+        self.url = f'/api/v1/governance/proposals/{self.proposal.id}/stream/'
+        self.async_client.force_login(self.user)
+    
+    def cast_and_commit(self):
+        """Record a vote and run its on-commit publish callbacks."""
+        with self.captureOnCommitCallbacks(execute=True):
+            Vote.objects.create(
+                proposal=self.proposal, voter=self.voter, vote_count=3, vote_cost=9, is_for=False
+            )
+    
+    async def test_stream_sends_snapshot_then_deltas(self):
+        """Test that a subscriber gets the current tallies and then each delta."""
+        stream = streams.get_broadcaster().stream(self.proposal.id)
+        try:
+            event, data = parse_event(await stream.__anext__())
+            self.assertEqual(event, 'snapshot')
+            self.assertEqual((data['total_votes_for'], data['total_votes_against']), (7, 0))
+            
+            await sync_to_async(self.cast_and_commit)()
+            event, data = parse_event(await asyncio.wait_for(stream.__anext__(), timeout=1))
+            self.assertEqual(event, 'delta')
+            self.assertEqual(data, {'proposal': self.proposal.id, 'votes_for': 0, 'votes_against': 3})
+        finally:
+            await stream.aclose()
+    
+    async def test_subscribers_share_one_snapshot_query(self):
+        """Test that many watchers of a proposal trigger a single snapshot load."""
+        broadcaster = streams.TallyBroadcaster(streams.InMemoryBroadcastBackend())
+        with mock.patch.object(
+            streams, 'load_tally_snapshot', wraps=streams.load_tally_snapshot
+        ) as load:
+            subscribers = [broadcaster.stream(self.proposal.id) for _ in range(50)]
+            try:
+                await asyncio.gather(*(stream.__anext__() for stream in subscribers))
+            finally:
+                for stream in subscribers:
+                    await stream.aclose()
+        self.assertEqual(load.call_count, 1)
+        self.assertIsNone(broadcaster._listener)
+    
+    def test_redis_publish_times_out(self):
+        """Test that the Redis publish client is given short socket timeouts."""
+        backend = streams.RedisBroadcastBackend('redis://localhost:6379/2', timeout=0.1)
+        with mock.patch.object(streams.redis.Redis, 'from_url') as from_url:
+            backend.publish(streams.channel_name(self.proposal.id), '{}')
+            backend.publish(streams.channel_name(self.proposal.id), '{}')
+        from_url.assert_called_once_with(
+            'redis://localhost:6379/2', socket_timeout=0.1, socket_connect_timeout=0.1
+        )
+        self.assertEqual(from_url.return_value.publish.call_count, 2)
+    
+    async def test_stream_endpoint(self):
+        """Test the endpoint's event stream, authentication and missing proposals."""
+        response = await self.async_client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        content = response.streaming_content
+        try:
+            event, data = parse_event(await content.__anext__())
+        finally:
+            await content.aclose()
+        self.assertEqual((event, data['proposal']), ('snapshot', self.proposal.id))
+        
+        response = await self.async_client.get('/api/v1/governance/proposals/999999/stream/')
+        self.assertEqual(response.status_code, 404)
+        
+        await sync_to_async(self.async_client.logout)()
+        response = await self.async_client.get(self.url)
+        self.assertEqual(response.status_code, 401)
@@ -0,0 +1,122 @@
+"""
+Tests for the incrementally maintained token concentration metrics.
+"""
+
+import random
+from io import StringIO
+
+from django.test import TestCase
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from analytics.concentration import compute_metrics, current_metrics, rebuild_buckets, seed_buckets
+from analytics.models import BalanceBucket, TokenConcentrationSnapshot
+from analytics.tasks import snapshot_token_concentration
+from governance.models import GovernanceToken
+
+
+def exact_gini(balances):
+    """Return the Gini coefficient of a list of balances from a full sort."""
+    balances = sorted(balances)
+    weighted = sum((2 * rank - len(balances) - 1) * balance for rank, balance in enumerate(balances, 1))
+    return weighted / (len(balances) * sum(balances))
+
+
+class TokenConcentrationTest(TestCase):
+    """Test that the histogram follows balance changes and yields the metrics."""
+    
+    def setUp(self):
+        """Set up test data."""
+        self.users = [User.objects.create_user(username=f'holder{i}') for i in range(10)]
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.users[0])
+    
+    def create_tokens(self, balances):
+        """Create one token per balance through the model save path."""
+        return [
+            GovernanceToken.objects.create(holder=user, balance=balance)
+            for user, balance in zip(self.users, balances)
+        ]
+    
+    def bucket_rows(self):
+        """Return the non-empty histogram buckets."""
+        return list(BalanceBucket.objects.filter(holder_count__gt=0).values_list(
+            'bucket', 'holder_count', 'balance_sum', 'balance_square_sum'
+        ))
+    
+    def test_histogram_follows_balance_changes(self):
+        """Test that creates, edits and deletes match a rebuild from a full scan."""
+        tokens = self.create_tokens([100, 200, 300, 400])
+        tokens[0].balance = 5000
+        tokens[0].save()
+        tokens[1].balance = 0
+        tokens[1].save()
+        tokens[2].delete()
+        
+        maintained = self.bucket_rows()
+        self.assertEqual(sum(row[1] for row in maintained), 2)
+        self.assertEqual(sum(row[2] for row in maintained), 5400)
+        
+        call_command('rebuild_balance_buckets', stdout=StringIO())
+        self.assertEqual(self.bucket_rows(), maintained)
+    
+    def test_metrics_for_equal_and_whale_distributions(self):
+        """Test the metrics at the two ends of the concentration scale."""
+        equal = compute_metrics([(4, 400, 4 * 100.0 ** 2)])
+        self.assertAlmostEqual(equal.gini_coefficient, 0)
+        self.assertAlmostEqual(equal.herfindahl_index, 2500)
+        self.assertEqual(equal.nakamoto_coefficient, 3)
+        
+        self.create_tokens([1] * 9 + [991])
+        whale = current_metrics()
+        self.assertEqual((whale.holder_count, whale.total_supply), (10, 1000))
+        self.assertAlmostEqual(whale.gini_coefficient, exact_gini([1] * 9 + [991]))
+        self.assertAlmostEqual(whale.herfindahl_index, (991 ** 2 + 9) / 100)
+        self.assertEqual(whale.nakamoto_coefficient, 1)
+    
+    def test_gini_approximation_is_close(self):
+        """Test the bucketed Gini against an exact one on a skewed distribution."""
+        rng = random.Random(7)
+        balances = [int(rng.paretovariate(1.2) * 100) for _ in range(10)]
+        self.create_tokens(balances)
+        
+        self.assertAlmostEqual(current_metrics().gini_coefficient, exact_gini(balances), delta=0.02)
+    
+    def test_current_and_history_endpoints(self):
+        """Test the live metrics and the snapshot history."""
+        self.create_tokens([10, 20, 30, 940])
+        snapshot_token_concentration()
+        
+        response = self.client.get('/api/v1/analytics/token-concentration/current/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['holder_count'], 4)
+        self.assertEqual(response.data['nakamoto_coefficient'], 1)
+        
+        response = self.client.get('/api/v1/analytics/token-concentration/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'][0]['total_supply'], 1000)
+        self.assertEqual(TokenConcentrationSnapshot.objects.count(), 1)
+    
+    def test_unbuilt_histogram_is_rebuilt_before_use(self):
+        """Test that holders from before the histogram existed are counted."""
+        tokens = self.create_tokens([10, 20, 30, 940])
+        BalanceBucket.objects.all().delete()
+        seed_buckets()
+        self.assertEqual(sum(row[1] for row in self.bucket_rows()), 4)
+        
+        # Deltas applied to a histogram that was never built go negative
+        BalanceBucket.objects.all().delete()
+        tokens[0].balance = 50
+        tokens[0].save()
+        self.assertTrue(BalanceBucket.objects.filter(holder_count__lt=0).exists())
+        
+        snapshot = TokenConcentrationSnapshot.objects.get(pk=snapshot_token_concentration())
+        self.assertEqual((snapshot.holder_count, snapshot.total_supply), (4, 1040))
+        self.assertFalse(BalanceBucket.objects.filter(holder_count__lt=0).exists())
+        
+        maintained = self.bucket_rows()
+        rebuild_buckets()
+        self.assertEqual(self.bucket_rows(), maintained)
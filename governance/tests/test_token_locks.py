@@ -0,0 +1,54 @@
+"""
+Tests for the expired token lock sweeper.
+"""
+
+from django.test import TestCase
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+from governance.models import GovernanceToken, TokenSupply
+from governance.tasks import release_expired_token_locks
+
+
+class TokenLockSweeperTest(TestCase):
+    """Test the release of expired governance token locks."""
+
+    def setUp(self):
+        """Set up test data."""
+        now = timezone.now()
+        self.expired = []
+        for i in range(5):
+            user = User.objects.create_user(username=f'expired{i}', password='password123')
+            self.expired.append(GovernanceToken.objects.create(
+                holder=user, balance=10, is_locked=True, locked_until=now - timezone.timedelta(hours=1)
+            ))
+        user = User.objects.create_user(username='active', password='password123')
+        self.active = GovernanceToken.objects.create(
+            holder=user, balance=10, is_locked=True, locked_until=now + timezone.timedelta(days=1)
+        )
+    
+    def test_sweeper_releases_only_expired_locks(self):
+        """Test that expired locks are released in pk batches and live ones kept."""
+        self.assertEqual(TokenSupply.current().total_locked, 60)
+        
+        self.assertEqual(release_expired_token_locks(batch_size=2), 5)
+        
+        for token in self.expired:
+            token.refresh_from_db()
+            self.assertFalse(token.is_locked)
+            self.assertIsNone(token.locked_until)
+        self.active.refresh_from_db()
+        self.assertTrue(self.active.is_locked)
+        self.assertEqual(TokenSupply.current().total_locked, 10)
+        self.assertEqual(TokenSupply.aggregate_totals(), (60, 10))
+        
+        self.assertEqual(release_expired_token_locks(), 0)
+    
+    def test_released_tokens_can_be_delegated(self):
+        """Test that a token is delegable again once its lock is swept."""
+        delegate = User.objects.create_user(username='delegate', password='password123')
+        GovernanceToken.release_expired_locks()
+        
+        token = GovernanceToken.objects.get(pk=self.expired[0].pk)
+        token.delegate(delegate)
+        self.assertEqual(token.delegated_to, delegate)
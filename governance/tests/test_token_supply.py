@@ -0,0 +1,85 @@
+"""
+Tests for the maintained governance token supply counter.
+"""
+
+from io import StringIO
+
+from django.test import TestCase
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from governance.models import Proposal, GovernanceToken, TokenSupply
+from governance.services import cast_vote
+
+
+class TokenSupplyTest(TestCase):
+    """Test that the supply counter follows every balance mutation."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.alice = User.objects.create_user(username='alice', password='password123')
+        self.bob = User.objects.create_user(username='bob', password='password123')
+        self.alice_token = GovernanceToken.objects.create(holder=self.alice, balance=500)
+        self.bob_token = GovernanceToken.objects.create(holder=self.bob, balance=9500)
+        
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.alice)
+    
+    def assertSupply(self, total_supply, total_locked):
+        """Assert the counter matches and agrees with a full aggregate."""
+        supply = TokenSupply.current()
+        self.assertEqual((supply.total_supply, supply.total_locked), (total_supply, total_locked))
+        self.assertEqual(TokenSupply.aggregate_totals(), (total_supply, total_locked))
+    
+    def test_counter_tracks_saves_locks_and_deletes(self):
+        """Test that creates, balance edits, locks and deletes adjust the counter."""
+        self.assertSupply(10000, 0)
+        
+        self.alice_token.balance = 700
+        self.alice_token.save()
+        self.assertSupply(10200, 0)
+        
+        self.bob_token.lock_for_voting(days=1)
+        self.assertSupply(10200, 9500)
+        
+        self.bob_token.delete()
+        self.assertSupply(700, 0)
+    
+    def test_cast_vote_moves_spent_balance_into_locked(self):
+        """Test that casting a vote reduces supply and locks the remainder."""
+        now = timezone.now()
+        proposal = Proposal.objects.create(
+            title='Supply Proposal', description='Supply', rationale='Testing',
+            implementation_details='None', timeline='None', proposer=self.bob,
+            status=Proposal.Status.VOTING, voting_start_time=now,
+            voting_end_time=now + timezone.timedelta(days=7), total_voting_power=10000
+        )
+        cast_vote(self.alice, proposal, 10)
+        self.assertSupply(9900, 400)
+    
+    def test_start_voting_reads_counter_without_aggregating(self):
+        """Test that start_voting snapshots the maintained supply."""
+        proposal = Proposal.objects.create(
+            title='Snapshot Proposal', description='Supply', rationale='Testing',
+            implementation_details='None', timeline='None', proposer=self.alice,
+            status=Proposal.Status.DISCUSSION,
+            discussion_start_time=timezone.now() - timezone.timedelta(days=15)
+        )
+        TokenSupply.current()
+        
+        with self.assertNumQueries(4):
+            response = self.client.post(f'/api/v1/governance/proposals/{proposal.id}/start_voting/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        proposal.refresh_from_db()
+        self.assertEqual(proposal.total_voting_power, 10000)
+    
+    def test_reconcile_corrects_drift(self):
+        """Test that reconciliation resets a drifted counter."""
+        GovernanceToken.objects.filter(pk=self.bob_token.pk).update(balance=0)
+        self.assertEqual(TokenSupply.current().total_supply, 10000)
+        
+        call_command('reconcile_token_supply', stdout=StringIO())
+        self.assertSupply(500, 0)
@@ -0,0 +1,136 @@
+"""
+Tests for counted multisig approvals and asynchronous treasury execution.
+"""
+
+from decimal import Decimal
+
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth.models import User
+from django.db import connection
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from governance.models import Guardian
+from treasury.models import Asset, AssetBalance, TreasuryTransaction, TransactionApproval, TreasuryMetric
+from treasury.tasks import execute_treasury_transaction
+
+
+class TreasuryApprovalTest(TestCase):
+    """Test the approval counters, the threshold and exactly-once execution."""
+    
+    def setUp(self):
+        """Set up test data."""
+        self.proposer = User.objects.create_user(username='proposer', password='password123')
+        self.guardians = []
+        for i in range(9):
+            user = User.objects.create_user(username=f'guardian{i}', password='password123')
+            Guardian.objects.create(user=user, term_start_date='2023-01-01', term_end_date='2023-04-01')
+            self.guardians.append(user)
+        
+        self.asset = Asset.objects.create(name='Ether', symbol='ETH', asset_type=Asset.AssetType.CRYPTOCURRENCY)
+        self.transaction = TreasuryTransaction.objects.create(
+            asset=self.asset, amount=Decimal('10'), usd_value=Decimal('20000'),
+            transaction_type=TreasuryTransaction.TransactionType.DEPOSIT, proposer=self.proposer
+        )
+        self.client = APIClient()
+    
+    def decide(self, guardian, action='approve'):
+        """Post a guardian's decision on the transaction."""
+        self.client.force_authenticate(user=guardian)
+        return self.client.post(f'/api/v1/treasury/transactions/{self.transaction.id}/{action}/')
+    
+    def test_threshold_approval_executes_once_after_commit(self):
+        """Test that crossing the threshold approves and executes exactly once."""
+        for guardian in self.guardians[:4]:
+            self.assertEqual(self.decide(guardian).status_code, status.HTTP_200_OK)
+        self.transaction.refresh_from_db()
+        self.assertEqual(self.transaction.approval_count, 4)
+        self.assertEqual(self.transaction.status, TreasuryTransaction.Status.PENDING)
+        
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            response = self.decide(self.guardians[4])
+        self.assertEqual(response.data['status'], TreasuryTransaction.Status.APPROVED)
+        # The execution task, then the metric snapshot and summary invalidation
+        # scheduled by its balance change
+        self.assertEqual(len(callbacks), 3)
+        
+        self.transaction.refresh_from_db()
+        self.assertEqual(self.transaction.status, TreasuryTransaction.Status.EXECUTED)
+        self.assertEqual(AssetBalance.objects.get(asset=self.asset).balance, Decimal('10'))
+        self.assertEqual(TreasuryMetric.objects.count(), 1)
+        
+        # A redelivered task, or one with a stale key, changes nothing
+        self.assertFalse(execute_treasury_transaction(self.transaction.id, str(self.transaction.execution_key)))
+        self.assertFalse(execute_treasury_transaction(self.transaction.id, '00000000-0000-0000-0000-000000000000'))
+        self.assertEqual(AssetBalance.objects.get(asset=self.asset).balance, Decimal('10'))
+        
+        # Late approvals are refused and cannot re-enqueue execution
+        self.assertEqual(self.decide(self.guardians[5]).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIsNone(TreasuryTransaction.apply_approval_delta(self.transaction.id, approvals=1))
+    
+    def test_approval_cost_is_constant(self):
+        """Test that an approval issues the same queries however many exist."""
+        with CaptureQueriesContext(connection) as first:
+            self.decide(self.guardians[0])
+        with CaptureQueriesContext(connection) as later:
+            self.decide(self.guardians[3])
+        self.assertEqual(len(first), len(later))
+        self.assertFalse(any('COUNT(' in query['sql'] for query in later.captured_queries))
+    
+    def test_rejections_and_duplicate_votes(self):
+        """Test that enough rejections reject and guardians vote once."""
+        self.assertEqual(self.decide(self.guardians[0]).status_code, status.HTTP_200_OK)
+        self.assertEqual(self.decide(self.guardians[0]).status_code, status.HTTP_400_BAD_REQUEST)
+        for guardian in self.guardians[1:6]:
+            self.decide(guardian, 'reject')
+        
+        self.transaction.refresh_from_db()
+        self.assertEqual((self.transaction.approval_count, self.transaction.rejection_count), (1, 5))
+        self.assertEqual(self.transaction.status, TreasuryTransaction.Status.REJECTED)
+        
+        self.client.force_authenticate(user=self.proposer)
+        response = self.client.post(f'/api/v1/treasury/transactions/{self.transaction.id}/approve/')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+    
+    def test_rejection_counts_the_active_guardians(self):
+        """Test that a transaction stays pending while active guardians can still approve it."""
+        for i in range(9, 12):
+            user = User.objects.create_user(username=f'guardian{i}', password='password123')
+            Guardian.objects.create(user=user, term_start_date='2023-01-01', term_end_date='2023-04-01')
+        Guardian.objects.filter(user=self.guardians[8]).update(is_active=False)
+        
+        for guardian in self.guardians[:6]:
+            self.decide(guardian, 'reject')
+        self.transaction.refresh_from_db()
+        self.assertEqual(self.transaction.status, TreasuryTransaction.Status.PENDING)
+        
+        self.decide(self.guardians[6], 'reject')
+        self.transaction.refresh_from_db()
+        self.assertEqual(self.transaction.status, TreasuryTransaction.Status.REJECTED)
+    
+    def test_changed_and_deleted_approvals_adjust_counters(self):
+        """Test that flipping or deleting an approval moves the counters."""
+        approval = TransactionApproval.objects.create(
+            transaction=self.transaction, guardian=self.guardians[0].guardian
+        )
+        approval = TransactionApproval.objects.get(pk=approval.pk)
+        approval.approved = False
+        approval.save()
+        self.transaction.refresh_from_db()
+        self.assertEqual((self.transaction.approval_count, self.transaction.rejection_count), (0, 1))
+        
+        approval.delete()
+        self.transaction.refresh_from_db()
+        self.assertEqual((self.transaction.approval_count, self.transaction.rejection_count), (0, 0))
+    
+    def test_approval_endpoint_records_the_guardian(self):
+        """Test that approvals created through the approvals endpoint belong to the caller."""
+        self.client.force_authenticate(user=self.guardians[0])
+        response = self.client.post('/api/v1/treasury/approvals/', {
+            'transaction_id': self.transaction.id, 'approved': True
+        })
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(TransactionApproval.objects.get().guardian.user, self.guardians[0])
+        self.transaction.refresh_from_db()
+        self.assertEqual(self.transaction.approval_count, 1)
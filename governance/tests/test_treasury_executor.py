@@ -0,0 +1,95 @@
+"""
+Tests for the batched treasury transaction executor.
+"""
+
+from decimal import Decimal
+
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth.models import User
+from django.db import connection
+
+from treasury.executor import execute_approved_transactions
+from treasury.models import Asset, AssetBalance, TreasuryTransaction, TreasuryMetric, TreasuryMetricState
+from treasury.tasks import execute_approved_treasury_transactions
+
+Type = TreasuryTransaction.TransactionType
+
+
+class TreasuryExecutorTest(TestCase):
+    """Test that approved transactions are netted per asset and executed once."""
+    
+    def setUp(self):
+        """Set up test data."""
+        self.proposer = User.objects.create_user(username='proposer', password='password123')
+        self.eth = Asset.objects.create(name='Ether', symbol='ETH', asset_type=Asset.AssetType.CRYPTOCURRENCY)
+        self.usdc = Asset.objects.create(name='USD Coin', symbol='USDC', asset_type=Asset.AssetType.STABLECOIN,
+                                         is_stable=True)
+        AssetBalance.objects.create(asset=self.eth, balance=Decimal('100'), usd_value=Decimal('200000'))
+    
+    def approved(self, transaction_type, amount, usd_value, **kwargs):
+        """Create an approved transaction."""
+        return TreasuryTransaction.objects.create(
+            asset=kwargs.pop('asset', self.eth), amount=Decimal(amount), usd_value=Decimal(usd_value),
+            transaction_type=transaction_type, status=TreasuryTransaction.Status.APPROVED,
+            proposer=self.proposer, **kwargs
+        )
+    
+    def balance(self, asset):
+        """Return the (balance, usd_value) of an asset."""
+        return AssetBalance.objects.values_list('balance', 'usd_value').get(asset=asset)
+    
+    def test_batch_nets_deltas_per_asset(self):
+        """Test deposits, withdrawals and swaps applied as net deltas."""
+        deposit = self.approved(Type.DEPOSIT, '5', '10000')
+        withdrawal = self.approved(Type.WITHDRAWAL, '2', '4000')
+        swap = self.approved(Type.SWAP, '1', '2000', destination_asset=self.usdc,
+                             destination_amount=Decimal('2000'))
+        broken = self.approved(Type.SWAP, '1', '2000', destination_asset=self.usdc)
+        pending = TreasuryTransaction.objects.create(
+            asset=self.eth, amount=Decimal('50'), usd_value=Decimal('1'),
+            transaction_type=Type.DEPOSIT, proposer=self.proposer
+        )
+        
+        result = execute_approved_transactions()
+        self.assertEqual(sorted(result.executed), [deposit.pk, withdrawal.pk, swap.pk])
+        self.assertEqual(result.failed, [broken.pk])
+        
+        self.assertEqual(self.balance(self.eth), (Decimal('102'), Decimal('204000')))
+        self.assertEqual(self.balance(self.usdc), (Decimal('2000'), Decimal('2000')))
+        self.assertTrue(TreasuryMetricState.current().dirty)
+        self.assertEqual(TreasuryMetric.objects.count(), 0)
+        
+        statuses = dict(TreasuryTransaction.objects.values_list('pk', 'status'))
+        self.assertEqual(statuses[deposit.pk], TreasuryTransaction.Status.EXECUTED)
+        self.assertEqual(statuses[broken.pk], TreasuryTransaction.Status.FAILED)
+        self.assertEqual(statuses[pending.pk], TreasuryTransaction.Status.PENDING)
+        
+        # A second run finds nothing left to apply
+        self.assertEqual(execute_approved_treasury_transactions(), 0)
+        self.assertEqual(self.balance(self.eth), (Decimal('102'), Decimal('204000')))
+    
+    def test_query_count_is_independent_of_batch_size(self):
+        """Test that a larger batch on the same assets costs no extra queries."""
+        def run(count):
+            for _ in range(count):
+                self.approved(Type.DEPOSIT, '1', '2000')
+            with CaptureQueriesContext(connection) as context:
+                execute_approved_transactions()
+            return len(context)
+        
+        self.assertEqual(run(2), run(20))
+        self.assertEqual(self.balance(self.eth)[0], Decimal('122'))
+    
+    def test_execute_runs_a_single_transaction(self):
+        """Test that execute() only applies its own transaction, once."""
+        first = self.approved(Type.EXPENSE, '10', '20000')
+        other = self.approved(Type.DEPOSIT, '1', '2000')
+        
+        self.assertTrue(first.execute())
+        self.assertEqual(first.status, TreasuryTransaction.Status.EXECUTED)
+        self.assertFalse(first.execute())
+        self.assertEqual(self.balance(self.eth)[0], Decimal('90'))
+        
+        other.refresh_from_db()
+        self.assertEqual(other.status, TreasuryTransaction.Status.APPROVED)
@@ -0,0 +1,102 @@
+"""
+Tests for the incrementally maintained treasury metric rollups.
+"""
+
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.contrib.auth.models import User
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from treasury.models import TreasuryMetric, TreasuryMetricRollup
+
+Granularity = TreasuryMetricRollup.Granularity
+
+
+class TreasuryMetricRollupTest(TestCase):
+    """Test that metrics are folded into hourly, daily and weekly buckets."""
+    
+    def setUp(self):
+        """Set up test data."""
+        self.user = User.objects.create_user(username='viewer', password='password123')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+    
+    def record(self, timestamp, total, stable):
+        """Create a metric as if it had been written at the given time."""
+        with mock.patch('django.utils.timezone.now', return_value=timestamp):
+            return TreasuryMetric.objects.create(
+                total_value_usd=Decimal(total), stable_assets_value_usd=Decimal(stable),
+                volatile_assets_value_usd=Decimal(total) - Decimal(stable),
+                reserve_ratio=(Decimal(stable) / Decimal(total)).quantize(Decimal('0.0001'))
+            )
+    
+    def rollup_values(self):
+        """Return every rollup as a comparable tuple."""
+        return list(TreasuryMetricRollup.objects.order_by('granularity', 'bucket_start').values_list(
+            'granularity', 'bucket_start', 'sample_count', 'last_timestamp',
+            'min_total_value_usd', 'max_total_value_usd', 'sum_total_value_usd', 'last_total_value_usd',
+            'min_reserve_ratio', 'max_reserve_ratio', 'sum_reserve_ratio', 'last_reserve_ratio'
+        ))
+    
+    def test_metrics_fold_into_every_granularity(self):
+        """Test min, max, avg and last per bucket, and agreement with a rebuild."""
+        # Wednesday 2024-01-10
+        base = datetime(2024, 1, 10, 9, 15, tzinfo=dt_timezone.utc)
+        self.record(base, '1000', '300')
+        self.record(base + timedelta(minutes=30), '4000', '1000')
+        self.record(base + timedelta(minutes=10), '2000', '1000')
+        self.record(base + timedelta(hours=3), '3000', '600')
+        
+        hour = TreasuryMetricRollup.objects.get(
+            granularity=Granularity.HOUR, bucket_start=base.replace(minute=0)
+        )
+        self.assertEqual(hour.sample_count, 3)
+        self.assertEqual((hour.min_total_value_usd, hour.max_total_value_usd), (Decimal('1000'), Decimal('4000')))
+        self.assertEqual(hour.avg_total_value_usd, Decimal('7000') / 3)
+        self.assertEqual(hour.last_total_value_usd, Decimal('4000'))
+        self.assertEqual(hour.min_reserve_ratio, Decimal('0.25'))
+        
+        week = TreasuryMetricRollup.objects.get(granularity=Granularity.WEEK)
+        self.assertEqual(week.bucket_start, datetime(2024, 1, 8, tzinfo=dt_timezone.utc))
+        self.assertEqual(week.sample_count, 4)
+        self.assertEqual(week.last_total_value_usd, Decimal('3000'))
+        self.assertEqual(TreasuryMetricRollup.objects.filter(granularity=Granularity.HOUR).count(), 2)
+        
+        maintained = self.rollup_values()
+        self.assertEqual(TreasuryMetricRollup.rebuild(), 4)
+        self.assertEqual(self.rollup_values(), maintained)
+    
+    def test_historical_picks_the_bucket_size_from_the_range(self):
+        """Test that longer ranges are served from coarser rollups."""
+        now = timezone.now()
+        for days_ago in (400, 200, 30, 1):
+            self.record(now - timedelta(days=days_ago), '1000', '500')
+        
+        expected = {7: ('hour', 1), 90: ('day', 2), 365: ('day', 3), 1000: ('week', 4)}
+        for days, (granularity, points) in expected.items():
+            response = self.client.get(f'/api/v1/treasury/metrics/historical/?days={days}')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.data['granularity'], granularity)
+            self.assertEqual(len(response.data['results']), points)
+        
+        response = self.client.get('/api/v1/treasury/metrics/historical/?days=7&granularity=raw')
+        self.assertEqual(response.data['granularity'], 'raw')
+        self.assertFalse(response.data['truncated'])
+        self.assertEqual(len(response.data['results']), 1)
+        
+        response = self.client.get('/api/v1/treasury/metrics/historical/?days=7&granularity=month')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        
+        with override_settings(TREASURY_HISTORY_MAX_POINTS=2):
+            response = self.client.get('/api/v1/treasury/metrics/historical/?days=1000&granularity=raw')
+        self.assertTrue(response.data['truncated'])
+        self.assertEqual(
+            [item['timestamp'] for item in response.data['results']],
+            sorted(item['timestamp'] for item in response.data['results'])
+        )
+        self.assertEqual(len(response.data['results']), 2)
@@ -0,0 +1,70 @@
+"""
+Tests for the debounced treasury metric snapshotter.
+"""
+
+from datetime import timedelta
+from decimal import Decimal
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from treasury.models import Asset, AssetBalance, TreasuryMetric, TreasuryMetricState, treasury_totals
+from treasury.summary import invalidate_summary
+
+
+@override_settings(TREASURY_METRIC_SNAPSHOT_INTERVAL_SECONDS=60)
+class TreasuryMetricSnapshotTest(TestCase):
+    """Test that balance changes coalesce into one snapshot per interval."""
+    
+    def setUp(self):
+        """Set up test data."""
+        self.eth = Asset.objects.create(name='Ether', symbol='ETH', asset_type=Asset.AssetType.CRYPTOCURRENCY)
+        self.usdc = Asset.objects.create(name='USD Coin', symbol='USDC', asset_type=Asset.AssetType.STABLECOIN,
+                                         is_stable=True)
+        self.eth_balance = AssetBalance.objects.create(asset=self.eth, usd_value=Decimal('3000'))
+        AssetBalance.objects.create(asset=self.usdc, usd_value=Decimal('1000'))
+        self.now = timezone.now()
+    
+    def test_totals_come_from_one_grouped_query(self):
+        """Test the total and stable value from a single query."""
+        with self.assertNumQueries(1):
+            self.assertEqual(treasury_totals(), (Decimal('4000'), Decimal('1000')))
+    
+    def test_changes_are_coalesced_per_interval(self):
+        """Test that a burst of changes writes at most one metric per interval."""
+        metric = TreasuryMetricState.snapshot(now=self.now)
+        self.assertEqual(metric.total_value_usd, Decimal('4000'))
+        self.assertEqual(metric.reserve_ratio, Decimal('0.25'))
+        self.assertIsNone(TreasuryMetricState.snapshot(now=self.now + timedelta(seconds=120)))
+        
+        for value in ('5000', '7000', '9000'):
+            self.eth_balance.usd_value = Decimal(value)
+            self.eth_balance.save()
+        self.assertIsNone(TreasuryMetricState.snapshot(now=self.now + timedelta(seconds=30)))
+        self.assertTrue(TreasuryMetricState.current().dirty)
+        
+        metric = TreasuryMetricState.snapshot(now=self.now + timedelta(seconds=61))
+        self.assertEqual(metric.total_value_usd, Decimal('10000'))
+        self.assertEqual(TreasuryMetric.objects.count(), 2)
+        self.assertFalse(TreasuryMetricState.current().dirty)
+    
+    def test_only_the_first_change_schedules_a_snapshot(self):
+        """Test that the clean-to-dirty transition enqueues the snapshot task once."""
+        TreasuryMetricState.snapshot(now=self.now - timedelta(seconds=120))
+        
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            for value in ('5000', '7000'):
+                self.eth_balance.usd_value = Decimal(value)
+                self.eth_balance.save()
+        snapshots = [callback for callback in callbacks if callback is not invalidate_summary]
+        self.assertEqual(len(snapshots), 1)
+        self.assertEqual(TreasuryMetric.objects.latest('timestamp').total_value_usd, Decimal('8000'))
+    
+    def test_missing_state_row_is_created_dirty(self):
+        """Test that the first change ever creates the state row and schedules one snapshot."""
+        TreasuryMetricState.objects.all().delete()
+        with self.captureOnCommitCallbacks() as callbacks:
+            TreasuryMetricState.mark_dirty()
+            TreasuryMetricState.mark_dirty()
+        self.assertEqual(len(callbacks), 1)
+        self.assertTrue(TreasuryMetricState.current().dirty)
@@ -0,0 +1,90 @@
+"""
+Tests for the cached treasury balance summary.
+"""
+
+import threading
+from decimal import Decimal
+
+from django.test import TestCase, override_settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from treasury.models import Asset, AssetBalance, TreasuryMetric, TreasuryMetricState
+from treasury.summary import current_version, get_summary, summary_key
+
+
+class TreasurySummaryTest(TestCase):
+    """Test that the summary is cached per balance version and never writes."""
+    
+    def setUp(self):
+        """Set up test data."""
+        cache.clear()
+        self.user = User.objects.create_user(username='viewer', password='password123')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        
+        self.eth = Asset.objects.create(name='Ether', symbol='ETH', asset_type=Asset.AssetType.CRYPTOCURRENCY)
+        usdc = Asset.objects.create(name='USD Coin', symbol='USDC', asset_type=Asset.AssetType.STABLECOIN,
+                                    is_stable=True)
+        self.eth_balance = AssetBalance.objects.create(asset=self.eth, usd_value=Decimal('3000'))
+        AssetBalance.objects.create(asset=usdc, usd_value=Decimal('1000'))
+    
+    def test_summary_is_cached_until_a_balance_changes(self):
+        """Test one query per balance version and no metric writes."""
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/v1/treasury/balances/summary/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(Decimal(response.data['total_value_usd']), Decimal('4000'))
+        self.assertEqual(response.data['asset_count'], 2)
+        
+        with self.assertNumQueries(0):
+            self.client.get('/api/v1/treasury/balances/summary/')
+        self.assertEqual(TreasuryMetric.objects.count(), 0)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self.eth_balance.usd_value = Decimal('9000')
+            self.eth_balance.save()
+        response = self.client.get('/api/v1/treasury/balances/summary/')
+        self.assertEqual(Decimal(response.data['total_value_usd']), Decimal('10000'))
+        self.assertEqual(Decimal(response.data['reserve_ratio']), Decimal('0.1'))
+    
+    def test_asset_changes_invalidate_the_summary(self):
+        """Test that a stability flip and a cascaded asset delete refresh the summary and metrics."""
+        self.assertEqual(get_summary()['stable_assets_value_usd'], Decimal('1000'))
+        TreasuryMetricState.objects.update_or_create(pk=1, defaults={'dirty': False})
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            asset = Asset.objects.get(pk=self.eth.pk)
+            asset.is_stable = True
+            asset.save()
+        self.assertEqual(get_summary()['stable_assets_value_usd'], Decimal('4000'))
+        # The scheduled snapshot ran eagerly on commit
+        self.assertEqual(TreasuryMetric.objects.latest('timestamp').reserve_ratio, Decimal('1'))
+        
+        TreasuryMetricState.objects.update(dirty=False)
+        with self.captureOnCommitCallbacks(execute=True):
+            asset.delete()
+        summary = get_summary()
+        self.assertEqual((summary['asset_count'], summary['total_value_usd']), (1, Decimal('1000')))
+        self.assertTrue(TreasuryMetricState.current().dirty)
+    
+    @override_settings(TREASURY_SUMMARY_LOCK_SECONDS=2)
+    def test_concurrent_miss_waits_for_the_computing_request(self):
+        """Test that a miss while another request holds the lock reuses its result."""
+        key = summary_key(current_version())
+        cache.add(f'{key}:lock', True)
+        computed = {'total_value_usd': 'from the lock holder'}
+        timer = threading.Timer(0.1, cache.set, args=(key, computed))
+        timer.start()
+        
+        with self.assertNumQueries(0):
+            self.assertEqual(get_summary(), computed)
+        timer.join()
+    
+    @override_settings(TREASURY_SUMMARY_LOCK_SECONDS=0.1)
+    def test_abandoned_lock_falls_back_to_computing(self):
+        """Test that a waiter computes the summary itself if the holder never finishes."""
+        cache.add(f'{summary_key(current_version())}:lock', True)
+        self.assertEqual(get_summary()['asset_count'], 2)
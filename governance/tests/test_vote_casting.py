@@ -0,0 +1,102 @@
+"""
+Tests for the single-vote casting pipeline in the governance app.
+"""
+
+from django.test import TestCase
+from django.contrib.auth.models import User
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework import serializers, status
+
+from governance.models import Proposal, Vote, GovernanceToken, TokenCheckpoint
+from governance.services import cast_vote
+
+# Proposal lookup, SAVEPOINT, token SELECT FOR UPDATE, duplicate check,
+# balance checkpoint lookup, token UPDATE, checkpoint INSERT, supply UPDATE,
+# delegation chain lock, voting power row check, voting power UPDATE,
+# balance bucket upsert, vote INSERT, tally UPDATE, RELEASE SAVEPOINT
+CAST_VOTE_REQUEST_QUERIES = 15
+
+
+class VoteCastingTest(TestCase):
+    """Test the consolidated cast-vote service."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.voter = User.objects.create_user(username='voter', password='password123')
+        self.proposer = User.objects.create_user(username='proposer', password='password123')
+        self.other = User.objects.create_user(username='other', password='password123')
+        GovernanceToken.objects.create(holder=self.voter, balance=100)
+        GovernanceToken.objects.create(holder=self.other, balance=20000)
+        
+        now = timezone.now()
+        self.proposal = Proposal.objects.create(
+            title='Casting Proposal',
+            description='Casting test',
+            rationale='Testing',
+            implementation_details='None',
+            timeline='None',
+            proposer=self.proposer,
+            status=Proposal.Status.VOTING,
+            voting_start_time=now,
+            voting_end_time=now + timezone.timedelta(days=7),
+            total_voting_power=400
+        )
+        
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.voter)
+    
+    def test_cast_vote_charges_locks_and_tallies(self):
+        """Test that one call deducts credits, locks tokens and tallies the vote."""
+        vote = cast_vote(self.voter, self.proposal, 5, is_for=False)
+        
+        self.assertEqual(vote.vote_cost, 25)
+        token = GovernanceToken.objects.get(holder=self.voter)
+        self.assertEqual(token.balance, 75)
+        self.assertTrue(token.is_locked)
+        self.assertIsNotNone(token.locked_until)
+        self.proposal.refresh_from_db()
+        self.assertEqual(self.proposal.total_votes_against, 5)
+    
+    def test_cast_vote_rejects_rule_violations(self):
+        """Test that invalid votes leave balances untouched."""
+        cast_vote(self.voter, self.proposal, 1)
+        with self.assertRaisesMessage(serializers.ValidationError, 'already voted'):
+            cast_vote(self.voter, self.proposal, 1)
+        
+        no_tokens = User.objects.create_user(username='no_tokens', password='password123')
+        with self.assertRaisesMessage(serializers.ValidationError, 'governance tokens'):
+            cast_vote(no_tokens, self.proposal, 1)
+        
+        # 25% of the 400 total voting power caps a single vote at 100
+        with self.assertRaisesMessage(serializers.ValidationError, 'maximum voting power'):
+            cast_vote(self.other, self.proposal, 101)
+        self.assertEqual(GovernanceToken.objects.get(holder=self.other).balance, 20000)
+    
+    def test_voting_power_is_read_at_voting_start(self):
+        """Test that tokens received after voting started cannot be spent on the proposal."""
+        token = GovernanceToken.objects.get(holder=self.voter)
+        token.balance = 1000
+        token.save()
+        
+        self.assertEqual(
+            TokenCheckpoint.balance_at(self.voter.id, self.proposal.voting_start_time), 100
+        )
+        with self.assertRaisesMessage(serializers.ValidationError, 'Balance: 100'):
+            cast_vote(self.voter, self.proposal, 11)
+        
+        cast_vote(self.voter, self.proposal, 10)
+        self.assertEqual(GovernanceToken.objects.get(holder=self.voter).balance, 900)
+        self.assertEqual(TokenCheckpoint.balance_at(self.voter.id, timezone.now()), 900)
+    
+    def test_vote_endpoint_query_count(self):
+        """Test that the vote hot path issues a fixed number of queries."""
+        with self.assertNumQueries(CAST_VOTE_REQUEST_QUERIES):
+            response = self.client.post('/api/v1/governance/votes/', {
+                'proposal': self.proposal.id,
+                'vote_count': 3,
+                'is_for': True
+            })
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['vote_cost'], 9)
+        self.assertEqual(Vote.objects.filter(voter=self.voter).count(), 1)
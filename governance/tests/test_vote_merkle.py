@@ -0,0 +1,185 @@
+"""
+Tests for the incremental Merkle trees over proposal votes.
+"""
+
+from io import StringIO
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from governance import merkle
+from governance.models import Proposal, Vote, VoteMerkleTree, VoteMerkleNode
+from governance.tasks import sync_vote_merkle_trees
+
+
+def full_root(leaves):
+    """Compute a root by hashing every level of the padded tree."""
+    nodes = list(leaves)
+    for level in range(merkle.DEPTH):
+        if len(nodes) % 2:
+            nodes.append(merkle.ZERO_HASHES[level])
+        if not nodes:
+            nodes = [merkle.ZERO_HASHES[level]] * 2
+        nodes = [merkle.node_hash(nodes[i], nodes[i + 1]) for i in range(0, len(nodes), 2)]
+    return nodes[0]
+
+
+class IncrementalMerkleTreeTest(TestCase):
+    """Test the tree arithmetic without the database."""
+    
+    def test_roots_and_proofs_match_a_full_tree(self):
+        """Test that appends and proofs agree with a naive full computation."""
+        for size in (0, 1, 2, 3, 7, 8, 21):
+            leaves = [merkle.leaf_hash(1, voter, 1, True) for voter in range(size)]
+            tree = merkle.IncrementalMerkleTree()
+            stored = {}
+            for leaf in leaves:
+                for level, index, value in tree.append(leaf):
+                    stored[(level, index)] = value
+            
+            self.assertEqual(tree.root(), full_root(leaves))
+            # Only complete subtrees are stored: fewer than two nodes per leaf
+            self.assertLess(len(stored), 2 * size + 1)
+            for index, leaf in enumerate(leaves):
+                nodes = {key: stored[key] for key in tree.complete_siblings(index)}
+                path = tree.proof(index, nodes)
+                self.assertEqual(len(path), merkle.DEPTH)
+                self.assertTrue(merkle.verify_proof(leaf, index, path, tree.root()))
+    
+    def test_tampered_leaf_fails_verification(self):
+        """Test that a proof does not verify a different vote."""
+        tree = merkle.IncrementalMerkleTree()
+        leaves = [merkle.leaf_hash(1, voter, 2, True) for voter in range(5)]
+        stored = {}
+        for leaf in leaves:
+            stored.update({(level, index): value for level, index, value in tree.append(leaf)})
+        path = tree.proof(3, {key: stored[key] for key in tree.complete_siblings(3)})
+        
+        forged = merkle.leaf_hash(1, 3, 200, True)
+        self.assertFalse(merkle.verify_proof(forged, 3, path, tree.root()))
+
+
+class VoteMerkleTreeTest(TestCase):
+    """Test syncing, proofs and rebuilding of stored vote trees."""
+    
+    def setUp(self):
+        """Set up test data."""
+        self.proposer = User.objects.create_user(username='proposer', password='password123')
+        self.voters = [User.objects.create_user(username=f'voter{i}') for i in range(6)]
+        self.proposal = Proposal.objects.create(
+            title='Merkle Proposal', description='Votes', rationale='Verifiability',
+            implementation_details='None', timeline='None', proposer=self.proposer,
+            status=Proposal.Status.VOTING, total_voting_power=1000
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.voters[0])
+    
+    def vote(self, voter, vote_count=1, is_for=True):
+        """Record a vote directly."""
+        return Vote.objects.create(proposal=self.proposal, voter=voter, vote_count=vote_count, is_for=is_for)
+    
+    def expected_root(self):
+        """Return the root of the proposal's votes appended in id order."""
+        votes = Vote.objects.filter(proposal=self.proposal).order_by('pk')
+        return full_root([
+            merkle.leaf_hash(self.proposal.pk, vote.voter_id, vote.vote_count, vote.is_for)
+            for vote in votes
+        ])
+    
+    def test_sync_appends_only_pending_votes(self):
+        """Test that the task appends new votes and leaves stored nodes alone."""
+        for voter in self.voters[:3]:
+            self.vote(voter)
+        self.assertEqual(sync_vote_merkle_trees(), 3)
+        first_nodes = set(VoteMerkleNode.objects.values_list('pk', 'hash'))
+        
+        for voter in self.voters[3:]:
+            self.vote(voter, is_for=False)
+        self.assertEqual(sync_vote_merkle_trees(), 3)
+        self.assertEqual(sync_vote_merkle_trees(), 0)
+        
+        tree = VoteMerkleTree.objects.get(proposal=self.proposal)
+        self.assertEqual(tree.leaf_count, 6)
+        self.assertEqual(tree.root, self.expected_root())
+        self.assertTrue(first_nodes <= set(VoteMerkleNode.objects.values_list('pk', 'hash')))
+    
+    def test_sync_reads_votes_above_the_watermark(self):
+        """Test that sync skips votes below the watermark and holds it at unsettled votes."""
+        votes = [self.vote(voter) for voter in self.voters[:3]]
+        with override_settings(VOTE_MERKLE_SYNC_LAG_SECONDS=0):
+            self.assertEqual(VoteMerkleTree.sync(self.proposal.pk), 3)
+        tree = VoteMerkleTree.objects.get(proposal=self.proposal)
+        self.assertEqual(tree.last_vote_id, votes[-1].pk)
+        
+        # A vote younger than the lag is appended but stays above the watermark
+        self.vote(self.voters[3])
+        self.assertEqual(VoteMerkleTree.sync(self.proposal.pk), 1)
+        tree.refresh_from_db()
+        self.assertEqual(tree.leaf_count, 4)
+        self.assertEqual(tree.last_vote_id, votes[-1].pk)
+        
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(VoteMerkleTree.sync(self.proposal.pk), 0)
+        vote_queries = [query['sql'] for query in queries if 'FROM "governance_vote"' in query['sql']]
+        self.assertEqual(len(vote_queries), 1)
+        self.assertIn(f'"governance_vote"."id" > {votes[-1].pk}', vote_queries[0])
+        self.assertEqual(tree.root, self.expected_root())
+    
+    def test_proof_endpoint_returns_verifiable_proof(self):
+        """Test that a voter's proof verifies, syncing their vote on demand."""
+        for index, voter in enumerate(self.voters):
+            self.vote(voter, vote_count=index + 1)
+        
+        response = self.client.get(
+            f'/api/v1/governance/proposals/{self.proposal.id}/vote_proof/', {'voter': self.voters[4].id}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['vote_count'], 5)
+        self.assertEqual(response.data['root'], self.expected_root())
+        
+        leaf = merkle.leaf_hash(self.proposal.pk, self.voters[4].pk, 5, True)
+        self.assertEqual(response.data['leaf'], leaf)
+        self.assertTrue(merkle.verify_proof(
+            leaf, response.data['leaf_index'], response.data['siblings'], response.data['root']
+        ))
+    
+    def test_proof_for_missing_vote(self):
+        """Test that asking for a voter without a vote returns a 404."""
+        response = self.client.get(f'/api/v1/governance/proposals/{self.proposal.id}/vote_proof/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+    
+    def test_end_voting_seals_the_tree(self):
+        """Test that finalizing a proposal appends its remaining votes."""
+        for voter in self.voters[:4]:
+            self.vote(voter)
+        self.proposal.end_voting()
+        
+        tree = VoteMerkleTree.objects.get(proposal=self.proposal)
+        self.assertEqual(tree.leaf_count, 4)
+        self.assertEqual(tree.root, self.expected_root())
+    
+    def test_rebuild_command_recomputes_trees(self):
+        """Test that the parallel rebuild drops stale leaves and matches the votes."""
+        votes = [self.vote(voter) for voter in self.voters[:5]]
+        VoteMerkleTree.sync(self.proposal.pk)
+        votes[1].delete()
+        
+        out = StringIO()
+        call_command('rebuild_vote_merkle_trees', '--workers', '2', stdout=out)
+        self.assertIn('Rebuilt 1 vote Merkle trees with 4 leaves', out.getvalue())
+        
+        tree = VoteMerkleTree.objects.get(proposal=self.proposal)
+        self.assertEqual(tree.leaf_count, 4)
+        self.assertEqual(tree.root, self.expected_root())
+        self.assertEqual(VoteMerkleNode.objects.filter(tree=tree, vote__isnull=True, level=0).count(), 0)
+        
+        # Stored frontier still supports appends after a rebuild
+        self.vote(self.voters[5])
+        self.assertEqual(VoteMerkleTree.sync(self.proposal.pk), 1)
+        tree.refresh_from_db()
+        self.assertEqual(tree.root, self.expected_root())
@@ -0,0 +1,191 @@
+"""
+Tests for incremental vote tallying in the governance app.
+"""
+
+from io import StringIO
+from unittest import mock
+
+from django.db import DatabaseError
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+
+from governance.models import Proposal, Vote, VoteCounterShard
+from governance.tasks import merge_vote_counter_shards
+
+
+class VoteTallyTest(TestCase):
+    """Test that proposal tallies are maintained with in-database deltas."""
+    
+    def setUp(self):
+        """Set up test data."""
+        self.proposer = User.objects.create_user(username='proposer', password='password123')
+        self.voters = [
+            User.objects.create_user(username=f'voter{i}', password='password123')
+            for i in range(3)
+        ]
+        self.proposal = Proposal.objects.create(
+            title='Tally Proposal',
+            description='Tally test',
+            rationale='Testing',
+            implementation_details='None',
+            timeline='None',
+            proposer=self.proposer,
+            status=Proposal.Status.VOTING
+        )
+    
+    def test_votes_increment_tallies(self):
+        """Test that each new vote adds only its own contribution."""
+        Vote.objects.create(proposal=self.proposal, voter=self.voters[0], vote_count=3, is_for=True)
+        Vote.objects.create(proposal=self.proposal, voter=self.voters[1], vote_count=2, is_for=False)
+        Vote.objects.create(proposal=self.proposal, voter=self.voters[2], vote_count=4, is_for=True)
+        
+        self.proposal.refresh_from_db()
+        self.assertEqual(self.proposal.total_votes_for, 7)
+        self.assertEqual(self.proposal.total_votes_against, 2)
+    
+    def test_vote_save_does_not_rescan_votes(self):
+        """Test that saving a vote costs a fixed number of queries."""
+        for voter in self.voters[:2]:
+            Vote.objects.create(proposal=self.proposal, voter=voter, vote_count=1)
+        
+        # INSERT vote + UPDATE proposal, regardless of existing votes
+        with self.assertNumQueries(2):
+            Vote.objects.create(proposal=self.proposal, voter=self.voters[2], vote_count=1)
+    
+    def test_changed_and_deleted_votes_adjust_tallies(self):
+        """Test that updating or deleting a vote applies the difference."""
+        vote = Vote.objects.create(proposal=self.proposal, voter=self.voters[0], vote_count=3)
+        
+        vote = Vote.objects.get(pk=vote.pk)
+        vote.vote_count = 5
+        vote.is_for = False
+        vote.save()
+        
+        self.proposal.refresh_from_db()
+        self.assertEqual(self.proposal.total_votes_for, 0)
+        self.assertEqual(self.proposal.total_votes_against, 5)
+        
+        vote.delete()
+        self.proposal.refresh_from_db()
+        self.assertEqual(self.proposal.total_votes_against, 0)
+    
+    def test_recompute_tallies_repairs_drift(self):
+        """Test that the recompute_tallies command fixes drifted totals."""
+        Vote.objects.create(proposal=self.proposal, voter=self.voters[0], vote_count=3, is_for=True)
+        Vote.objects.create(proposal=self.proposal, voter=self.voters[1], vote_count=2, is_for=False)
+        Proposal.objects.filter(pk=self.proposal.pk).update(total_votes_for=99, total_votes_against=0)
+        
+        out = StringIO()
+        call_command('recompute_tallies', '--dry-run', stdout=out)
+        self.assertIn('found 1', out.getvalue())
+        self.proposal.refresh_from_db()
+        self.assertEqual(self.proposal.total_votes_for, 99)
+        
+        call_command('recompute_tallies', '--chunk-size', '1', stdout=StringIO())
+        self.proposal.refresh_from_db()
+        self.assertEqual(self.proposal.total_votes_for, 3)
+        self.assertEqual(self.proposal.total_votes_against, 2)
+
+
+class VoteTallyAtomicityTest(TransactionTestCase):
+    """Test that a vote row and its tally delta commit together."""
+    
+    def test_failed_tally_delta_rolls_back_the_vote(self):
+        """Test that a vote is neither saved nor deleted without its delta."""
+        proposer = User.objects.create_user(username='proposer', password='password123')
+        voter = User.objects.create_user(username='voter', password='password123')
+        proposal = Proposal.objects.create(
+            title='Atomic Proposal', description='Atomicity', rationale='Testing',
+            implementation_details='None', timeline='None', proposer=proposer,
+            status=Proposal.Status.VOTING
+        )
+        vote = Vote.objects.create(proposal=proposal, voter=voter, vote_count=3, is_for=True)
+        
+        with mock.patch.object(Proposal, 'apply_tally_delta', side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                vote.delete()
+            with self.assertRaises(DatabaseError):
+                Vote.objects.create(proposal=proposal, voter=proposer, vote_count=2, is_for=False)
+        
+        self.assertEqual(list(Vote.objects.values_list('voter_id', flat=True)), [voter.pk])
+        proposal.refresh_from_db()
+        self.assertEqual((proposal.total_votes_for, proposal.total_votes_against), (3, 0))
+
+
+@override_settings(VOTE_COUNTER_SHARDS=4)
+class ShardedVoteCounterTest(VoteTallyTest):
+    """Run the tally tests with sharded counters enabled."""
+    
+    def refresh_tallies(self):
+        """Merge shards so the proposal row holds the full tallies."""
+        merge_vote_counter_shards()
+        self.proposal.refresh_from_db()
+    
+    def test_votes_increment_tallies(self):
+        """Test that votes land on shards and are readable before merging."""
+        Vote.objects.create(proposal=self.proposal, voter=self.voters[0], vote_count=3, is_for=True)
+        Vote.objects.create(proposal=self.proposal, voter=self.voters[1], vote_count=2, is_for=False)
+        
+        self.proposal.refresh_from_db()
+        self.assertEqual(self.proposal.total_votes_for, 0)
+        self.assertEqual(self.proposal.get_live_tallies(), (3, 2))
+        
+        self.refresh_tallies()
+        self.assertEqual(self.proposal.total_votes_for, 3)
+        self.assertEqual(self.proposal.total_votes_against, 2)
+        self.assertFalse(
+            VoteCounterShard.objects.exclude(votes_for=0, votes_against=0).exists()
+        )
+    
+    def test_vote_save_does_not_rescan_votes(self):
+        """Test that saving a vote never touches the proposal row."""
+        # Shards are created on first use, so pre-create them all
+        for shard in range(4):
+            VoteCounterShard.objects.create(proposal=self.proposal, shard=shard)
+        
+        # INSERT vote + UPDATE shard
+        with self.assertNumQueries(2):
+            Vote.objects.create(proposal=self.proposal, voter=self.voters[1], vote_count=1)
+    
+    def test_changed_and_deleted_votes_adjust_tallies(self):
+        """Test that negative deltas on shards merge correctly."""
+        vote = Vote.objects.create(proposal=self.proposal, voter=self.voters[0], vote_count=3)
+        vote = Vote.objects.get(pk=vote.pk)
+        vote.vote_count = 5
+        vote.is_for = False
+        vote.save()
+        
+        self.refresh_tallies()
+        self.assertEqual(self.proposal.total_votes_for, 0)
+        self.assertEqual(self.proposal.total_votes_against, 5)
+    
+    def test_recompute_tallies_repairs_drift(self):
+        """Test that unmerged shard counts are neither flagged nor counted twice."""
+        Vote.objects.create(proposal=self.proposal, voter=self.voters[0], vote_count=3, is_for=True)
+        Vote.objects.create(proposal=self.proposal, voter=self.voters[1], vote_count=2, is_for=False)
+        
+        out = StringIO()
+        call_command('recompute_tallies', stdout=out)
+        self.assertIn('repaired 0', out.getvalue())
+        
+        Proposal.objects.filter(pk=self.proposal.pk).update(total_votes_for=99)
+        call_command('recompute_tallies', stdout=StringIO())
+        self.proposal.refresh_from_db()
+        self.assertEqual(self.proposal.total_votes_for, 0)
+        
+        self.refresh_tallies()
+        self.assertEqual(self.proposal.total_votes_for, 3)
+        self.assertEqual(self.proposal.total_votes_against, 2)
+    
+    def test_end_voting_merges_shards(self):
+        """Test that ending the vote reads the merged shard counts."""
+        for voter in self.voters:
+            Vote.objects.create(proposal=self.proposal, voter=voter, vote_count=2, is_for=True)
+        self.proposal.total_voting_power = 10
+        self.proposal.save()
+        
+        self.assertTrue(self.proposal.end_voting())
+        self.proposal.refresh_from_db()
+        self.assertEqual(self.proposal.total_votes_for, 6)
+        self.assertEqual(self.proposal.status, Proposal.Status.APPROVED)
@@ -12,11 +12,16 @@ router.register(r'proposals', views.ProposalViewSet)
 router.register(r'votes', views.VoteViewSet)
 router.register(r'comments', views.ProposalCommentViewSet)
 router.register(r'tokens', views.GovernanceTokenViewSet)
+router.register(r'voting-power', views.EffectiveVotingPowerViewSet)
 router.register(r'guardians', views.GuardianViewSet)
 router.register(r'members', views.MemberViewSet)
 router.register(r'verification-requests', views.VerificationRequestViewSet)
 router.register(r'circuit-breakers', views.CircuitBreakerViewSet)
+router.register(r'suspicious-voting-windows', views.SuspiciousVotingWindowViewSet)
+router.register(r'committee-selections', views.CommitteeSelectionViewSet)
+router.register(r'search', views.SearchViewSet, basename='search')
 
 urlpatterns = [
+    path('proposals/<int:pk>/stream/', views.proposal_tally_stream, name='proposal-tally-stream'),
     path('', include(router.urls)),
 ] 
\ No newline at end of file
@@ -2,24 +2,44 @@
 Views for the governance app.
 """
 
+from asgiref.sync import sync_to_async
 from rest_framework import viewsets, permissions, status, filters
 from rest_framework.decorators import action
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from django.http import JsonResponse, StreamingHttpResponse
 from django.utils import timezone
-from django.db.models import Sum
+from django.db.models import Sum, OuterRef, Subquery, IntegerField
+from django.db.models.functions import Coalesce
 from django.conf import settings
 from django_filters.rest_framework import DjangoFilterBackend
 from django.contrib.auth.models import User
 
+from dao_governance.export import StreamingExportMixin
+from dao_governance.filters import StableOrderingFilter
+from dao_governance.pagination import KeysetPagination, SearchPageNumberPagination
 from .models import (
     Proposal, Vote, ProposalComment, GovernanceToken, 
-    Guardian, Member, VerificationRequest, CircuitBreaker
+    Guardian, Member, VerificationRequest, CircuitBreaker, VoteCounterShard,
+    EffectiveVotingPower, TokenSupply, VoteMerkleTree, VoteMerkleNode, SuspiciousVotingWindow,
+    CommitteeSelection
 )
 from .serializers import (
-    ProposalSerializer, VoteSerializer, ProposalCommentSerializer,
+    ProposalSerializer, ProposalSummarySerializer, VoteSerializer, ProposalCommentSerializer,
     GovernanceTokenSerializer, GuardianSerializer, MemberSerializer,
-    VerificationRequestSerializer, CircuitBreakerSerializer
+    VerificationRequestSerializer, CircuitBreakerSerializer,
+    BatchVoteSerializer, BatchVoteItemSerializer, EffectiveVotingPowerSerializer,
+    SearchResultSerializer, SuspiciousVotingWindowSerializer,
+    CommitteeSelectionSerializer, CommitteeDrawSerializer
 )
+from .services import cast_votes_batch
+from .delegation import DelegationCycleError
+from .committee import CommitteeSelectionError, replay_selection, select_committee
+from . import search
+from .search import FullTextSearchFilter
+from .streams import get_broadcaster
 from .permissions import (
     IsProposalOwnerOrReadOnly, IsVoteOwnerOrReadOnly, 
     IsCommentOwnerOrReadOnly, IsTokenOwnerOrReadOnly,
@@ -27,21 +47,100 @@ from .permissions import (
 )
 
 
-class ProposalViewSet(viewsets.ModelViewSet):
+class ProposalViewSet(StreamingExportMixin, viewsets.ModelViewSet):
     """API endpoint for proposals."""
     
     queryset = Proposal.objects.all()
     serializer_class = ProposalSerializer
     permission_classes = [permissions.IsAuthenticated, IsProposalOwnerOrReadOnly]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    pagination_class = SearchPageNumberPagination
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter, StableOrderingFilter]
     filterset_fields = ['status', 'proposer']
     search_fields = ['title', 'description']
+    search_kind = search.PROPOSAL
     ordering_fields = ['created_at', 'updated_at', 'total_votes_for', 'total_votes_against']
+    export_fields = (
+        'id', 'title', 'proposer_id', 'proposer__username', 'status', 'created_at',
+        'updated_at', 'discussion_start_time', 'voting_start_time', 'voting_end_time',
+        'execution_time', 'total_votes_for', 'total_votes_against', 'total_voting_power',
+        'content_document_id', 'description', 'rationale', 'implementation_details', 'timeline'
+    )
+    
+    def get_serializer_class(self):
+        """Use the summary serializer for lists."""
+        if self.action == 'list':
+            return ProposalSummarySerializer
+        return super().get_serializer_class()
+    
+    def get_queryset(self):
+        """Annotate unmerged shard counts so reads see live tallies.
+        
+        Lists and content reads skip the long text bodies.
+        """
+        queryset = super().get_queryset()
+        if self.action == 'list':
+            queryset = queryset.select_related('proposer').defer(*Proposal.CONTENT_FIELDS)
+        elif self.action == 'content':
+            return queryset.only('id', 'proposer', 'content_document_id')
+        if not getattr(settings, 'VOTE_COUNTER_SHARDS', 0):
+            return queryset
+        
+        shards = VoteCounterShard.objects.filter(
+            proposal=OuterRef('pk')
+        ).order_by().values('proposal')
+        return queryset.annotate(
+            pending_votes_for=Coalesce(
+                Subquery(shards.annotate(total=Sum('votes_for')).values('total')),
+                0, output_field=IntegerField()
+            ),
+            pending_votes_against=Coalesce(
+                Subquery(shards.annotate(total=Sum('votes_against')).values('total')),
+                0, output_field=IntegerField()
+            )
+        )
     
     def perform_create(self, serializer):
         """Set the proposer to the current user."""
         serializer.save(proposer=self.request.user)
     
+    @action(detail=True, methods=['get'])
+    def content(self, request, pk=None):
+        """Return the long text bodies of a proposal."""
+        proposal = self.get_object()
+        return Response({'id': proposal.pk, **proposal.get_content()})
+    
+    @action(detail=True, methods=['get'])
+    def vote_proof(self, request, pk=None):
+        """Return a Merkle inclusion proof for a voter's vote (default: the caller's)."""
+        proposal = self.get_object()
+        voter_id = request.query_params.get('voter', request.user.pk)
+        try:
+            voter_id = int(voter_id)
+        except (TypeError, ValueError):
+            return Response({'detail': 'voter must be a user id.'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        vote = Vote.objects.filter(proposal=proposal, voter_id=voter_id).first()
+        if vote is None:
+            return Response({'detail': 'No vote found for this voter.'}, status=status.HTTP_404_NOT_FOUND)
+        
+        leaf = VoteMerkleNode.objects.select_related('tree').filter(vote=vote).first()
+        if leaf is None:
+            # The vote was cast since the last sync; append it now
+            VoteMerkleTree.sync(proposal.pk)
+            leaf = VoteMerkleNode.objects.select_related('tree').get(vote=vote)
+        
+        return Response({
+            'proposal': proposal.pk,
+            'voter': vote.voter_id,
+            'vote_count': vote.vote_count,
+            'is_for': vote.is_for,
+            'leaf_index': leaf.index,
+            'leaf': leaf.hash,
+            'siblings': leaf.tree.proof(leaf),
+            'root': leaf.tree.root,
+            'leaf_count': leaf.tree.leaf_count,
+        })
+    
     @action(detail=True, methods=['post'])
     def start_discussion(self, request, pk=None):
         """Start the discussion phase for a proposal."""
@@ -67,11 +166,8 @@ class ProposalViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Calculate total voting power
-        total_voting_power = GovernanceToken.objects.aggregate(
-            total=Sum('balance')
-        )['total'] or 0
-        proposal.total_voting_power = total_voting_power
+        # Total voting power comes from the maintained supply counter
+        proposal.total_voting_power = TokenSupply.current().total_supply
         
         proposal.start_voting()
         return Response({'status': proposal.status})
@@ -126,56 +222,60 @@ class ProposalViewSet(viewsets.ModelViewSet):
         return Response({'status': proposal.status})
 
 
-class VoteViewSet(viewsets.ModelViewSet):
+class VoteViewSet(StreamingExportMixin, viewsets.ModelViewSet):
     """API endpoint for votes."""
     
     queryset = Vote.objects.all()
     serializer_class = VoteSerializer
     permission_classes = [permissions.IsAuthenticated, IsVoteOwnerOrReadOnly]
+    pagination_class = KeysetPagination
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['proposal', 'voter', 'is_for']
+    export_fields = (
+        'id', 'proposal_id', 'voter_id', 'voter__username', 'vote_count', 'vote_cost',
+        'is_for', 'created_at'
+    )
     
     def perform_create(self, serializer):
-        """Set the voter to the current user and validate voting rules."""
-        proposal = serializer.validated_data['proposal']
-        vote_count = serializer.validated_data['vote_count']
-        is_for = serializer.validated_data.get('is_for', True)
-        
-        # Check if proposal is in voting phase
-        if proposal.status != Proposal.Status.VOTING:
-            raise serializers.ValidationError("Voting is not active for this proposal.")
-        
-        # Check if voting period has ended
-        if timezone.now() > proposal.voting_end_time:
-            raise serializers.ValidationError("Voting period has ended.")
-        
-        # Get user's governance tokens
-        try:
-            tokens = GovernanceToken.objects.get(holder=self.request.user)
-        except GovernanceToken.DoesNotExist:
-            raise serializers.ValidationError("You don't have any governance tokens.")
-        
-        # Check if user has enough tokens
-        vote_cost = Vote.calculate_vote_cost(vote_count)
-        if vote_cost > tokens.balance:
-            raise serializers.ValidationError(
-                f"Not enough tokens. Cost: {vote_cost}, Balance: {tokens.balance}"
-            )
-        
-        # Check maximum voting power limit
-        max_power_percentage = getattr(settings, 'MAX_VOTING_POWER_PERCENTAGE', 0.25)
-        max_votes = int(proposal.total_voting_power * max_power_percentage)
-        if vote_count > max_votes:
-            raise serializers.ValidationError(
-                f"Exceeds maximum voting power limit of {max_power_percentage * 100}%"
+        """Set the voter to the current user."""
+        serializer.save(voter=self.request.user)
+    
+    @action(detail=False, methods=['post'])
+    def batch(self, request):
+        """Cast a batch of relayed votes and report the outcome per item."""
+        if not request.user.has_perm('governance.relay_votes'):
+            return Response(
+                {'detail': 'You do not have permission to relay votes.'},
+                status=status.HTTP_403_FORBIDDEN
             )
         
-        # Deduct tokens and lock them
-        tokens.balance -= vote_cost
-        tokens.lock_for_voting()
-        tokens.save()
-        
-        serializer.save(voter=self.request.user, vote_cost=vote_cost)
+        batch_serializer = BatchVoteSerializer(data=request.data)
+        batch_serializer.is_valid(raise_exception=True)
+        raw_items = batch_serializer.validated_data['votes']
+        
+        # Shape errors are reported per item; the rest go to the service together
+        results = [None] * len(raw_items)
+        items = []
+        item_indexes = []
+        for index, raw_item in enumerate(raw_items):
+            item_serializer = BatchVoteItemSerializer(data=raw_item)
+            if item_serializer.is_valid():
+                items.append(item_serializer.validated_data)
+                item_indexes.append(index)
+            else:
+                results[index] = {'index': index, 'status': 'error', 'errors': item_serializer.errors}
+        
+        if items:
+            for index, result in zip(item_indexes, cast_votes_batch(items)):
+                result['index'] = index
+                results[index] = result
+        
+        created = sum(1 for result in results if result['status'] == 'created')
+        return Response({
+            'created': created,
+            'failed': len(results) - created,
+            'results': results
+        })
 
 
 class ProposalCommentViewSet(viewsets.ModelViewSet):
@@ -184,8 +284,11 @@ class ProposalCommentViewSet(viewsets.ModelViewSet):
     queryset = ProposalComment.objects.all()
     serializer_class = ProposalCommentSerializer
     permission_classes = [permissions.IsAuthenticated, IsCommentOwnerOrReadOnly]
-    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    pagination_class = SearchPageNumberPagination
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter, filters.OrderingFilter]
     filterset_fields = ['proposal', 'author']
+    search_fields = ['content']
+    search_kind = search.COMMENT
     ordering_fields = ['created_at']
     
     def perform_create(self, serializer):
@@ -193,6 +296,30 @@ class ProposalCommentViewSet(viewsets.ModelViewSet):
         serializer.save(author=self.request.user)
 
 
+class SearchViewSet(viewsets.ViewSet):
+    """API endpoint for ranked full-text search over proposals and comments."""
+    
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def list(self, request):
+        """Return highlighted matches for ?q=, optionally limited by ?type=."""
+        query = request.query_params.get('q', '').strip()
+        kind = request.query_params.get('type') or None
+        if not query:
+            return Response(
+                {'detail': 'The q parameter is required.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if kind is not None and kind not in search.KINDS:
+            return Response(
+                {'detail': f"type must be one of: {', '.join(search.KINDS)}."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        serializer = SearchResultSerializer(search.search(query, kind), many=True)
+        return Response(serializer.data)
+
+
 class GovernanceTokenViewSet(viewsets.ModelViewSet):
     """API endpoint for governance tokens."""
     
@@ -228,7 +355,13 @@ class GovernanceTokenViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_404_NOT_FOUND
             )
         
-        token.delegate(delegate)
+        try:
+            token.delegate(delegate)
+        except DelegationCycleError:
+            return Response(
+                {'detail': 'Delegation would create a delegation cycle.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         return Response({'status': 'Delegation successful'})
     
     @action(detail=True, methods=['post'])
@@ -246,6 +379,18 @@ class GovernanceTokenViewSet(viewsets.ModelViewSet):
         return Response({'status': 'Undelegation successful'})
 
 
+class EffectiveVotingPowerViewSet(viewsets.ReadOnlyModelViewSet):
+    """API endpoint for members' effective voting power, looked up by holder ID."""
+    
+    queryset = EffectiveVotingPower.objects.all()
+    serializer_class = EffectiveVotingPowerSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    lookup_field = 'holder'
+    filter_backends = [StableOrderingFilter]
+    ordering_fields = ['effective_power', 'delegated_power']
+    ordering = ['-effective_power']
+
+
 class GuardianViewSet(viewsets.ModelViewSet):
     """API endpoint for guardians."""
     
@@ -391,4 +536,108 @@ class CircuitBreakerViewSet(viewsets.ModelViewSet):
             )
         
         circuit_breaker.deactivate(request.user)
-        return Response({'status': 'Circuit breaker deactivated'}) 
\ No newline at end of file
+        return Response({'status': 'Circuit breaker deactivated'})
+
+
+class SuspiciousVotingWindowViewSet(viewsets.ReadOnlyModelViewSet):
+    """API endpoint for the review queue of possibly coordinated voting."""
+    
+    queryset = SuspiciousVotingWindow.objects.all()
+    serializer_class = SuspiciousVotingWindowSerializer
+    permission_classes = [permissions.IsAuthenticated, permissions.IsAdminUser]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    filterset_fields = ['proposal', 'reason', 'status']
+    ordering_fields = ['window_start', 'flagged_votes']
+    
+    def _review(self, request, confirmed):
+        """Record a review decision on a pending window."""
+        window = self.get_object()
+        
+        if window.status != SuspiciousVotingWindow.Status.PENDING:
+            return Response(
+                {'detail': 'Window has already been reviewed.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        window.review(request.user, confirmed)
+        return Response({'status': window.status})
+    
+    @action(detail=True, methods=['post'])
+    def confirm(self, request, pk=None):
+        """Confirm that a window shows coordinated voting."""
+        return self._review(request, confirmed=True)
+    
+    @action(detail=True, methods=['post'])
+    def dismiss(self, request, pk=None):
+        """Dismiss a window as legitimate voting."""
+        return self._review(request, confirmed=False)
+
+
+class CommitteeSelectionViewSet(viewsets.ReadOnlyModelViewSet):
+    """API endpoint for arbitration committee draws, public for auditing."""
+    
+    queryset = CommitteeSelection.objects.select_related('selected_by')
+    serializer_class = CommitteeSelectionSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def create(self, request, *args, **kwargs):
+        """Draw a new committee; only staff may do so."""
+        if not request.user.is_staff:
+            return Response(
+                {'detail': 'Only staff can select an arbitration committee.'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        serializer = CommitteeDrawSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+        try:
+            selection = select_committee(
+                size=params.get('committee_size'),
+                top_percentage=params.get('top_percentage'),
+                seed=params.get('seed'),
+                weighted=params['weighted'],
+                selected_by=request.user
+            )
+        except CommitteeSelectionError as exc:
+            return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response(self.get_serializer(selection).data, status=status.HTTP_201_CREATED)
+    
+    @action(detail=True, methods=['get'])
+    def verify(self, request, pk=None):
+        """Replay a draw from its seed and compare it with the stored result."""
+        selection = self.get_object()
+        return Response({'id': selection.pk, 'verified': replay_selection(selection)})
+
+
+def _authenticate_stream_request(request):
+    """Run the REST framework authenticators against a plain Django request."""
+    authenticators = [auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES]
+    try:
+        return Request(request, authenticators=authenticators).user
+    except APIException:
+        return None
+
+
+async def proposal_tally_stream(request, pk):
+    """Stream live vote tallies of a proposal as Server-Sent Events.
+    
+    Must be served through ``dao_governance.asgi``; every connected client of
+    a process shares one broadcast subscription and one periodic snapshot.
+    """
+    user = await sync_to_async(_authenticate_stream_request)(request)
+    if user is None or not user.is_authenticated:
+        return JsonResponse(
+            {'detail': 'Authentication credentials were not provided.'},
+            status=status.HTTP_401_UNAUTHORIZED
+        )
+    
+    broadcaster = get_broadcaster()
+    if await broadcaster.snapshot(pk) is None:
+        return JsonResponse({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
+    
+    response = StreamingHttpResponse(broadcaster.stream(pk), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
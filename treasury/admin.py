@@ -52,18 +52,21 @@ class TreasuryTransactionAdmin(admin.ModelAdmin):
     
     list_display = (
         'id', 'asset', 'amount', 'usd_value', 'transaction_type',
-        'status', 'proposer', 'created_at', 'executed_at'
+        'status', 'approval_count', 'rejection_count', 'proposer', 'created_at', 'executed_at'
     )
     list_filter = ('status', 'transaction_type', 'created_at', 'executed_at')
     search_fields = (
         'asset__name', 'asset__symbol', 'description',
         'transaction_hash', 'external_address', 'proposer__username'
     )
-    readonly_fields = ('created_at', 'executed_at')
+    readonly_fields = ('created_at', 'executed_at', 'approval_count', 'rejection_count')
     fieldsets = (
         ('Transaction Details', {
             'fields': ('asset', 'amount', 'usd_value', 'transaction_type', 'status')
         }),
+        ('Approvals', {
+            'fields': ('approval_count', 'rejection_count')
+        }),
         ('Swap Details', {
             'fields': ('destination_asset', 'destination_amount'),
             'classes': ('collapse',)
@@ -0,0 +1,102 @@
+"""
+Batched execution of approved treasury transactions.
+
+Approved transactions are locked and grouped by asset, and the net change of
+each asset is applied to its balance row with a single F-expression UPDATE.
+Balance rows are locked in asset order before any is changed, so concurrent
+executors serialize instead of losing updates, and the transactions are
+marked EXECUTED with one ``bulk_update`` in the same database transaction.
+The batch only flags the treasury metrics as stale; the debounced
+snapshotter writes the next TreasuryMetric.
+"""
+
+from collections import defaultdict, namedtuple
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import AssetBalance, TreasuryTransaction, asset_balances_changed
+
+ExecutionResult = namedtuple('ExecutionResult', ['executed', 'failed'])
+
+INFLOWS = [TreasuryTransaction.TransactionType.DEPOSIT, TreasuryTransaction.TransactionType.REVENUE]
+OUTFLOWS = [TreasuryTransaction.TransactionType.WITHDRAWAL, TreasuryTransaction.TransactionType.EXPENSE]
+
+
+def balance_deltas(treasury_transaction):
+    """Return the (asset_id, balance delta, usd delta) entries of a transaction.
+    
+    Raises ValueError for a swap without a destination amount.
+    """
+    amount, usd_value = treasury_transaction.amount, treasury_transaction.usd_value
+    if treasury_transaction.transaction_type in INFLOWS:
+        return [(treasury_transaction.asset_id, amount, usd_value)]
+    if treasury_transaction.transaction_type in OUTFLOWS:
+        return [(treasury_transaction.asset_id, -amount, -usd_value)]
+    if (
+        treasury_transaction.transaction_type == TreasuryTransaction.TransactionType.SWAP
+        and treasury_transaction.destination_asset_id
+    ):
+        if treasury_transaction.destination_amount is None:
+            raise ValueError(f"Swap {treasury_transaction.pk} has no destination amount.")
+        # The destination is credited with the same USD value as the source
+        return [
+            (treasury_transaction.asset_id, -amount, -usd_value),
+            (treasury_transaction.destination_asset_id, treasury_transaction.destination_amount, usd_value),
+        ]
+    return []
+
+
+def execute_approved_transactions(transaction_ids=None):
+    """Execute every APPROVED transaction, or those of ``transaction_ids``.
+    
+    Transactions that cannot be applied are marked FAILED; the rest of the
+    batch still executes. Returns an ExecutionResult of transaction ids.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        approved = TreasuryTransaction.objects.select_for_update().filter(
+            status=TreasuryTransaction.Status.APPROVED
+        ).only(
+            'id', 'status', 'executed_at', 'asset_id', 'destination_asset_id',
+            'amount', 'usd_value', 'destination_amount', 'transaction_type'
+        ).order_by('pk')
+        if transaction_ids is not None:
+            approved = approved.filter(pk__in=transaction_ids)
+        
+        deltas = defaultdict(lambda: [Decimal(0), Decimal(0)])
+        executed, failed = [], []
+        for treasury_transaction in approved:
+            try:
+                entries = balance_deltas(treasury_transaction)
+            except ValueError:
+                treasury_transaction.status = TreasuryTransaction.Status.FAILED
+                failed.append(treasury_transaction)
+                continue
+            for asset_id, balance, usd_value in entries:
+                deltas[asset_id][0] += balance
+                deltas[asset_id][1] += usd_value
+            treasury_transaction.status = TreasuryTransaction.Status.EXECUTED
+            treasury_transaction.executed_at = now
+            executed.append(treasury_transaction)
+        
+        if deltas:
+            AssetBalance.objects.bulk_create(
+                [AssetBalance(asset_id=asset_id) for asset_id in sorted(deltas)], ignore_conflicts=True
+            )
+            # Lock every touched balance in a fixed order before changing any
+            list(AssetBalance.objects.select_for_update().filter(
+                asset_id__in=deltas
+            ).order_by('asset_id').values_list('pk', flat=True))
+            for asset_id, (balance, usd_value) in sorted(deltas.items()):
+                AssetBalance.objects.filter(asset_id=asset_id).update(
+                    balance=F('balance') + balance,
+                    usd_value=F('usd_value') + usd_value,
+                    last_updated=now
+                )
+            asset_balances_changed()
+        
+        TreasuryTransaction.objects.bulk_update(executed + failed, ['status', 'executed_at'])
+    return ExecutionResult([t.pk for t in executed], [t.pk for t in failed])
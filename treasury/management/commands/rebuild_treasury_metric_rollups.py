@@ -0,0 +1,18 @@
+"""
+Management command to rebuild the treasury metric rollups.
+"""
+
+from django.core.management.base import BaseCommand
+
+from treasury.models import TreasuryMetricRollup
+
+
+class Command(BaseCommand):
+    """Recompute the hourly, daily and weekly treasury metric rollups."""
+    
+    help = 'Rebuild the treasury metric rollups from the raw metrics'
+    
+    def handle(self, *args, **options):
+        """Run the rebuild."""
+        buckets = TreasuryMetricRollup.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {buckets} treasury metric rollup buckets"))
@@ -2,7 +2,12 @@
 Models for the treasury app.
 """
 
-from django.db import models
+import datetime
+import uuid
+
+from django.db import models, transaction, IntegrityError
+from django.db.models import Case, F, Value, When
+from django.db.models.functions import Greatest, Least
 from django.conf import settings
 from django.contrib.auth.models import User
 from django.utils import timezone
@@ -51,6 +56,30 @@ class Asset(models.Model):
     def __str__(self):
         """String representation of the asset."""
         return f"{self.name} ({self.symbol})"
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Remember the loaded stability flag so saves can detect a change."""
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_is_stable = instance.__dict__.get('is_stable')
+        return instance
+    
+    def save(self, *args, **kwargs):
+        """Override save to flag the treasury metrics and summary as stale when stability changes."""
+        # A new asset has no balances yet, so only a flip on a stored one matters
+        changed = not self._state.adding and getattr(self, '_loaded_is_stable', self.is_stable) != self.is_stable
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if changed:
+                asset_balances_changed()
+        self._loaded_is_stable = self.is_stable
+    
+    def delete(self, *args, **kwargs):
+        """Override delete to flag the metrics and summary as stale; its balances are cascaded away."""
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            asset_balances_changed()
+        return result
 
 
 class AssetBalance(models.Model):
@@ -65,10 +94,26 @@ class AssetBalance(models.Model):
         """Meta options for the AssetBalance model."""
         
         ordering = ['-usd_value']
+        constraints = [
+            models.UniqueConstraint(fields=['asset'], name='unique_asset_balance'),
+        ]
     
     def __str__(self):
         """String representation of the asset balance."""
         return f"{self.asset.symbol}: {self.balance} (${self.usd_value})"
+    
+    def save(self, *args, **kwargs):
+        """Override save to flag the treasury metrics and summary as stale."""
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            asset_balances_changed()
+    
+    def delete(self, *args, **kwargs):
+        """Override delete to flag the treasury metrics and summary as stale."""
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            asset_balances_changed()
+        return result
 
 
 class TreasuryTransaction(models.Model):
@@ -117,56 +162,73 @@ class TreasuryTransaction(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     executed_at = models.DateTimeField(null=True, blank=True)
     
+    # Maintained by TransactionApproval so the threshold check never counts rows
+    approval_count = models.PositiveIntegerField(default=0)
+    rejection_count = models.PositiveIntegerField(default=0)
+    # Idempotency key of the execution task, assigned when the threshold is crossed
+    execution_key = models.UUIDField(null=True, blank=True, unique=True, editable=False)
+    
     class Meta:
         """Meta options for the TreasuryTransaction model."""
         
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='transaction_created_keyset'),
+        ]
     
     def __str__(self):
         """String representation of the transaction."""
         return f"{self.get_transaction_type_display()} of {self.amount} {self.asset.symbol} (${self.usd_value})"
     
-    def execute(self):
-        """Execute the transaction."""
-        if self.status != self.Status.APPROVED:
-            return False
+    @classmethod
+    def apply_approval_delta(cls, transaction_id, approvals=0, rejections=0):
+        """Atomically add deltas to the approval counters and settle the transaction.
         
-        try:
-            # Update asset balances
-            asset_balance, created = AssetBalance.objects.get_or_create(asset=self.asset)
-            
-            if self.transaction_type in [self.TransactionType.DEPOSIT, self.TransactionType.REVENUE]:
-                asset_balance.balance += self.amount
-                asset_balance.usd_value += self.usd_value
-            elif self.transaction_type in [self.TransactionType.WITHDRAWAL, self.TransactionType.EXPENSE]:
-                asset_balance.balance -= self.amount
-                asset_balance.usd_value -= self.usd_value
-            elif self.transaction_type == self.TransactionType.SWAP and self.destination_asset:
-                # Decrease source asset
-                asset_balance.balance -= self.amount
-                asset_balance.usd_value -= self.usd_value
+        The first change that lifts a pending transaction to the multisig
+        threshold approves it with a conditional UPDATE, so exactly one
+        approver wins, and enqueues its execution once the transaction
+        commits. Enough rejections that the active guardians can no longer
+        reach the threshold reject it the same way. Returns the execution
+        key, if any.
+        """
+        if not approvals and not rejections:
+            return None
+        cls.objects.filter(pk=transaction_id).update(
+            approval_count=F('approval_count') + approvals,
+            rejection_count=F('rejection_count') + rejections
+        )
+        
+        threshold = settings.TREASURY_MULTISIG_THRESHOLD
+        pending = cls.objects.filter(pk=transaction_id, status=cls.Status.PENDING)
+        if approvals > 0:
+            execution_key = uuid.uuid4()
+            if pending.filter(approval_count__gte=threshold).update(
+                status=cls.Status.APPROVED, execution_key=execution_key
+            ):
+                from .tasks import execute_treasury_transaction
                 
-                # Increase destination asset
-                dest_balance, created = AssetBalance.objects.get_or_create(asset=self.destination_asset)
-                dest_balance.balance += self.destination_amount
-                dest_balance.usd_value += self.usd_value  # Assuming same USD value for simplicity
-                dest_balance.save()
-            
-            asset_balance.save()
-            
-            # Update transaction status
-            self.status = self.Status.EXECUTED
-            self.executed_at = timezone.now()
-            self.save()
-            
-            # Update treasury metrics
-            update_treasury_metrics()
-            
-            return True
-        except Exception as e:
-            self.status = self.Status.FAILED
-            self.save()
-            return False
+                transaction.on_commit(
+                    lambda: execute_treasury_transaction.delay(transaction_id, str(execution_key))
+                )
+                return execution_key
+        if rejections > 0:
+            guardians = Guardian.objects.filter(is_active=True).count()
+            pending.filter(
+                rejection_count__gt=guardians - threshold
+            ).update(status=cls.Status.REJECTED)
+        return None
+    
+    def execute(self):
+        """Execute the transaction if it is approved, and return whether it ran.
+        
+        Runs through the batch executor, which locks the row and re-checks
+        its status, so concurrent or repeated calls execute it at most once.
+        """
+        from .executor import execute_approved_transactions
+        
+        result = execute_approved_transactions([self.pk])
+        self.refresh_from_db(fields=['status', 'executed_at'])
+        return self.pk in result.executed
 
 
 class TransactionApproval(models.Model):
@@ -189,24 +251,44 @@ class TransactionApproval(models.Model):
         action = "approved" if self.approved else "rejected"
         return f"{self.guardian.user.username} {action} transaction {self.transaction.id}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Remember the loaded counter contribution so saves can apply deltas."""
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_contribution = instance._contribution()
+        return instance
+    
+    def _contribution(self):
+        """Return the (transaction, approvals, rejections) this approval counts for."""
+        if self.approved:
+            return self.transaction_id, 1, 0
+        return self.transaction_id, 0, 1
+    
     def save(self, *args, **kwargs):
-        """Override save to check for threshold and execute transaction if needed."""
-        super().save(*args, **kwargs)
+        """Override save to update the transaction's approval counters."""
+        previous = getattr(self, '_loaded_contribution', None)
         
-        # Check if we've reached the approval threshold
-        transaction = self.transaction
-        if transaction.status == TreasuryTransaction.Status.PENDING:
-            approvals = TransactionApproval.objects.filter(
-                transaction=transaction, approved=True
-            ).count()
-            
-            # Get the threshold from settings
-            threshold = getattr(settings, 'TREASURY_MULTISIG_THRESHOLD', 5)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
             
-            if approvals >= threshold:
-                transaction.status = TreasuryTransaction.Status.APPROVED
-                transaction.save()
-                transaction.execute()
+            # Apply only the change in this approval's contribution to the counters
+            transaction_id, approvals, rejections = self._contribution()
+            if previous is not None:
+                if previous[0] == transaction_id:
+                    approvals -= previous[1]
+                    rejections -= previous[2]
+                else:
+                    TreasuryTransaction.apply_approval_delta(previous[0], -previous[1], -previous[2])
+            TreasuryTransaction.apply_approval_delta(transaction_id, approvals, rejections)
+        self._loaded_contribution = self._contribution()
+    
+    def delete(self, *args, **kwargs):
+        """Override delete to remove this approval from the transaction's counters."""
+        transaction_id, approvals, rejections = self._contribution()
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            TreasuryTransaction.apply_approval_delta(transaction_id, -approvals, -rejections)
+        return result
 
 
 class TreasuryMetric(models.Model):
@@ -222,6 +304,9 @@ class TreasuryMetric(models.Model):
         """Meta options for the TreasuryMetric model."""
         
         ordering = ['-timestamp']
+        indexes = [
+            models.Index(fields=['timestamp', 'id'], name='metric_timestamp_keyset'),
+        ]
     
     def __str__(self):
         """String representation of the treasury metric."""
@@ -232,6 +317,163 @@ class TreasuryMetric(models.Model):
         """Check if the reserve ratio is above the minimum threshold."""
         min_ratio = getattr(settings, 'TREASURY_RESERVE_RATIO', 0.3)
         return self.reserve_ratio >= min_ratio
+    
+    def save(self, *args, **kwargs):
+        """Override save to fold new metrics into the rollups."""
+        if not self._state.adding:
+            return super().save(*args, **kwargs)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            TreasuryMetricRollup.add(self)
+
+
+class TreasuryMetricRollup(models.Model):
+    """Model for the hourly, daily or weekly rollup of treasury metrics.
+    
+    Each new TreasuryMetric is folded into the bucket of every granularity
+    with a single UPDATE, so long-range history is read from a few hundred
+    rollup rows instead of every raw metric.
+    """
+    
+    class Granularity(models.TextChoices):
+        """Rollup bucket size choices."""
+        
+        HOUR = 'HOUR', 'Hour'
+        DAY = 'DAY', 'Day'
+        WEEK = 'WEEK', 'Week'
+    
+    # Rolled-up TreasuryMetric fields
+    METRIC_FIELDS = ('total_value_usd', 'stable_assets_value_usd', 'reserve_ratio')
+    
+    granularity = models.CharField(max_length=10, choices=Granularity.choices)
+    bucket_start = models.DateTimeField()
+    sample_count = models.PositiveIntegerField(default=0)
+    last_timestamp = models.DateTimeField()
+    
+    min_total_value_usd = models.DecimalField(max_digits=36, decimal_places=2)
+    max_total_value_usd = models.DecimalField(max_digits=36, decimal_places=2)
+    sum_total_value_usd = models.DecimalField(max_digits=42, decimal_places=2)
+    last_total_value_usd = models.DecimalField(max_digits=36, decimal_places=2)
+    
+    min_stable_assets_value_usd = models.DecimalField(max_digits=36, decimal_places=2)
+    max_stable_assets_value_usd = models.DecimalField(max_digits=36, decimal_places=2)
+    sum_stable_assets_value_usd = models.DecimalField(max_digits=42, decimal_places=2)
+    last_stable_assets_value_usd = models.DecimalField(max_digits=36, decimal_places=2)
+    
+    min_reserve_ratio = models.DecimalField(max_digits=5, decimal_places=4)
+    max_reserve_ratio = models.DecimalField(max_digits=5, decimal_places=4)
+    sum_reserve_ratio = models.DecimalField(max_digits=12, decimal_places=4)
+    last_reserve_ratio = models.DecimalField(max_digits=5, decimal_places=4)
+    
+    class Meta:
+        """Meta options for the TreasuryMetricRollup model."""
+        
+        ordering = ['granularity', 'bucket_start']
+        unique_together = ('granularity', 'bucket_start')
+    
+    def __str__(self):
+        """String representation of the rollup."""
+        return f"{self.get_granularity_display()} from {self.bucket_start}: {self.sample_count} metrics"
+    
+    @property
+    def avg_total_value_usd(self):
+        """Return the mean total value over the bucket."""
+        return self.sum_total_value_usd / self.sample_count
+    
+    @property
+    def avg_stable_assets_value_usd(self):
+        """Return the mean stable asset value over the bucket."""
+        return self.sum_stable_assets_value_usd / self.sample_count
+    
+    @property
+    def avg_reserve_ratio(self):
+        """Return the mean reserve ratio over the bucket."""
+        return self.sum_reserve_ratio / self.sample_count
+    
+    @classmethod
+    def bucket_start_for(cls, timestamp, granularity):
+        """Return the start of the UTC bucket holding a timestamp."""
+        start = timestamp.astimezone(datetime.timezone.utc).replace(minute=0, second=0, microsecond=0)
+        if granularity == cls.Granularity.HOUR:
+            return start
+        start = start.replace(hour=0)
+        if granularity == cls.Granularity.DAY:
+            return start
+        return start - datetime.timedelta(days=start.weekday())
+    
+    @classmethod
+    def add(cls, metric):
+        """Fold a metric into its bucket of every granularity, creating buckets on first use."""
+        for granularity in cls.Granularity.values:
+            bucket = cls.objects.filter(
+                granularity=granularity, bucket_start=cls.bucket_start_for(metric.timestamp, granularity)
+            )
+            delta = {
+                'sample_count': F('sample_count') + 1,
+                'last_timestamp': Greatest(F('last_timestamp'), Value(metric.timestamp)),
+            }
+            for field in cls.METRIC_FIELDS:
+                metric_field = TreasuryMetric._meta.get_field(field)
+                value = Value(metric_field.to_python(getattr(metric, field)), output_field=metric_field)
+                delta.update({
+                    f'min_{field}': Least(F(f'min_{field}'), value),
+                    f'max_{field}': Greatest(F(f'max_{field}'), value),
+                    f'sum_{field}': F(f'sum_{field}') + value,
+                    f'last_{field}': Case(
+                        When(last_timestamp__lte=metric.timestamp, then=value),
+                        default=F(f'last_{field}')
+                    ),
+                })
+            if bucket.update(**delta):
+                continue
+            
+            try:
+                with transaction.atomic():
+                    cls.objects.create(**cls._first_sample(metric, granularity))
+            except IntegrityError:
+                # Another writer created the bucket first
+                bucket.update(**delta)
+    
+    @classmethod
+    def _first_sample(cls, metric, granularity):
+        """Return the field values of a bucket holding only one metric."""
+        values = {
+            'granularity': granularity,
+            'bucket_start': cls.bucket_start_for(metric.timestamp, granularity),
+            'sample_count': 1,
+            'last_timestamp': metric.timestamp,
+        }
+        for field in cls.METRIC_FIELDS:
+            value = TreasuryMetric._meta.get_field(field).to_python(getattr(metric, field))
+            for prefix in ('min', 'max', 'sum', 'last'):
+                values[f'{prefix}_{field}'] = value
+        return values
+    
+    @classmethod
+    def rebuild(cls):
+        """Recompute every rollup from the raw metrics and return the bucket count."""
+        buckets = {}
+        metrics = TreasuryMetric.objects.order_by('timestamp', 'id')
+        for metric in metrics.iterator(chunk_size=5000):
+            for granularity in cls.Granularity.values:
+                key = (granularity, cls.bucket_start_for(metric.timestamp, granularity))
+                rollup = buckets.get(key)
+                if rollup is None:
+                    buckets[key] = cls(**cls._first_sample(metric, granularity))
+                    continue
+                rollup.sample_count += 1
+                rollup.last_timestamp = metric.timestamp
+                for field in cls.METRIC_FIELDS:
+                    value = getattr(metric, field)
+                    setattr(rollup, f'min_{field}', min(getattr(rollup, f'min_{field}'), value))
+                    setattr(rollup, f'max_{field}', max(getattr(rollup, f'max_{field}'), value))
+                    setattr(rollup, f'sum_{field}', getattr(rollup, f'sum_{field}') + value)
+                    setattr(rollup, f'last_{field}', value)
+        
+        with transaction.atomic():
+            cls.objects.all().delete()
+            cls.objects.bulk_create(buckets.values(), batch_size=1000)
+        return len(buckets)
 
 
 class AllocationStrategy(models.Model):
@@ -278,13 +520,108 @@ class AssetAllocation(models.Model):
         return f"{self.get_asset_type_display()}: {self.target_percentage}% in {self.strategy.name}"
 
 
+class TreasuryMetricState(models.Model):
+    """Singleton model tracking whether the treasury metrics are stale.
+    
+    Balance changes only flag the state as dirty; ``snapshot``
+    writes at most one TreasuryMetric per snapshot interval, so bursts of
+    executions do not each insert a near-identical row.
+    """
+    
+    dirty = models.BooleanField(default=False)
+    last_snapshot_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        """Meta options for the TreasuryMetricState model."""
+        
+        verbose_name_plural = "Treasury metric state"
+    
+    def __str__(self):
+        """Return a string representation of the metric state."""
+        return f"Treasury metrics {'dirty' if self.dirty else 'clean'} (last snapshot {self.last_snapshot_at})"
+    
+    @classmethod
+    def current(cls):
+        """Return the state row, creating it on first use."""
+        state, _ = cls.objects.get_or_create(pk=1)
+        return state
+    
+    @classmethod
+    def mark_dirty(cls):
+        """Flag the metrics as stale in the current transaction.
+        
+        The state row stays locked until the change commits, so a concurrent
+        snapshot either finishes first and finds the flag set again, or waits
+        and reads totals that include the change. Only the change that turns
+        a clean state dirty schedules a snapshot, once it commits.
+        """
+        dirty = cls.objects.select_for_update().filter(pk=1).values_list('dirty', flat=True).first()
+        if dirty:
+            return
+        if dirty is None:
+            try:
+                with transaction.atomic():
+                    cls.objects.create(pk=1, dirty=True)
+            except IntegrityError:
+                # Another writer created the row first
+                return cls.mark_dirty()
+        else:
+            cls.objects.filter(pk=1).update(dirty=True)
+        
+        from .tasks import snapshot_treasury_metrics
+        
+        transaction.on_commit(snapshot_treasury_metrics.delay)
+    
+    @classmethod
+    def snapshot(cls, now=None):
+        """Write a TreasuryMetric if balances changed and the interval has passed.
+        
+        The state row is locked while the totals are read, so a balance
+        change either lands before the snapshot or leaves the state dirty.
+        Returns the new metric, or None when the snapshot was skipped.
+        """
+        now = now or timezone.now()
+        interval = timezone.timedelta(seconds=settings.TREASURY_METRIC_SNAPSHOT_INTERVAL_SECONDS)
+        with transaction.atomic():
+            state = cls.objects.select_for_update().get(pk=cls.current().pk)
+            if not state.dirty:
+                return None
+            if state.last_snapshot_at is not None and now - state.last_snapshot_at < interval:
+                return None
+            
+            metric = update_treasury_metrics()
+            state.dirty = False
+            state.last_snapshot_at = now
+            state.save(update_fields=['dirty', 'last_snapshot_at'])
+        return metric
+
+
+def asset_balances_changed():
+    """Report an AssetBalance change made in the current transaction.
+    
+    Flags the treasury metrics as stale and, once the change commits,
+    invalidates the cached balance summary.
+    """
+    from .summary import invalidate_summary
+    
+    TreasuryMetricState.mark_dirty()
+    transaction.on_commit(invalidate_summary)
+
+
+def treasury_totals():
+    """Return (total, stable) USD value of all balances from one grouped query."""
+    totals = dict(
+        AssetBalance.objects.order_by().values_list('asset__is_stable').annotate(
+            total=models.Sum('usd_value')
+        )
+    )
+    stable_value = totals.get(True) or 0
+    return (totals.get(False) or 0) + stable_value, stable_value
+
+
 def update_treasury_metrics():
     """Update treasury metrics based on current asset balances."""
-    # Calculate total values
-    total_value = AssetBalance.objects.aggregate(total=models.Sum('usd_value'))['total'] or 0
-    stable_value = AssetBalance.objects.filter(
-        asset__is_stable=True
-    ).aggregate(total=models.Sum('usd_value'))['total'] or 0
+    total_value, stable_value = treasury_totals()
     volatile_value = total_value - stable_value
     
     # Calculate reserve ratio
@@ -293,9 +630,10 @@ def update_treasury_metrics():
         reserve_ratio = stable_value / total_value
     
     # Create new metric record
-    TreasuryMetric.objects.create(
+    return TreasuryMetric.objects.create(
         total_value_usd=total_value,
         stable_assets_value_usd=stable_value,
         volatile_assets_value_usd=volatile_value,
         reserve_ratio=reserve_ratio
-    ) 
\ No newline at end of file
+    )
+
@@ -8,7 +8,7 @@ from governance.models import Guardian
 from governance.serializers import UserSerializer, GuardianSerializer
 from .models import (
     Asset, AssetBalance, TreasuryTransaction, TransactionApproval,
-    TreasuryMetric, AllocationStrategy, AssetAllocation
+    TreasuryMetric, TreasuryMetricRollup, AllocationStrategy, AssetAllocation
 )
 
 
@@ -50,7 +50,6 @@ class TreasuryTransactionSerializer(serializers.ModelSerializer):
     proposer = UserSerializer(read_only=True)
     status_display = serializers.CharField(source='get_status_display', read_only=True)
     transaction_type_display = serializers.CharField(source='get_transaction_type_display', read_only=True)
-    approval_count = serializers.SerializerMethodField()
     
     class Meta:
         """Meta options for the TreasuryTransactionSerializer."""
@@ -60,13 +59,9 @@ class TreasuryTransactionSerializer(serializers.ModelSerializer):
             'id', 'asset', 'amount', 'usd_value', 'transaction_type', 'transaction_type_display',
             'status', 'status_display', 'destination_asset', 'destination_amount',
             'transaction_hash', 'external_address', 'description', 'proposer',
-            'created_at', 'executed_at', 'approval_count'
+            'created_at', 'executed_at', 'approval_count', 'rejection_count'
         ]
-        read_only_fields = ['status', 'executed_at', 'approval_count']
-    
-    def get_approval_count(self, obj):
-        """Get the number of approvals for this transaction."""
-        return obj.approvals.filter(approved=True).count()
+        read_only_fields = ['status', 'executed_at', 'approval_count', 'rejection_count']
 
 
 class TransactionCreateSerializer(serializers.ModelSerializer):
@@ -156,6 +151,26 @@ class TreasuryMetricSerializer(serializers.ModelSerializer):
         read_only_fields = ['timestamp', 'is_reserve_ratio_healthy']
 
 
+class TreasuryMetricRollupSerializer(serializers.ModelSerializer):
+    """Serializer for TreasuryMetricRollup model."""
+    
+    avg_total_value_usd = serializers.DecimalField(max_digits=36, decimal_places=2, read_only=True)
+    avg_stable_assets_value_usd = serializers.DecimalField(max_digits=36, decimal_places=2, read_only=True)
+    avg_reserve_ratio = serializers.DecimalField(max_digits=5, decimal_places=4, read_only=True)
+    
+    class Meta:
+        """Meta options for the TreasuryMetricRollupSerializer."""
+        
+        model = TreasuryMetricRollup
+        fields = [
+            'bucket_start', 'sample_count',
+            'min_total_value_usd', 'max_total_value_usd', 'avg_total_value_usd', 'last_total_value_usd',
+            'min_stable_assets_value_usd', 'max_stable_assets_value_usd',
+            'avg_stable_assets_value_usd', 'last_stable_assets_value_usd',
+            'min_reserve_ratio', 'max_reserve_ratio', 'avg_reserve_ratio', 'last_reserve_ratio'
+        ]
+
+
 class AssetAllocationSerializer(serializers.ModelSerializer):
     """Serializer for AssetAllocation model."""
     
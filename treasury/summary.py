@@ -0,0 +1,90 @@
+"""
+Cached treasury balance summary.
+
+The summary is computed with one grouped query and cached under a key that
+includes the current balance version. Every committed AssetBalance change
+replaces the version, so stale summaries are never read again and simply
+expire. Concurrent cache misses are collapsed with a ``cache.add`` lock:
+one request computes the summary while the others wait for it.
+"""
+
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Sum
+
+from .models import AssetBalance
+
+VERSION_KEY = 'treasury:balances:version'
+
+# How often waiting requests check for the summary being computed elsewhere
+POLL_SECONDS = 0.05
+
+
+def summary_key(version):
+    """Return the cache key of the summary for a balance version."""
+    return f'treasury:summary:{version}'
+
+
+def current_version():
+    """Return the balance version, starting a new one if it was evicted."""
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, uuid.uuid4().hex, timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def invalidate_summary():
+    """Start a new balance version; run once an AssetBalance change commits."""
+    cache.set(VERSION_KEY, uuid.uuid4().hex, timeout=None)
+
+
+def compute_summary():
+    """Compute the balance summary with a single grouped query."""
+    rows = AssetBalance.objects.order_by().values_list('asset__is_stable').annotate(
+        total=Sum('usd_value'), count=Count('id')
+    )
+    total_value = stable_value = 0
+    asset_count = 0
+    for is_stable, total, count in rows:
+        total_value += total or 0
+        asset_count += count
+        if is_stable:
+            stable_value += total or 0
+    
+    return {
+        'total_value_usd': total_value,
+        'stable_assets_value_usd': stable_value,
+        'volatile_assets_value_usd': total_value - stable_value,
+        'reserve_ratio': stable_value / total_value if total_value > 0 else 0,
+        'asset_count': asset_count,
+    }
+
+
+def get_summary():
+    """Return the balance summary, computing it at most once per version."""
+    key = summary_key(current_version())
+    summary = cache.get(key)
+    if summary is not None:
+        return summary
+    
+    lock_key = f'{key}:lock'
+    if cache.add(lock_key, True, timeout=settings.TREASURY_SUMMARY_LOCK_SECONDS):
+        try:
+            summary = compute_summary()
+            cache.set(key, summary, timeout=settings.TREASURY_SUMMARY_CACHE_SECONDS)
+        finally:
+            cache.delete(lock_key)
+        return summary
+    
+    # Another request is computing this version; wait for its result
+    deadline = time.monotonic() + settings.TREASURY_SUMMARY_LOCK_SECONDS
+    while time.monotonic() < deadline:
+        time.sleep(POLL_SECONDS)
+        summary = cache.get(key)
+        if summary is not None:
+            return summary
+    return compute_summary()
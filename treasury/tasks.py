@@ -0,0 +1,49 @@
+"""
+Celery tasks for the treasury app.
+"""
+
+import logging
+
+from celery import shared_task
+
+from .executor import execute_approved_transactions
+from .models import TreasuryTransaction, TreasuryMetricState
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(acks_late=True, ignore_result=True)
+def execute_treasury_transaction(transaction_id, execution_key):
+    """Execute a transaction approved by the multisig threshold.
+    
+    The execution key is assigned by the approval that crossed the
+    threshold. ``TreasuryTransaction.execute`` locks the row and only runs
+    an APPROVED transaction, so a redelivered or duplicated task does
+    nothing.
+    """
+    transaction = TreasuryTransaction.objects.filter(
+        pk=transaction_id, execution_key=execution_key
+    ).first()
+    if transaction is None:
+        return False
+    return transaction.execute()
+
+
+@shared_task(ignore_result=True)
+def execute_approved_treasury_transactions():
+    """Execute every approved transaction in one batch.
+    
+    Picks up approved transactions whose execution task was never
+    delivered, and folds any backlog into a single balance update.
+    """
+    result = execute_approved_transactions()
+    if result.failed:
+        logger.warning("Failed to execute treasury transactions %s", result.failed)
+    return len(result.executed)
+
+
+@shared_task(ignore_result=True)
+def snapshot_treasury_metrics():
+    """Write a treasury metric snapshot if balances changed since the last one."""
+    metric = TreasuryMetricState.snapshot()
+    return metric.pk if metric else None
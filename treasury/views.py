@@ -7,21 +7,26 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from django.shortcuts import get_object_or_404
+from django.conf import settings
 from django.contrib.auth.models import User
-from django.db.models import Sum
+from django.db import IntegrityError
 from django.utils import timezone
 
 from .models import (
     Asset, AssetBalance, TreasuryTransaction, TransactionApproval,
-    TreasuryMetric, AllocationStrategy, AssetAllocation
+    TreasuryMetric, TreasuryMetricRollup, AllocationStrategy, AssetAllocation
 )
 from .serializers import (
     AssetSerializer, AssetBalanceSerializer, TreasuryTransactionSerializer,
     TransactionApprovalSerializer, TreasuryMetricSerializer,
     AllocationStrategySerializer, AssetAllocationSerializer,
-    TransactionApprovalCreateSerializer, TransactionCreateSerializer
+    TransactionApprovalCreateSerializer, TransactionCreateSerializer,
+    TreasuryMetricRollupSerializer
 )
+from .summary import get_summary
 from governance.models import Guardian
+from dao_governance.export import StreamingExportMixin
+from dao_governance.pagination import KeysetPagination, TimestampKeysetPagination
 
 
 class IsGuardianOrReadOnly(permissions.BasePermission):
@@ -69,46 +74,29 @@ class AssetBalanceViewSet(viewsets.ReadOnlyModelViewSet):
     @action(detail=False, methods=['get'])
     def summary(self, request):
         """Get a summary of all asset balances."""
-        total_value = AssetBalance.objects.aggregate(total=Sum('usd_value'))['total'] or 0
-        stable_value = AssetBalance.objects.filter(
-            asset__is_stable=True
-        ).aggregate(total=Sum('usd_value'))['total'] or 0
-        volatile_value = total_value - stable_value
-        
-        # Calculate reserve ratio
-        reserve_ratio = 0
-        if total_value > 0:
-            reserve_ratio = stable_value / total_value
-        
-        # Create or update treasury metric
-        TreasuryMetric.objects.create(
-            total_value_usd=total_value,
-            stable_assets_value_usd=stable_value,
-            volatile_assets_value_usd=volatile_value,
-            reserve_ratio=reserve_ratio
-        )
-        
-        return Response({
-            'total_value_usd': total_value,
-            'stable_assets_value_usd': stable_value,
-            'volatile_assets_value_usd': volatile_value,
-            'reserve_ratio': reserve_ratio,
-            'asset_count': AssetBalance.objects.count()
-        })
+        return Response(get_summary())
 
 
-class TreasuryTransactionViewSet(viewsets.ModelViewSet):
+class TreasuryTransactionViewSet(StreamingExportMixin, viewsets.ModelViewSet):
     """
     API endpoint for transactions.
     """
     
     queryset = TreasuryTransaction.objects.all()
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['status', 'transaction_type', 'asset', 'proposer']
     search_fields = ['description', 'transaction_hash', 'external_address']
-    ordering_fields = ['created_at', 'executed_at', 'amount', 'usd_value']
-    ordering = ['-created_at']
+    # Only the cursor's own ordering keeps keyset pages stable
+    ordering_fields = ['created_at']
+    ordering = ['-created_at', '-id']
+    export_fields = (
+        'id', 'asset_id', 'asset__symbol', 'amount', 'usd_value', 'transaction_type',
+        'status', 'destination_asset_id', 'destination_amount', 'transaction_hash',
+        'external_address', 'description', 'proposer_id', 'proposer__username',
+        'created_at', 'executed_at'
+    )
     
     def get_serializer_class(self):
         """Return the appropriate serializer class."""
@@ -146,6 +134,51 @@ class TreasuryTransactionViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
     
+    @action(detail=True, methods=['post'])
+    def approve(self, request, pk=None):
+        """Approve a transaction as a guardian."""
+        return self._record_approval(request, approved=True)
+    
+    @action(detail=True, methods=['post'])
+    def reject(self, request, pk=None):
+        """Reject a transaction as a guardian."""
+        return self._record_approval(request, approved=False)
+    
+    def _record_approval(self, request, approved):
+        """Record a guardian's decision; execution happens in a Celery task."""
+        if not hasattr(request.user, 'guardian'):
+            return Response(
+                {"detail": "Only guardians can approve or reject transactions."},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        transaction = self.get_object()
+        if transaction.status != TreasuryTransaction.Status.PENDING:
+            return Response(
+                {"detail": "This transaction is not pending."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            TransactionApproval.objects.create(
+                transaction=transaction,
+                guardian=request.user.guardian,
+                approved=approved,
+                comments=request.data.get('comments') or request.data.get('reason') or ''
+            )
+        except IntegrityError:
+            return Response(
+                {"detail": "You have already voted on this transaction."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        transaction.refresh_from_db(fields=['status', 'approval_count', 'rejection_count'])
+        return Response({
+            "status": transaction.status,
+            "approval_count": transaction.approval_count,
+            "rejection_count": transaction.rejection_count
+        })
+    
     @action(detail=True, methods=['post'])
     def cancel(self, request, pk=None):
         """Cancel a transaction."""
@@ -175,7 +208,7 @@ class TreasuryTransactionViewSet(viewsets.ModelViewSet):
         return Response({"status": "transaction cancelled"})
 
 
-class TransactionApprovalViewSet(viewsets.ModelViewSet):
+class TransactionApprovalViewSet(StreamingExportMixin, viewsets.ModelViewSet):
     """
     API endpoint for transaction approvals.
     """
@@ -186,6 +219,10 @@ class TransactionApprovalViewSet(viewsets.ModelViewSet):
     filterset_fields = ['transaction', 'guardian', 'approved']
     ordering_fields = ['created_at']
     ordering = ['created_at']
+    export_fields = (
+        'id', 'transaction_id', 'guardian_id', 'guardian__user__username', 'approved',
+        'comments', 'created_at'
+    )
     
     def get_serializer_class(self):
         """Return the appropriate serializer class."""
@@ -217,7 +254,17 @@ class TransactionApprovalViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        return super().create(request, *args, **kwargs)
+        try:
+            return super().create(request, *args, **kwargs)
+        except IntegrityError:
+            return Response(
+                {"detail": "You have already voted on this transaction."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+    
+    def perform_create(self, serializer):
+        """Record the approval as the requesting guardian's."""
+        serializer.save(guardian=self.request.user.guardian)
 
 
 class TreasuryMetricViewSet(viewsets.ReadOnlyModelViewSet):
@@ -228,9 +275,11 @@ class TreasuryMetricViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = TreasuryMetric.objects.all()
     serializer_class = TreasuryMetricSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = TimestampKeysetPagination
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
-    ordering_fields = ['timestamp', 'total_value_usd', 'reserve_ratio']
-    ordering = ['-timestamp']
+    # Only the cursor's own ordering keeps keyset pages stable
+    ordering_fields = ['timestamp']
+    ordering = ['-timestamp', '-id']
     
     @action(detail=False, methods=['get'])
     def latest(self, request):
@@ -247,23 +296,65 @@ class TreasuryMetricViewSet(viewsets.ReadOnlyModelViewSet):
     
     @action(detail=False, methods=['get'])
     def historical(self, request):
-        """Get historical treasury metrics."""
-        # Get time range from query params
-        days = int(request.query_params.get('days', 30))
+        """Get historical treasury metrics, rolled up to fit the requested range.
+        
+        The bucket size is the smallest of raw, hour, day and week that keeps
+        the range within ``TREASURY_HISTORY_MAX_POINTS`` points, unless
+        ``?granularity=`` names one. Raw metrics are capped at the latest
+        ``TREASURY_HISTORY_MAX_POINTS``, and ``truncated`` says whether older
+        ones in the range were left out.
+        """
+        try:
+            days = int(request.query_params.get('days', 30))
+        except ValueError:
+            days = 0
+        if days <= 0:
+            return Response(
+                {"detail": "days must be a positive integer."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         start_date = timezone.now() - timezone.timedelta(days=days)
         
-        # Get metrics within time range
-        metrics = TreasuryMetric.objects.filter(
-            timestamp__gte=start_date
-        ).order_by('timestamp')
+        granularity = request.query_params.get('granularity', '').upper()
+        if not granularity:
+            granularity = self._granularity_for(timezone.timedelta(days=days))
+        elif granularity != 'RAW' and granularity not in TreasuryMetricRollup.Granularity.values:
+            return Response(
+                {"detail": "granularity must be one of raw, hour, day or week."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        # Group by day if more than 90 days
-        if days > 90:
-            # Implementation would depend on database, but would aggregate by day
-            pass
+        truncated = False
+        if granularity == 'RAW':
+            max_points = settings.TREASURY_HISTORY_MAX_POINTS
+            metrics = list(
+                TreasuryMetric.objects.filter(timestamp__gte=start_date).order_by('-timestamp')[:max_points + 1]
+            )
+            truncated = len(metrics) > max_points
+            results = self.get_serializer(metrics[:max_points][::-1], many=True).data
+        else:
+            rollups = TreasuryMetricRollup.objects.filter(
+                granularity=granularity,
+                bucket_start__gte=TreasuryMetricRollup.bucket_start_for(start_date, granularity)
+            ).order_by('bucket_start')
+            results = TreasuryMetricRollupSerializer(rollups, many=True).data
         
-        serializer = self.get_serializer(metrics, many=True)
-        return Response(serializer.data)
+        return Response({'granularity': granularity.lower(), 'truncated': truncated, 'results': results})
+    
+    @staticmethod
+    def _granularity_for(span):
+        """Return the finest bucket size that keeps a time span within the point limit."""
+        max_points = settings.TREASURY_HISTORY_MAX_POINTS
+        raw_interval = timezone.timedelta(seconds=settings.TREASURY_METRIC_SNAPSHOT_INTERVAL_SECONDS)
+        if span / raw_interval <= max_points:
+            return 'RAW'
+        for granularity, size in (
+            (TreasuryMetricRollup.Granularity.HOUR, timezone.timedelta(hours=1)),
+            (TreasuryMetricRollup.Granularity.DAY, timezone.timedelta(days=1)),
+        ):
+            if span / size <= max_points:
+                return granularity
+        return TreasuryMetricRollup.Granularity.WEEK
 
 
 class AllocationStrategyViewSet(viewsets.ModelViewSet):
@@ -334,7 +425,7 @@ class AssetAllocationViewSet(viewsets.ModelViewSet):
         if strategy_id:
             return AssetAllocation.objects.filter(strategy_id=strategy_id)
         return AssetAllocation.objects.all()
-
+    
     @action(detail=False, methods=['get'])
     def pending_for_guardian(self, request):
         """Get transactions pending approval for the current guardian."""